@@ -60,6 +60,14 @@ class MongoDBClient:
         result = collection.insert_one(document)
         return result.inserted_id
     
+    def insert_many(self, collection_name, documents, ordered=False):
+        """Insert several documents in one round trip"""
+        if self.db is None or not documents:
+            return []
+        collection = self.get_collection(collection_name)
+        result = collection.insert_many(documents, ordered=ordered)
+        return result.inserted_ids
+    
     def find_one(self, collection_name, query):
         """Find a single document"""
         if self.db is None:
@@ -67,13 +75,16 @@ class MongoDBClient:
         collection = self.get_collection(collection_name)
         return collection.find_one(query)
     
-    def find_many(self, collection_name, query=None, limit=100):
+    def find_many(self, collection_name, query=None, limit=100, sort=None, projection=None):
         """Find multiple documents"""
         if self.db is None:
             return []
         collection = self.get_collection(collection_name)
         query = query or {}
-        return list(collection.find(query).limit(limit))
+        cursor = collection.find(query, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        return list(cursor.limit(limit))
     
     def update_one(self, collection_name, query, update):
         """Update a single document"""
@@ -83,6 +94,20 @@ class MongoDBClient:
         result = collection.update_one(query, {'$set': update})
         return result.modified_count
     
+    def bulk_write(self, collection_name, operations, ordered=False):
+        """Apply a batch of write operations (e.g., UpdateOne upserts)"""
+        if self.db is None or not operations:
+            return None
+        collection = self.get_collection(collection_name)
+        return collection.bulk_write(operations, ordered=ordered)
+    
+    def create_index(self, collection_name, keys, **kwargs):
+        """Create an index if it does not exist yet"""
+        if self.db is None:
+            return None
+        collection = self.get_collection(collection_name)
+        return collection.create_index(keys, **kwargs)
+    
     def delete_one(self, collection_name, query):
         """Delete a single document"""
         if self.db is None:
@@ -105,6 +130,10 @@ COLLECTIONS = {
     'events': 'Event data and history',
     'budgets': 'Budget records and financial data',
     'feedback': 'Feedback submissions and analysis',
+    'feedback_rows': 'Individual feedback responses with local sentiment scores',
+    'feedback_rollups': 'Pre-aggregated feedback counters per event, club and week',
+    'image_analyses': 'Cached caption / OCR / tag results keyed by image hashes',
+    'template_analyses': 'Cached template analyses keyed by template file hash',
     'documents': 'Generated documents (MOUs, proposals, reports)',
     'files': 'File metadata (actual files in GridFS)'
 }
@@ -7,12 +7,15 @@ from flask import Flask, jsonify, request
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
+import threading
 
 # Import configuration and services
 from config import Config
 from database.mongodb_client import MongoDBClient
 from services.llm_service import LLMService
-from routes import event_routes, feedback_routes, rag_routes, auth_routes, image_routes, management_routes, budget_routes, mou_routes
+from services import executors, image_preprocess, metrics, template_library
+from services.document_generator import get_document_generator
+from routes import event_routes, feedback_routes, rag_routes, auth_routes, image_routes, management_routes, budget_routes, mou_routes, admin_routes
 
 # Load environment variables
 load_dotenv()
@@ -31,13 +34,52 @@ CORS(app, resources={
     }
 })
 
-# Initialize services
-db_client = MongoDBClient()
-llm_service = LLMService()
 
-# Make services available to routes
-app.db = db_client
-app.llm = llm_service
+def start_services():
+    """Connect the database and LLM clients and start the worker pools"""
+    # Make services available to routes
+    app.db = MongoDBClient()
+    app.llm = LLMService()
+
+    # Start the image preprocessing worker processes now, so the first request does not wait for them
+    if image_preprocess.process_pool_enabled():
+        try:
+            workers = executors.warm_process_pool(image_preprocess.PROCESS_POOL, os.getenv('IMAGE_PROCESS_WORKERS') or None)
+            print(f"✅ Image process pool started ({workers} workers)")
+        except Exception as e:
+            print(f"⚠️  Image process pool unavailable, preprocessing inline: {e}")
+
+    # Analyze the standard templates once, so report generation does not go through RAG
+    if template_library.library_enabled():
+        try:
+            document_types = template_library.get_template_library().document_types()
+            print(f"✅ Template library loaded ({', '.join(document_types) or 'no templates'})")
+        except Exception as e:
+            print(f"⚠️  Template library unavailable, using RAG retrieval: {e}")
+
+    # First cleanup runs in the background, so startup does not wait for it
+    timer = threading.Timer(0, cleanup_generated_files)
+    timer.daemon = True
+    timer.start()
+
+
+def cleanup_generated_files():
+    """Delete cached files that were not used recently, then schedule the next run"""
+    try:
+        get_document_generator().derivatives.cleanup(days=int(os.getenv('DERIVATIVE_MAX_AGE_DAYS', 30)))
+        mou_routes.get_document_cache().cleanup(days=int(os.getenv('DOCUMENT_CACHE_MAX_AGE_DAYS', 30)))
+    except Exception as e:
+        print(f"⚠️  Cleanup of generated files failed: {e}")
+
+    timer = threading.Timer(float(os.getenv('CLEANUP_INTERVAL_HOURS', 24)) * 3600, cleanup_generated_files)
+    timer.daemon = True
+    timer.start()
+
+
+# Worker processes import this module as __mp_main__ (forkserver / spawn
+# start method); only the server process sets up clients and pools
+if __name__ != '__mp_main__':
+    start_services()
 
 # Register blueprints
 app.register_blueprint(event_routes.bp)
@@ -48,6 +90,13 @@ app.register_blueprint(image_routes.bp)
 app.register_blueprint(management_routes.bp)
 app.register_blueprint(budget_routes.bp)
 app.register_blueprint(mou_routes.bp)
+app.register_blueprint(admin_routes.bp)
+
+
+@app.before_request
+def bind_metrics_endpoint():
+    """Label AI calls made while serving this request with its endpoint"""
+    metrics.current_endpoint.set(request.endpoint or 'unknown')
 
 
 @app.route('/', methods=['GET'])
@@ -58,8 +107,8 @@ def health_check():
         'message': 'CampusOps API is running',
         'version': '1.0.0',
         'services': {
-            'database': db_client.is_connected(),
-            'llm': llm_service.is_available()
+            'database': app.db.is_connected(),
+            'llm': app.llm.is_available()
         }
     }), 200
 
@@ -69,7 +118,7 @@ def test():
     """Test endpoint"""
     return jsonify({
         'message': 'Test endpoint working!',
-        'mongo_connected': db_client.is_connected()
+        'mongo_connected': app.db.is_connected()
     }), 200
 
 
@@ -97,8 +146,8 @@ if __name__ == '__main__':
     print("🚀 Starting CampusOps Backend Server")
     print("=" * 50)
     print(f"Environment: {os.getenv('FLASK_ENV', 'production')}")
-    print(f"MongoDB: {db_client.is_connected()}")
-    print(f"LLM Service: {llm_service.is_available()}")
+    print(f"MongoDB: {app.db.is_connected()}")
+    print(f"LLM Service: {app.llm.is_available()}")
     print(f"Server: http://{app.config['HOST']}:{app.config['PORT']}")
     print("=" * 50)
     
@@ -0,0 +1,33 @@
+"""
+Admin and monitoring API routes
+Exposes AI usage metrics for Prometheus and the admin dashboard
+"""
+from flask import Blueprint, jsonify, Response
+from services import metrics
+
+bp = Blueprint('admin', __name__)
+
+
+@bp.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(
+        metrics.registry.render_prometheus(),
+        mimetype='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+@bp.route('/api/admin/llm-stats', methods=['GET'])
+def llm_stats():
+    """AI usage summary: requests, tokens, latency and cache hits"""
+    try:
+        return jsonify({
+            'success': True,
+            'data': metrics.llm_stats()
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
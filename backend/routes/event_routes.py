@@ -1,14 +1,25 @@
 """
 Event-related API routes
 """
-from flask import Blueprint, request, jsonify, current_app, send_file
+from flask import Blueprint, Response, request, jsonify, current_app, send_file, stream_with_context
 from werkzeug.utils import secure_filename
-from services.template_analyzer import TemplateAnalyzer
-from services.document_generator import DocumentGenerator
+from services import pdf_renderer
+from services.document_generator import get_document_generator
+from services.job_queue import get_job_queue
+from services.template_cache import TemplateCache, store_template
+import io
+import json
 import os
 
 bp = Blueprint('events', __name__, url_prefix='/api/events')
 
+# Template analysis cache (initialized on first use)
+template_cache = None
+
+# Accepted document output_format values -> rendered format; the same on
+# /generate and /batch ('document' and 'docx' both mean DOCX)
+DOCUMENT_FORMATS = {'document': 'docx', 'docx': 'docx', 'pdf': 'pdf'}
+
 
 @bp.route('/generate', methods=['POST'])
 def generate_event_report():
@@ -17,7 +28,7 @@ def generate_event_report():
         # Get form data
         event_description = request.form.get('event_description')
         document_type = request.form.get('document_type', 'event_plan')
-        output_format = request.form.get('output_format', 'text')  # 'text' or 'document'
+        output_format = request.form.get('output_format', 'text').lower()  # 'text', 'document' / 'docx' or 'pdf'
         
         if not event_description:
             return jsonify({
@@ -25,43 +36,28 @@ def generate_event_report():
                 'error': 'event_description is required'
             }), 400
         
-        # Handle template file upload
-        template_file = request.files.get('template')
-        template_path = None
-        template_analysis = None
+        if output_format != 'text' and output_format not in DOCUMENT_FORMATS:
+            return jsonify({
+                'success': False,
+                'error': 'output_format must be text, document (or docx) or pdf'
+            }), 400
         
-        if template_file and template_file.filename:
-            upload_folder = 'uploads/templates'
-            os.makedirs(upload_folder, exist_ok=True)
-            
-            filename = secure_filename(template_file.filename)
-            template_path = os.path.join(upload_folder, filename)
-            template_file.save(template_path)
-            
-            # Analyze template
-            analyzer = TemplateAnalyzer()
-            template_analysis = analyzer.analyze_template(template_path)
-            
-            if not template_analysis.get('success'):
-                return jsonify({
-                    'success': False,
-                    'error': f"Template analysis failed: {template_analysis.get('error')}"
-                }), 400
+        if output_format == 'pdf' and not pdf_renderer.is_available():
+            return jsonify({
+                'success': False,
+                'error': 'PDF export needs the reportlab package'
+            }), 501
         
-        # Handle image uploads if present
-        images = request.files.getlist('images')
-        image_paths = []
+        # Handle template file upload
+        template_path, template_analysis = _save_and_analyze_template(request.files.get('template'))
+        if template_analysis and not template_analysis.get('success'):
+            return jsonify({
+                'success': False,
+                'error': f"Template analysis failed: {template_analysis.get('error')}"
+            }), 400
         
-        if images:
-            upload_folder = 'uploads/events'
-            os.makedirs(upload_folder, exist_ok=True)
-            
-            for image in images:
-                if image.filename:
-                    filename = secure_filename(image.filename)
-                    filepath = os.path.join(upload_folder, filename)
-                    image.save(filepath)
-                    image_paths.append(filepath)
+        # Handle image uploads if present
+        image_paths = _save_event_images(request.files.getlist('images'))
         
         # Generate report using LLM with template awareness
         llm = current_app.llm
@@ -98,22 +94,24 @@ def generate_event_report():
             db.insert_one('events', event_doc)
         
         # Return based on output format
-        if output_format == 'document':
-            # Generate DOCX document
-            doc_generator = DocumentGenerator()
-            doc_result = doc_generator.generate_event_document(
+        if output_format in DOCUMENT_FORMATS:
+            # Generate DOCX (or PDF) document
+            doc_generator = get_document_generator()
+            generate = doc_generator.generate_event_pdf if output_format == 'pdf' else doc_generator.generate_event_document
+            doc_result = generate(
                 result, 
                 document_type, 
-                metadata
+                metadata,
+                persist=request.form.get('persist', '').lower() == 'true' or None
             )
             
             if doc_result.get('success'):
-                # Send file as download
+                # Stream the in-memory document (BytesIO sets Content-Length)
                 return send_file(
-                    doc_result['filepath'],
+                    io.BytesIO(doc_result['data']),
                     as_attachment=True,
                     download_name=doc_result['filename'],
-                    mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+                    mimetype='application/pdf' if output_format == 'pdf' else 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
                 )
             else:
                 return jsonify({
@@ -139,6 +137,176 @@ def generate_event_report():
         }), 500
 
 
+def get_template_cache():
+    """Get or create the template analysis cache"""
+    global template_cache
+    if template_cache is None:
+        template_cache = TemplateCache(current_app.db)
+    return template_cache
+
+
+def _save_and_analyze_template(template_file):
+    """
+    Save an uploaded template and analyze it
+    
+    Templates are stored under their content hash and a template that was
+    analyzed before is served from the cache.
+    
+    Returns:
+        tuple: (template_path, template_analysis), both None without an upload
+    """
+    if not template_file or not template_file.filename:
+        return None, None
+    
+    sha256, template_path = store_template(template_file, 'uploads/templates')
+    return template_path, get_template_cache().analyze(sha256, template_path)
+
+
+def _save_event_images(images):
+    """Save uploaded event photos and return their paths"""
+    image_paths = []
+    if images:
+        upload_folder = 'uploads/events'
+        os.makedirs(upload_folder, exist_ok=True)
+        
+        for image in images:
+            if image.filename:
+                filename = secure_filename(image.filename)
+                filepath = os.path.join(upload_folder, filename)
+                image.save(filepath)
+                image_paths.append(filepath)
+    return image_paths
+
+
+@bp.route('/batch', methods=['POST'])
+def create_batch():
+    """
+    Queue report generation for many events
+    
+    Expects (multipart form):
+        - events: JSON list of event descriptions, or of objects with
+                  event_description and optional document_type
+          (alternatively, repeated event_description fields)
+        - document_type: Default document type (default: report)
+        - output_format: docx / document (default) or pdf
+        - template: Optional template file shared by all events
+        - images: Optional photos shared by all events
+    
+    Returns 202 with the job id; poll /batch/<job_id> and download
+    /batch/<job_id>/download when complete.
+    """
+    try:
+        document_type = request.form.get('document_type', 'report')
+        output_format = DOCUMENT_FORMATS.get(request.form.get('output_format', 'docx').lower())
+        if output_format is None:
+            return jsonify({'success': False, 'error': 'output_format must be document (or docx) or pdf'}), 400
+        if output_format == 'pdf' and not pdf_renderer.is_available():
+            return jsonify({'success': False, 'error': 'PDF export needs the reportlab package'}), 501
+        
+        if request.form.get('events'):
+            try:
+                events = json.loads(request.form['events'])
+            except ValueError:
+                return jsonify({'success': False, 'error': 'events must be a JSON list'}), 400
+        else:
+            events = request.form.getlist('event_description')
+        
+        if not isinstance(events, list):
+            return jsonify({'success': False, 'error': 'events must be a JSON list'}), 400
+        
+        items = []
+        for event in events:
+            if isinstance(event, str):
+                event = {'event_description': event}
+            if not isinstance(event, dict) or not str(event.get('event_description') or '').strip():
+                return jsonify({'success': False, 'error': 'Every event needs an event_description'}), 400
+            items.append(event)
+        
+        if not items:
+            return jsonify({'success': False, 'error': 'At least one event is required'}), 400
+        
+        max_events = int(os.getenv('BATCH_MAX_EVENTS', 100))
+        if len(items) > max_events:
+            return jsonify({'success': False, 'error': f'At most {max_events} events per batch'}), 400
+        
+        template_path, template_analysis = _save_and_analyze_template(request.files.get('template'))
+        if template_analysis and not template_analysis.get('success'):
+            return jsonify({
+                'success': False,
+                'error': f"Template analysis failed: {template_analysis.get('error')}"
+            }), 400
+        
+        job = get_job_queue().submit(
+            current_app.llm,
+            current_app.db,
+            items,
+            document_type=document_type,
+            template_analysis=template_analysis,
+            images=request.files.getlist('images'),
+            output_format=output_format
+        )
+        
+        return jsonify({
+            'success': True,
+            'job_id': job.id,
+            'total': len(items),
+            'status_url': f'/api/events/batch/{job.id}',
+            'download_url': f'/api/events/batch/{job.id}/download'
+        }), 202
+    
+    except Exception as e:
+        print(f"Error in create_batch: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/batch/<job_id>', methods=['GET'])
+def batch_status(job_id):
+    """Progress of a batch job"""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Batch job not found'}), 404
+    
+    return jsonify({
+        'success': True,
+        'data': job.status()
+    }), 200
+
+
+@bp.route('/batch/<job_id>/download', methods=['GET'])
+def download_batch(job_id):
+    """
+    Stream a ZIP of the batch's documents
+    
+    Available once every event is done or failed (failures are listed in
+    manifest.json); pass ?partial=true to download what is finished so far.
+    """
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Batch job not found'}), 404
+    
+    if not job.finished and request.args.get('partial', '').lower() != 'true':
+        return jsonify({
+            'success': False,
+            'error': 'Batch is still running',
+            'data': job.status()
+        }), 409
+    
+    try:
+        # Opens the documents now, so expiry during the download cannot remove them
+        chunks = job.iter_zip()
+    except FileNotFoundError:
+        return jsonify({'success': False, 'error': 'Batch job not found'}), 404
+    
+    return Response(
+        stream_with_context(chunks),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename=event_reports_{job.id[:8]}.zip'}
+    )
+
+
 @bp.route('/list', methods=['GET'])
 def list_events():
     """List all events"""
@@ -4,8 +4,11 @@ Feedback analysis API routes
 from flask import Blueprint, request, jsonify, current_app
 from werkzeug.utils import secure_filename
 import os
-import csv
-import io
+from services.csv_stream import FeedbackCSVReader
+from services.feedback_pipeline import FeedbackPipeline
+from services.feedback_store import (
+    FeedbackStore, ROLLUPS_COLLECTION, parse_event_date, rollup_view, satisfaction_trend, upload_hash
+)
 
 bp = Blueprint('feedback', __name__, url_prefix='/api/feedback')
 
@@ -29,57 +32,64 @@ def analyze_feedback():
                 'error': 'No file selected'
             }), 400
         
-        # Read CSV file
-        stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
-        csv_reader = csv.DictReader(stream)
+        # Hashed first so a re-upload of the same file is not counted twice
+        content_hash = upload_hash(file.stream)
         
-        # Extract feedback text
-        feedback_items = []
-        for row in csv_reader:
-            # Try common column names for feedback
-            feedback_text = (
-                row.get('feedback') or 
-                row.get('Feedback') or 
-                row.get('comment') or 
-                row.get('Comment') or 
-                row.get('comments') or
-                row.get('Comments') or
-                row.get('response') or
-                str(list(row.values())[0] if row.values() else '')
-            )
-            if feedback_text:
-                feedback_items.append(feedback_text)
-        
-        if not feedback_items:
+        # Decode and parse the upload incrementally; rows flow straight into
+        # the pipeline one chunk at a time
+        reader = FeedbackCSVReader(file.stream)
+        if not reader.fieldnames:
             return jsonify({
                 'success': False,
                 'error': 'No feedback data found in CSV'
             }), 400
         
-        # Combine all feedback
-        combined_feedback = "\n".join(feedback_items[:50])  # Limit to 50 for now
+        # Rows and rollups are persisted chunk by chunk while the pipeline runs
+        db = current_app.db
+        store = FeedbackStore(
+            db if db.is_connected() else None,
+            event_id=request.form.get('event_id'),
+            event_name=request.form.get('event_name'),
+            club_id=request.form.get('club_id'),
+            event_date=parse_event_date(request.form.get('event_date')),
+            content_hash=content_hash
+        )
+        store.ensure_indexes()
+        store.check_duplicate()
         
-        # Analyze using LLM
-        llm = current_app.llm
-        analysis = llm.analyze_feedback(combined_feedback)
+        # Analyze every row: batches are analyzed concurrently and merged
+        pipeline = FeedbackPipeline(current_app.llm)
+        chunk_rows = int(os.getenv('FEEDBACK_CHUNK_ROWS', 10000))
+        analysis = pipeline.analyze_stream(reader.iter_chunks(chunk_rows), on_chunk=store.record_chunk)
+        pipeline_info = analysis.pop('pipeline', {})
+        # Every response read, including those in batches the LLM failed on
+        total_feedback = analysis.get('total_responses') or pipeline_info.get('rows_total', 0)
         
-        # Store in database
-        db = current_app.db
-        if db.is_connected():
-            feedback_doc = {
-                'filename': secure_filename(file.filename),
-                'feedback_count': len(feedback_items),
-                'analysis': analysis,
-                'timestamp': None
-            }
-            db.insert_one('feedback', feedback_doc)
+        if not total_feedback:
+            return jsonify({
+                'success': False,
+                'error': 'No feedback data found in CSV'
+            }), 400
+        
+        # Apply the rollups and store the upload-level analysis
+        upload_id = store.record_upload(secure_filename(file.filename), analysis, total_feedback)
         
         return jsonify({
             'success': True,
             'data': analysis,
             'metadata': {
-                'total_feedback': len(feedback_items),
-                'analyzed': min(len(feedback_items), 50)
+                'total_feedback': total_feedback,
+                'analyzed': pipeline_info.get('rows_analyzed', 0),
+                'batches': pipeline_info.get('batches', 1),
+                'failed_batches': pipeline_info.get('failed_batches', 0),
+                'sent_to_llm': pipeline_info.get('rows_sent_to_llm', total_feedback),
+                'upload_id': str(upload_id or store.upload_id),
+                # Same file already recorded for this event: rows and rollups were not written again
+                'duplicate': store.duplicate_of is not None,
+                'event_id': store.event_id,
+                'club_id': store.club_id,
+                'week': store.week,
+                'rows_stored': store.rows_written
             }
         }), 200
     
@@ -89,3 +99,79 @@ def analyze_feedback():
             'success': False,
             'error': str(e)
         }), 500
+
+
+@bp.route('/trend', methods=['GET'])
+def feedback_trend():
+    """
+    Weekly satisfaction trend from the pre-aggregated rollups
+    
+    Query params: club_id (optional), from / to (ISO weeks, e.g. 2026-W01)
+    """
+    try:
+        db = current_app.db
+        if not db.is_connected():
+            return jsonify({
+                'success': False,
+                'error': 'Database not connected'
+            }), 503
+        
+        trend = satisfaction_trend(
+            db,
+            club_id=request.args.get('club_id'),
+            start_week=request.args.get('from'),
+            end_week=request.args.get('to')
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': trend,
+            'metadata': {
+                'club_id': request.args.get('club_id'),
+                'weeks': len(trend)
+            }
+        }), 200
+    
+    except Exception as e:
+        print(f"Error in feedback_trend: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@bp.route('/rollups/<scope>/<key>', methods=['GET'])
+def feedback_rollup(scope, key):
+    """Totals for one event or club (scope: event | club)"""
+    try:
+        if scope not in ('event', 'club'):
+            return jsonify({
+                'success': False,
+                'error': 'Scope must be event or club'
+            }), 400
+        
+        db = current_app.db
+        if not db.is_connected():
+            return jsonify({
+                'success': False,
+                'error': 'Database not connected'
+            }), 503
+        
+        document = db.find_one(ROLLUPS_COLLECTION, {'scope': scope, 'key': key, 'period': 'all'})
+        if not document:
+            return jsonify({
+                'success': False,
+                'error': 'No feedback recorded'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'data': rollup_view(document)
+        }), 200
+    
+    except Exception as e:
+        print(f"Error in feedback_rollup: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
@@ -6,6 +6,9 @@ Handles image captioning and OCR requests
 from flask import Blueprint, request, jsonify, current_app
 from werkzeug.utils import secure_filename
 import os
+from services import executors
+from services.image_cache import ImageCache
+from services.image_io import spool_upload
 from services.image_service import ImageService
 
 bp = Blueprint('image', __name__, url_prefix='/api/image')
@@ -17,10 +20,83 @@ def get_image_service():
     """Get or create ImageService instance"""
     global image_service
     if image_service is None:
-        image_service = ImageService()
+        image_service = ImageService(cache=ImageCache(current_app.db))
     return image_service
 
 
+def _process_uploaded_images(process, error_label):
+    """
+    Run one ImageService operation over every uploaded image concurrently
+    
+    Uploads are buffered in memory and handed to a bounded worker pool, so
+    nothing is written to (or re-read from) disk and two uploads called
+    IMG_0001.jpg can never clash. Every image gets its own timeout; results
+    come back in upload order.
+    
+    Args:
+        process: Callable(image source) returning the ImageService result dict
+        error_label: Prefix for per-image failure messages
+    
+    Returns:
+        Flask response tuple
+    """
+    # Check if images are provided
+    if 'images' not in request.files:
+        return jsonify({
+            'success': False,
+            'error': 'No images provided'
+        }), 400
+    
+    images = [image for image in request.files.getlist('images') if image and image.filename]
+    
+    if not images:
+        return jsonify({
+            'success': False,
+            'error': 'No images selected'
+        }), 400
+    
+    # Keep each upload in memory (spilling to an anonymous temp file only
+    # above IMAGE_SPOOL_BYTES); the request stream is only readable on this thread
+    spool_bytes = int(os.getenv('IMAGE_SPOOL_BYTES', 8 * 1024 * 1024))
+    saved = []
+    for image in images:
+        filename = secure_filename(image.filename) or 'image'
+        saved.append((filename, spool_upload(image, filename, spool_bytes)))
+    
+    def run(item):
+        filename, upload = item
+        try:
+            result = process(upload)
+            result['image'] = filename
+            return result
+        finally:
+            upload.close()
+    
+    pool = executors.get_thread_pool('images', int(os.getenv('IMAGE_MAX_WORKERS', 6)))
+    timeout = float(os.getenv('IMAGE_TIMEOUT_SECONDS', 90))
+    outcomes = executors.map_ordered(pool, run, saved, timeout=timeout)
+    
+    results = []
+    for (filename, _), (result, error) in zip(saved, outcomes):
+        if error is not None:
+            result = {
+                'success': False,
+                'error': f'{error_label}: {str(error)}',
+                'image': filename
+            }
+        results.append(result)
+    
+    succeeded = sum(1 for result in results if result.get('success'))
+    return jsonify({
+        'success': True,
+        'count': len(results),
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'partial': 0 < succeeded < len(results),
+        'results': results
+    }), 200
+
+
 @bp.route('/caption', methods=['POST'])
 def caption_images():
     """
@@ -34,52 +110,12 @@ def caption_images():
         JSON with captions for each image
     """
     try:
-        # Check if images are provided
-        if 'images' not in request.files:
-            return jsonify({
-                'success': False,
-                'error': 'No images provided'
-            }), 400
-        
-        images = request.files.getlist('images')
         context = request.form.get('context', 'event photo')
-        
-        if not images or all(img.filename == '' for img in images):
-            return jsonify({
-                'success': False,
-                'error': 'No images selected'
-            }), 400
-        
-        # Create uploads directory if it doesn't exist
-        upload_folder = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'uploads', 'images')
-        os.makedirs(upload_folder, exist_ok=True)
-        
-        # Process each image
-        results = []
         service = get_image_service()
-        
-        for image in images:
-            if image and image.filename:
-                # Save image temporarily
-                filename = secure_filename(image.filename)
-                filepath = os.path.join(upload_folder, filename)
-                image.save(filepath)
-                
-                # Generate caption
-                result = service.generate_caption(filepath, context)
-                results.append(result)
-                
-                # Clean up temporary file
-                try:
-                    os.remove(filepath)
-                except:
-                    pass
-        
-        return jsonify({
-            'success': True,
-            'count': len(results),
-            'results': results
-        }), 200
+        return _process_uploaded_images(
+            lambda image: service.generate_caption(image, context),
+            'Caption generation failed'
+        )
         
     except Exception as e:
         return jsonify({
@@ -95,56 +131,18 @@ def ocr_images():
     
     Expects:
         - images: Multiple image files
+        - layout: Optional 'true' to skip local OCR and use the vision model
     
     Returns:
         JSON with extracted text for each image
     """
     try:
-        # Check if images are provided
-        if 'images' not in request.files:
-            return jsonify({
-                'success': False,
-                'error': 'No images provided'
-            }), 400
-        
-        images = request.files.getlist('images')
-        
-        if not images or all(img.filename == '' for img in images):
-            return jsonify({
-                'success': False,
-                'error': 'No images selected'
-            }), 400
-        
-        # Create uploads directory if it doesn't exist
-        upload_folder = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'uploads', 'images')
-        os.makedirs(upload_folder, exist_ok=True)
-        
-        # Process each image
-        results = []
+        layout = request.form.get('layout', 'false').lower() == 'true'
         service = get_image_service()
-        
-        for image in images:
-            if image and image.filename:
-                # Save image temporarily
-                filename = secure_filename(image.filename)
-                filepath = os.path.join(upload_folder, filename)
-                image.save(filepath)
-                
-                # Extract text
-                result = service.extract_text_ocr(filepath)
-                results.append(result)
-                
-                # Clean up temporary file
-                try:
-                    os.remove(filepath)
-                except:
-                    pass
-        
-        return jsonify({
-            'success': True,
-            'count': len(results),
-            'results': results
-        }), 200
+        return _process_uploaded_images(
+            lambda image: service.extract_text_ocr(image, layout=layout),
+            'OCR failed'
+        )
         
     except Exception as e:
         return jsonify({
@@ -166,52 +164,12 @@ def analyze_images():
         JSON with complete analysis for each image
     """
     try:
-        # Check if images are provided
-        if 'images' not in request.files:
-            return jsonify({
-                'success': False,
-                'error': 'No images provided'
-            }), 400
-        
-        images = request.files.getlist('images')
         context = request.form.get('context', 'event photo')
-        
-        if not images or all(img.filename == '' for img in images):
-            return jsonify({
-                'success': False,
-                'error': 'No images selected'
-            }), 400
-        
-        # Create uploads directory if it doesn't exist
-        upload_folder = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'uploads', 'images')
-        os.makedirs(upload_folder, exist_ok=True)
-        
-        # Process each image
-        results = []
         service = get_image_service()
-        
-        for image in images:
-            if image and image.filename:
-                # Save image temporarily
-                filename = secure_filename(image.filename)
-                filepath = os.path.join(upload_folder, filename)
-                image.save(filepath)
-                
-                # Comprehensive analysis
-                result = service.analyze_image_comprehensive(filepath, context)
-                results.append(result)
-                
-                # Clean up temporary file
-                try:
-                    os.remove(filepath)
-                except:
-                    pass
-        
-        return jsonify({
-            'success': True,
-            'count': len(results),
-            'results': results
-        }), 200
+        return _process_uploaded_images(
+            lambda image: service.analyze_image_comprehensive(image, context),
+            'Image analysis failed'
+        )
         
     except Exception as e:
         return jsonify({
@@ -232,51 +190,8 @@ def tag_images():
         JSON with tags for each image
     """
     try:
-        # Check if images are provided
-        if 'images' not in request.files:
-            return jsonify({
-                'success': False,
-                'error': 'No images provided'
-            }), 400
-        
-        images = request.files.getlist('images')
-        
-        if not images or all(img.filename == '' for img in images):
-            return jsonify({
-                'success': False,
-                'error': 'No images selected'
-            }), 400
-        
-        # Create uploads directory if it doesn't exist
-        upload_folder = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'uploads', 'images')
-        os.makedirs(upload_folder, exist_ok=True)
-        
-        # Process each image
-        results = []
         service = get_image_service()
-        
-        for image in images:
-            if image and image.filename:
-                # Save image temporarily
-                filename = secure_filename(image.filename)
-                filepath = os.path.join(upload_folder, filename)
-                image.save(filepath)
-                
-                # Generate tags
-                result = service.generate_image_tags(filepath)
-                results.append(result)
-                
-                # Clean up temporary file
-                try:
-                    os.remove(filepath)
-                except:
-                    pass
-        
-        return jsonify({
-            'success': True,
-            'count': len(results),
-            'results': results
-        }), 200
+        return _process_uploaded_images(service.generate_image_tags, 'Tag generation failed')
         
     except Exception as e:
         return jsonify({
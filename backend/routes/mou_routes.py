@@ -9,9 +9,27 @@ from docx import Document
 from docx.shared import Pt, Inches, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 import os
+import shutil
+from services import pdf_renderer
+from services.document_cache import DocumentCache
+from services.document_generator import document_bytes
+from services.report_parser import parse_mou
 
 bp = Blueprint('mou', __name__, url_prefix='/api/mou')
 
+# Bump when create_mou_document's layout changes, so cached downloads are re-rendered
+MOU_RENDERER_VERSION = '1'
+
+_document_cache = None
+
+
+def get_document_cache():
+    """Rendered MOU cache (created on first use)"""
+    global _document_cache
+    if _document_cache is None:
+        _document_cache = DocumentCache('mou')
+    return _document_cache
+
 
 @bp.route('/generate', methods=['POST'])
 def generate_mou():
@@ -109,9 +127,10 @@ Make it formal, legally sound, and comprehensive. Use proper legal language but
         result = db.mou_documents.insert_one(mou_record)
         mou_id = str(result.inserted_id)
         
-        # Generate downloadable DOCX
+        # The DOCX is rendered on download; keep a copy in outputs/mou only if asked to
         filename = f"MOU_{party1_name.replace(' ', '_')}_{party2_name.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d')}.docx"
-        filepath = create_mou_document(mou_content, party1_name, party2_name, filename)
+        if data.get('persist'):
+            create_mou_document(mou_content, party1_name, party2_name, filename, persist=True)
         
         return jsonify({
             'success': True,
@@ -128,8 +147,19 @@ Make it formal, legally sound, and comprehensive. Use proper legal language but
         }), 500
 
 
-def create_mou_document(content, party1, party2, filename):
-    """Create a formatted DOCX document for the MOU"""
+def create_mou_document(content, party1, party2, filename, persist=False):
+    """
+    Create a formatted DOCX document for the MOU
+    
+    Args:
+        content: MOU text
+        party1, party2: Party names for the title block
+        filename: File name used when persisting
+        persist: Also write the document to outputs/mou
+    
+    Returns:
+        bytes: The DOCX
+    """
     doc = Document()
     
     # Set document margins
@@ -158,14 +188,12 @@ def create_mou_document(content, party1, party2, filename):
     doc.add_paragraph()  # Spacing
     
     # Content - split by paragraphs
-    paragraphs = content.split('\n\n')
-    for para_text in paragraphs:
-        if para_text.strip():
-            para = doc.add_paragraph(para_text.strip())
-            para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-            para_format = para.paragraph_format
-            para_format.line_spacing = 1.15
-            para_format.space_after = Pt(6)
+    for node in parse_mou(content):
+        para = doc.add_paragraph(node['text'])
+        para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+        para_format = para.paragraph_format
+        para_format.line_spacing = 1.15
+        para_format.space_after = Pt(6)
     
     # Signature Section
     doc.add_paragraph()
@@ -183,42 +211,84 @@ def create_mou_document(content, party1, party2, filename):
     doc.add_paragraph(f'Authorized Signatory - {party2}')
     doc.add_paragraph(f'Date: _____________________')
     
-    # Save document
+    data = document_bytes(doc)
+    
+    if persist:
+        with open(persisted_path(filename), 'wb') as f:
+            f.write(data)
+    
+    return data
+
+
+def persisted_path(filename):
+    """Path in outputs/mou for a document kept on request"""
     backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     outputs_dir = os.path.join(backend_dir, 'outputs', 'mou')
     os.makedirs(outputs_dir, exist_ok=True)
-    
-    filepath = os.path.join(outputs_dir, filename)
-    doc.save(filepath)
-    
-    return filepath
+    return os.path.join(outputs_dir, filename)
 
 
 @bp.route('/download/<mou_id>', methods=['GET'])
 def download_mou(mou_id):
-    """Download MOU document"""
+    """Download MOU document (?format=pdf for a PDF instead of DOCX)"""
     try:
         from bson import ObjectId
         db = current_app.db.db
         
+        output_format = request.args.get('format', 'docx').lower()
+        if output_format not in ('docx', 'pdf'):
+            return jsonify({'success': False, 'error': 'format must be docx or pdf'}), 400
+        if output_format == 'pdf' and not pdf_renderer.is_available():
+            return jsonify({'success': False, 'error': 'PDF export needs the reportlab package'}), 501
+        
         mou = db.mou_documents.find_one({'_id': ObjectId(mou_id)})
         if not mou:
             return jsonify({'success': False, 'error': 'MOU not found'}), 404
         
-        # Recreate document
-        filename = f"MOU_{mou['party1_name'].replace(' ', '_')}_{mou['party2_name'].replace(' ', '_')}_{datetime.now().strftime('%Y%m%d')}.docx"
-        filepath = create_mou_document(
-            mou['content'], 
-            mou['party1_name'], 
-            mou['party2_name'], 
-            filename
+        filename = f"MOU_{mou['party1_name'].replace(' ', '_')}_{mou['party2_name'].replace(' ', '_')}_{datetime.now().strftime('%Y%m%d')}.{output_format}"
+        
+        # The rendered file only depends on these fields, so it is rendered once
+        # per content version and revalidated with the key as ETag
+        cache = get_document_cache()
+        etag = cache.key(
+            mou_id,
+            (mou['content'], mou['party1_name'], mou['party2_name']),
+            f"{MOU_RENDERER_VERSION}-{output_format}"
         )
+        persist = request.args.get('persist', '').lower() == 'true'
+        if etag in request.if_none_match and not persist:
+            return '', 304, {'ETag': f'"{etag}"'}
+        
+        if output_format == 'pdf':
+            render = lambda: pdf_renderer.render_in_pool(
+                pdf_renderer.render_mou,
+                paragraphs=parse_mou(mou['content']),
+                party1=mou['party1_name'],
+                party2=mou['party2_name']
+            )
+            mimetype = 'application/pdf'
+        else:
+            render = lambda: create_mou_document(
+                mou['content'], 
+                mou['party1_name'], 
+                mou['party2_name'], 
+                filename
+            )
+            mimetype = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+        
+        filepath = cache.get_or_render(etag, render, extension=f'.{output_format}')
+        if persist:
+            # Copied from the cache, so a cache hit is kept as well
+            shutil.copyfile(filepath, persisted_path(filename))
         
         return send_file(
             filepath,
             as_attachment=True,
             download_name=filename,
-            mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+            mimetype=mimetype,
+            conditional=True,
+            etag=etag,
+            max_age=0
         )
         
     except Exception as e:
@@ -0,0 +1,96 @@
+"""
+Benchmark image preprocessing for the vision model
+
+Compares the original path (full decode, LANCZOS thumbnail, JPEG q85) with
+services.image_preprocess and prints a per-stage timing breakdown:
+
+    python scripts/bench_preprocess.py photos/*.jpg
+    python scripts/bench_preprocess.py --synthetic 24 --format webp
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+from services.image_preprocess import preprocess_image
+
+
+def legacy_encode(path, max_size=1024):
+    """The previous encode_image_to_base64 pipeline, minus base64"""
+    timings = {}
+    started = time.perf_counter()
+    with Image.open(path) as img:
+        img.load()
+        timings['decode'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        if img.width > max_size or img.height > max_size:
+            img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+        timings['resize'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        buffer = io.BytesIO()
+        img.save(buffer, format='JPEG', quality=85)
+        timings['encode'] = time.perf_counter() - started
+    return buffer.getvalue(), timings
+
+
+def synthetic_photo(megapixels, path):
+    """Write a noisy gradient JPEG of roughly the given size"""
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    img = Image.effect_mandelbrot((width, height), (-2.0, -1.2, 1.0, 1.2), 60).convert('RGB')
+    img.save(path, format='JPEG', quality=92)
+    return path
+
+
+def report(name, runs):
+    """Print median timings per stage and output size"""
+    stages = ('decode', 'resize', 'encode')
+    medians = {stage: statistics.median(run[1][stage] for run in runs) * 1000 for stage in stages}
+    total = sum(medians.values())
+    size = statistics.median(len(run[0]) for run in runs) / 1024
+    print(f"{name:<10}" + ''.join(f"{medians[s]:>10.1f}" for s in stages) + f"{total:>10.1f}{size:>10.0f}")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('images', nargs='*', help='Image files to process')
+    parser.add_argument('--synthetic', type=float, default=24, help='Megapixels of a generated test photo (if no images given)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max-side', type=int, default=1024)
+    parser.add_argument('--format', choices=('jpeg', 'webp'), default='jpeg')
+    parser.add_argument('--resample', default='bilinear')
+    args = parser.parse_args()
+
+    images = args.images
+    if not images:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '_bench_photo.jpg')
+        images = [synthetic_photo(args.synthetic, path)]
+
+    print(f"{'path':<10}{'decode':>10}{'resize':>10}{'encode':>10}{'total ms':>10}{'KB':>10}")
+    legacy_runs, fast_runs = [], []
+    for path in images:
+        for _ in range(args.repeat):
+            legacy_runs.append(legacy_encode(path, args.max_side))
+            result = preprocess_image(path, max_side=args.max_side, output_format=args.format, resample=args.resample)
+            fast_runs.append((result['data'], result['timings']))
+
+    legacy_total = report('legacy', legacy_runs)
+    fast_total = report('fast', fast_runs)
+    print(f"speedup: {legacy_total / fast_total:.1f}x")
+
+    if not args.images:
+        os.remove(images[0])
+
+
+if __name__ == '__main__':
+    main()
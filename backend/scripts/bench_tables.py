@@ -0,0 +1,94 @@
+"""
+Benchmark DOCX table rendering
+
+Compares filling a table cell by cell through python-docx (the previous
+DocumentGenerator code path) with services.docx_tables.add_table and prints
+the time per 1,000 cells:
+
+    python scripts/bench_tables.py
+    python scripts/bench_tables.py --rows 500 --cols 6 --repeat 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+from docx.oxml.ns import qn
+from docx.oxml.shared import OxmlElement
+from docx.shared import Pt
+from services.docx_tables import CellFormat, add_table
+
+
+HEADER = CellFormat(bold=True, size=11, fill='D9E2F3')
+CELL = CellFormat(size=10)
+
+
+def legacy_table(doc, header, rows):
+    """The previous _add_markdown_table population loop"""
+    table = doc.add_table(rows=len(rows) + 1, cols=len(header))
+    table.style = 'Light Grid Accent 1'
+    for i, text in enumerate(header):
+        cell = table.rows[0].cells[i]
+        cell.text = text
+        for paragraph in cell.paragraphs:
+            for run in paragraph.runs:
+                run.bold = True
+                run.font.size = Pt(11)
+        shading = OxmlElement('w:shd')
+        shading.set(qn('w:fill'), 'D9E2F3')
+        cell._element.get_or_add_tcPr().append(shading)
+    for row_idx, row in enumerate(rows):
+        cells = table.rows[row_idx + 1].cells
+        for col_idx, text in enumerate(row):
+            cell = cells[col_idx]
+            cell.text = text
+            for paragraph in cell.paragraphs:
+                for run in paragraph.runs:
+                    run.font.size = Pt(10)
+
+
+def bulk_table(doc, header, rows):
+    """services.docx_tables path"""
+    table_rows = [[(text, HEADER) for text in header]]
+    table_rows.extend([(text, CELL) for text in row] for row in rows)
+    add_table(doc, table_rows, len(header), 'Light Grid Accent 1')
+
+
+def measure(build, header, rows, repeat):
+    """Median seconds to build the table into a fresh document"""
+    samples = []
+    for _ in range(repeat):
+        doc = Document()
+        started = time.perf_counter()
+        build(doc, header, rows)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200, help='Data rows per table')
+    parser.add_argument('--cols', type=int, default=5, help='Columns per table')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per method (median is reported)')
+    args = parser.parse_args()
+
+    header = [f'Column {col + 1}' for col in range(args.cols)]
+    rows = [[f'Item {row}-{col} Rs. {row * col * 125}' for col in range(args.cols)] for row in range(args.rows)]
+    cells = (args.rows + 1) * args.cols
+
+    print(f"{cells} cells ({args.rows + 1} rows x {args.cols} columns), median of {args.repeat}")
+    print(f"{'method':<10}{'total ms':>12}{'ms/1k cells':>14}")
+    results = {}
+    for name, build in (('legacy', legacy_table), ('bulk', bulk_table)):
+        seconds = measure(build, header, rows, args.repeat)
+        results[name] = seconds
+        print(f"{name:<10}{seconds * 1000:>12.1f}{seconds * 1000 * 1000 / cells:>14.1f}")
+    print(f"speedup: {results['legacy'] / results['bulk']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
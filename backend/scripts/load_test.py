@@ -0,0 +1,190 @@
+"""
+Load generator for the CampusOps API
+
+Run the server against the fake Groq backend so no API quota is used:
+
+    LLM_BACKEND=fake FAKE_LLM_LATENCY_MS=600 python main.py
+    python scripts/load_test.py --target events --concurrency 16 --requests 200
+
+Reports client-side throughput and latency percentiles, then reads
+/api/admin/llm-stats so server-side queueing (end-to-end time minus time
+spent in the model) can be estimated.
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+SAMPLE_FEEDBACK_ROWS = [
+    "The workshop was really engaging and well organised",
+    "Sound quality in the hall was poor",
+    "Great speakers, would attend again",
+    "Too long, the breaks were too short",
+    "Loved the hands-on session",
+]
+
+
+def _multipart(fields, files):
+    """Encode form fields and files as multipart/form-data"""
+    boundary = uuid.uuid4().hex
+    body = io.BytesIO()
+
+    for name, value in fields.items():
+        body.write(f'--{boundary}\r\n'.encode())
+        body.write(f'Content-Disposition: form-data; name="{name}"\r\n\r\n'.encode())
+        body.write(str(value).encode('utf-8'))
+        body.write(b'\r\n')
+
+    for name, filename, content, content_type in files:
+        body.write(f'--{boundary}\r\n'.encode())
+        body.write(f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'.encode())
+        body.write(f'Content-Type: {content_type}\r\n\r\n'.encode())
+        body.write(content)
+        body.write(b'\r\n')
+
+    body.write(f'--{boundary}--\r\n'.encode())
+    return body.getvalue(), f'multipart/form-data; boundary={boundary}'
+
+
+def _feedback_csv(rows):
+    """Build a feedback CSV with the given number of rows"""
+    lines = ['feedback,rating']
+    for i in range(rows):
+        text = SAMPLE_FEEDBACK_ROWS[i % len(SAMPLE_FEEDBACK_ROWS)]
+        lines.append(f'"{text}",{1 + i % 5}')
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def build_request(base_url, target, args):
+    """
+    Build the urllib request for one call to the chosen endpoint
+
+    Returns:
+        urllib.request.Request
+    """
+    if target == 'events':
+        body, content_type = _multipart({
+            'event_description': 'Annual tech fest with 500 attendees, hackathon and guest talks',
+            'document_type': args.document_type,
+            'output_format': args.output_format
+        }, [])
+        return urllib.request.Request(f'{base_url}/api/events/generate', data=body,
+                                      headers={'Content-Type': content_type}, method='POST')
+
+    if target == 'mou':
+        body = json.dumps({
+            'party1_name': 'Tech Club',
+            'party2_name': 'Acme Sponsors Pvt Ltd',
+            'purpose': 'Sponsorship of the annual tech fest'
+        }).encode('utf-8')
+        return urllib.request.Request(f'{base_url}/api/mou/generate', data=body,
+                                      headers={'Content-Type': 'application/json'}, method='POST')
+
+    if target == 'feedback':
+        body, content_type = _multipart({}, [('file', 'feedback.csv', _feedback_csv(args.feedback_rows), 'text/csv')])
+        return urllib.request.Request(f'{base_url}/api/feedback/analyze', data=body,
+                                      headers={'Content-Type': content_type}, method='POST')
+
+    # Image routes: caption, ocr, analyze, tags
+    if not args.image:
+        raise SystemExit('--image is required for image targets')
+    with open(args.image, 'rb') as f:
+        image_bytes = f.read()
+    files = [('images', f'photo_{i}.jpg', image_bytes, 'image/jpeg') for i in range(args.images_per_request)]
+    body, content_type = _multipart({'context': 'college event photo'}, files)
+    return urllib.request.Request(f'{base_url}/api/image/{target}', data=body,
+                                  headers={'Content-Type': content_type}, method='POST')
+
+
+def _percentile(values, pct):
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run(args):
+    """Fire the requests and print a summary"""
+    base_url = args.url.rstrip('/')
+    template = build_request(base_url, args.target, args)
+
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+
+    def one_call(_):
+        request = urllib.request.Request(template.full_url, data=template.data,
+                                         headers=dict(template.headers), method=template.get_method())
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=args.timeout) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except Exception as e:
+            status = type(e).__name__
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    print(f"Target: {args.target}  concurrency={args.concurrency}  requests={args.requests}")
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(one_call, range(args.requests)))
+    wall = time.perf_counter() - started
+
+    print(f"Wall time:   {wall:.2f}s")
+    print(f"Throughput:  {len(latencies) / wall:.2f} req/s")
+    print(f"Statuses:    {statuses}")
+    print(f"Latency p50: {_percentile(latencies, 50):.3f}s  p90: {_percentile(latencies, 90):.3f}s  "
+          f"p99: {_percentile(latencies, 99):.3f}s  mean: {statistics.mean(latencies):.3f}s")
+
+    try:
+        with urllib.request.urlopen(f'{base_url}/api/admin/llm-stats', timeout=10) as response:
+            stats = json.loads(response.read())['data']
+    except Exception as e:
+        print(f"Could not read /api/admin/llm-stats: {e}")
+        return
+
+    print("\nServer-side model calls (cumulative since server start):")
+    for call in stats['calls']:
+        latency = call.get('latency', {})
+        print(f"  {call['endpoint']:<40} {call['operation']:<15} requests={call['requests']:<6} "
+              f"errors={call['errors']:<4} avg={latency.get('avg_seconds')}s p95={latency.get('p95_seconds')}s")
+
+    model_time = [c['latency'].get('avg_seconds') for c in stats['calls'] if c.get('latency', {}).get('avg_seconds')]
+    if model_time:
+        print(f"\nMean end-to-end minus mean model time (queueing + app overhead, rough): "
+              f"{statistics.mean(latencies) - statistics.mean(model_time):.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CampusOps API load generator')
+    parser.add_argument('--url', default=os.getenv('CAMPUSOPS_URL', 'http://localhost:8000'))
+    parser.add_argument('--target', default='events',
+                        choices=['events', 'mou', 'feedback', 'caption', 'ocr', 'analyze', 'tags'])
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--document-type', default='report')
+    parser.add_argument('--output-format', default='text', choices=['text', 'document'])
+    parser.add_argument('--feedback-rows', type=int, default=500)
+    parser.add_argument('--image', help='Image file to upload for image targets')
+    parser.add_argument('--images-per-request', type=int, default=1)
+    run(parser.parse_args())
+
+
+if __name__ == '__main__':
+    main()
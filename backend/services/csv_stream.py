@@ -0,0 +1,167 @@
+"""
+Streaming CSV reader for feedback uploads
+Decodes the upload incrementally and yields rows lazily, so memory stays
+flat regardless of file size
+"""
+import codecs
+import csv
+import io
+from services.sentiment_scorer import is_rating_column
+
+
+# Preferred feedback columns, in priority order
+FEEDBACK_COLUMNS = ('feedback', 'Feedback', 'comment', 'Comment', 'comments', 'Comments', 'response')
+
+SNIFF_BYTES = 64 * 1024
+
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+
+class _PrefixedStream(io.RawIOBase):
+    """Raw stream that replays already-read bytes before the rest of the source"""
+
+    def __init__(self, prefix, source):
+        self._prefix = prefix
+        self._source = source
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._prefix:
+            count = min(len(buffer), len(self._prefix))
+            buffer[:count] = self._prefix[:count]
+            self._prefix = self._prefix[count:]
+            return count
+        data = self._source.read(len(buffer))
+        if not data:
+            return 0
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def detect_encoding(head):
+    """
+    Guess the encoding of a CSV from its first bytes
+
+    Args:
+        head: First bytes of the file
+
+    Returns:
+        str: Codec name (BOM-aware UTF, UTF-8, or cp1252 as the fallback)
+    """
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        # final=False so a multi-byte character cut off at the end is not an error
+        decoder.decode(head, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp1252'
+
+
+def open_text_stream(binary_stream):
+    """
+    Wrap a binary upload stream in an incrementally decoding text stream
+
+    Args:
+        binary_stream: Object with read(n) returning bytes (e.g., FileStorage.stream)
+
+    Returns:
+        tuple: (text stream, detected encoding)
+    """
+    head = binary_stream.read(SNIFF_BYTES)
+    encoding = detect_encoding(head)
+    raw = _PrefixedStream(head, binary_stream)
+    text = io.TextIOWrapper(io.BufferedReader(raw), encoding=encoding, errors='replace', newline='')
+    return text, encoding
+
+
+class FeedbackCSVReader:
+    """
+    Lazily reads feedback rows from an uploaded CSV
+
+    The header is read once to resolve the feedback column and the numeric
+    rating columns; rows are then yielded one chunk at a time.
+    """
+
+    def __init__(self, binary_stream):
+        """
+        Args:
+            binary_stream: Binary upload stream
+        """
+        self.text_stream, self.encoding = open_text_stream(binary_stream)
+        self._reader = csv.reader(self.text_stream)
+        self.fieldnames = next(self._reader, None) or []
+        self.fieldnames = [name.strip() for name in self.fieldnames]
+
+        # Feedback column candidates, resolved once: preferred names first,
+        # then the first column as the last resort (same fallback order as before)
+        self.feedback_indexes = [self.fieldnames.index(name) for name in FEEDBACK_COLUMNS if name in self.fieldnames]
+        if self.fieldnames and 0 not in self.feedback_indexes:
+            self.feedback_indexes.append(0)
+
+        self.rating_columns = [
+            (index, name) for index, name in enumerate(self.fieldnames) if is_rating_column(name)
+        ]
+        self.rows_read = 0
+
+    @property
+    def feedback_column(self):
+        """Name of the primary feedback column (None for an empty file)"""
+        if not self.feedback_indexes:
+            return None
+        return self.fieldnames[self.feedback_indexes[0]]
+
+    def iter_rows(self):
+        """
+        Yield (feedback_text, row) for every data row with feedback text
+
+        Returns:
+            generator
+        """
+        indexes = self.feedback_indexes
+        for row in self._reader:
+            self.rows_read += 1
+            text = ''
+            for index in indexes:
+                if index < len(row) and row[index]:
+                    text = row[index]
+                    break
+            if text:
+                yield text, row
+
+    def iter_chunks(self, chunk_size=10000):
+        """
+        Yield rows in chunks for vectorized processing
+
+        Args:
+            chunk_size: Rows per chunk
+
+        Returns:
+            generator of (texts, ratings) where ratings is {column: [raw values]}
+        """
+        texts = []
+        ratings = {name: [] for _, name in self.rating_columns}
+
+        for text, row in self.iter_rows():
+            texts.append(text)
+            for index, name in self.rating_columns:
+                ratings[name].append(row[index] if index < len(row) else None)
+
+            if len(texts) >= chunk_size:
+                yield texts, ratings
+                texts = []
+                ratings = {name: [] for _, name in self.rating_columns}
+
+        if texts:
+            yield texts, ratings
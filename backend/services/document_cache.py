@@ -0,0 +1,87 @@
+"""
+Rendered Document Cache
+Content-addressed store of generated files (e.g., MOU DOCX downloads)
+
+A rendered file is keyed by the record id, a hash of everything the renderer
+reads from the record, and the renderer version. The key doubles as the HTTP
+ETag, so an unchanged record is served as a static file or a 304 and a change
+to the content or the renderer produces a new key.
+"""
+import hashlib
+import os
+import threading
+import time
+
+
+class DocumentCache:
+    """Rendered files on disk, addressed by (record id, content hash, renderer version)"""
+
+    def __init__(self, namespace, root=None):
+        """
+        Args:
+            namespace: Sub-directory for this kind of document (e.g., 'mou')
+            root: Base directory (defaults to outputs/cache)
+        """
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.root = os.path.join(root or os.path.join(backend_dir, 'outputs', 'cache'), namespace)
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def key(record_id, content, version):
+        """
+        Cache key / ETag for a rendered record
+
+        Args:
+            record_id: Database id of the record
+            content: String or sequence of strings the renderer uses
+            version: Renderer version (bump when the layout changes)
+
+        Returns:
+            str: Hex digest
+        """
+        parts = [content] if isinstance(content, str) else list(content)
+        content_hash = hashlib.sha256('\0'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+        return hashlib.sha256(f"{record_id}\0{content_hash}\0{version}".encode('utf-8')).hexdigest()
+
+    def path(self, key, extension='.docx'):
+        """File path for a cache key"""
+        return os.path.join(self.root, key[:2], f"{key}{extension}")
+
+    def get_or_render(self, key, render, extension='.docx'):
+        """
+        Path of the rendered file, rendering it on a miss
+
+        Args:
+            key: Value from key()
+            render: Callable returning the file bytes
+            extension: File extension
+
+        Returns:
+            str: Path of the cached file
+        """
+        target = self.path(key, extension)
+        if os.path.exists(target):
+            # Touch so cleanup() keeps files that are still downloaded
+            os.utime(target)
+            return target
+
+        data = render()
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        # Atomic, so a concurrent download never sends a half-written file
+        os.replace(temp_path, target)
+        return target
+
+    def cleanup(self, days=30):
+        """Delete cached files that were not downloaded for the given number of days"""
+        cutoff = time.time() - days * 86400
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                filepath = os.path.join(directory, filename)
+                try:
+                    if os.path.getmtime(filepath) < cutoff:
+                        os.remove(filepath)
+                except OSError:
+                    pass
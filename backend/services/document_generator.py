@@ -6,8 +6,65 @@ from docx import Document
 from docx.shared import Pt, Inches, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from datetime import datetime
+import io
 import os
-import re
+import threading
+import time
+from services import pdf_renderer
+from services.docx_tables import PLAIN, CellFormat, add_table
+from services.image_derivatives import DerivativeStore
+from services.metrics import record_document_stages
+from services.report_parser import parse_report
+
+
+# Styles every generated document relies on; checked once when the base is built
+REQUIRED_STYLES = ('Title', 'Heading 1', 'Heading 2', 'Heading 3', 'List Bullet', 'List Number',
+                   'Table Grid', 'Light Grid Accent 1')
+
+# Table cell formats (serialized once, shared by every table)
+FIELD = CellFormat(bold=True)
+FIELD_SHADED = CellFormat(bold=True, fill='D6EAD6')  # Light green
+FIELD_SHADE_KEYWORDS = ('club', 'event', 'student', 'mode', 'participants')
+OUTCOMES_HEADER = CellFormat(bold=True, fill='D6EAD6')
+MARKDOWN_HEADER = CellFormat(bold=True, size=11, fill='D9E2F3')  # Light blue
+MARKDOWN_CELL = CellFormat(size=10)
+
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def get_document_generator():
+    """
+    Shared DocumentGenerator for the process
+    
+    The base document is built once; every request clones it from memory.
+    
+    Returns:
+        DocumentGenerator
+    """
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                _generator = DocumentGenerator()
+    return _generator
+
+
+def _content_text(content):
+    """Report text from an LLM result (string, or dict with a 'content' key)"""
+    # Handle dict input (from LLM service)
+    if isinstance(content, dict):
+        content = content.get('content', str(content))
+    
+    # Ensure content is a string
+    return content if isinstance(content, str) else str(content)
+
+
+def document_bytes(doc):
+    """Serialize a python-docx Document to bytes without touching the disk"""
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
 
 
 class DocumentGenerator:
@@ -19,8 +76,39 @@ class DocumentGenerator:
         backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         self.output_folder = os.path.join(backend_dir, 'outputs', 'documents')
         os.makedirs(self.output_folder, exist_ok=True)
+        # Downscaled copies of photos, so reports don't embed full-resolution originals
+        self.derivatives = DerivativeStore()
+        # Styled base document (margins, styles, page footer), serialized once
+        self._base_docx = self._build_base_document()
     
-    def generate_event_document(self, content, document_type='event_plan', metadata=None):
+    def _build_base_document(self):
+        """
+        Build the styled base document every report starts from
+        
+        Returns:
+            bytes: The base DOCX
+        """
+        doc = Document()
+        self._set_document_styles(doc)
+        
+        missing = [name for name in REQUIRED_STYLES if name not in doc.styles]
+        if missing:
+            print(f"⚠️  Base document is missing styles: {', '.join(missing)}")
+        
+        # Static page footer; the dated footer paragraph is still added per document
+        footer = doc.sections[0].footer.paragraphs[0]
+        footer_run = footer.add_run('CampusOps Event Report Generator')
+        footer_run.font.size = Pt(8)
+        footer_run.font.color.rgb = RGBColor(128, 128, 128)
+        footer.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        
+        return document_bytes(doc)
+    
+    def new_document(self):
+        """Fresh copy of the styled base document"""
+        return Document(io.BytesIO(self._base_docx))
+    
+    def generate_event_document(self, content, document_type='event_plan', metadata=None, persist=None):
         """
         Generate a formatted DOCX document from event content
         
@@ -28,31 +116,27 @@ class DocumentGenerator:
             content (str or dict): The generated event content (string or dict with 'content' key)
             document_type (str): Type of document (event_plan, summary, report)
             metadata (dict): Additional metadata (event_description, etc.)
+            persist (bool): Also write the file to outputs/documents
+                            (default: DOCX_PERSIST, off)
         
         Returns:
-            dict: Result with file path and success status
+            dict: Result with the document bytes ('data'), filename, file path
+                  (None unless persisted) and success status
         """
         try:
-            # Handle dict input (from LLM service)
-            if isinstance(content, dict):
-                content = content.get('content', str(content))
-            
-            # Ensure content is a string
-            if not isinstance(content, str):
-                content = str(content)
+            metadata = metadata or {}
+            content = _content_text(content)
             
-            # Create a new Document
-            doc = Document()
+            # Clone the pre-styled base document
+            doc = self.new_document()
             
-            # Set default styles
-            self._set_document_styles(doc)
+            # Parse once, then render the nodes
+            started = time.perf_counter()
+            report = parse_report(content)
+            timings = {'parse': time.perf_counter() - started}
             
-            # Check if content follows the form-style template (table-based)
-            if '[TABLE:' in content or 'Name of the Club' in content:
-                # Form-style report - parse as structured tables
-                self._parse_form_style_content(doc, content, metadata.get('image_paths'))
-            else:
-                # Standard markdown report - use old parsing
+            started = time.perf_counter()
+            if report['layout'] == 'markdown':
                 # Add title
                 title = self._get_title_from_type(document_type)
                 
@@ -68,34 +152,94 @@ class DocumentGenerator:
                 # Add metadata section
                 if metadata:
                     self._add_metadata_section(doc, metadata)
-                
-                # Parse and add content (skip separator, it's in content)
-                self._parse_and_add_content(doc, content, metadata.get('image_paths'))
+            
+            self.render_nodes(doc, report['nodes'], metadata.get('image_paths'))
             
             # Add footer with generation timestamp
             self._add_footer(doc)
             
-            # Generate filename
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            safe_type = document_type.replace(' ', '_').lower()
-            filename = f"{safe_type}_{timestamp}.docx"
-            
-            # Ensure output folder exists before saving
-            os.makedirs(self.output_folder, exist_ok=True)
-            filepath = os.path.join(self.output_folder, filename)
+            timings['render'] = time.perf_counter() - started
             
-            # Save document
-            doc.save(filepath)
+            # Serialize in memory; the disk copy is optional
+            started = time.perf_counter()
+            data = document_bytes(doc)
+            timings['serialize'] = time.perf_counter() - started
+            record_document_stages(timings)
             
-            print(f"Document saved successfully to: {filepath}")
+            return self._output_result(data, document_type, 'docx', persist)
             
+        except Exception as e:
             return {
-                'success': True,
-                'filepath': filepath,
-                'filename': filename,
-                'message': 'Document generated successfully'
+                'success': False,
+                'error': str(e),
+                'message': 'Failed to generate document'
             }
-            
+    
+    def generate_event_pdf(self, content, document_type='event_plan', metadata=None, persist=None):
+        """
+        Generate a PDF from event content
+        
+        Uses the same parsed nodes as generate_event_document, rendered with
+        ReportLab in the CPU process pool.
+        
+        Args:
+            content (str or dict): The generated event content
+            document_type (str): Type of document (event_plan, summary, report)
+            metadata (dict): Additional metadata (event_description, image_paths, etc.)
+            persist (bool): Also write the file to outputs/documents
+        
+        Returns:
+            dict: Same shape as generate_event_document
+        """
+        try:
+            if not pdf_renderer.is_available():
+                return {
+                    'success': False,
+                    'error': 'PDF export needs the reportlab package',
+                    'message': 'Failed to generate document'
+                }
+            
+            metadata = metadata or {}
+            content = _content_text(content)
+            
+            started = time.perf_counter()
+            report = parse_report(content)
+            timings = {'parse': time.perf_counter() - started}
+            
+            header = None
+            if report['layout'] == 'markdown':
+                header = {
+                    'title': self._get_title_from_type(document_type),
+                    'subtitle': self._get_subtitle_from_type(document_type),
+                    'fields': self._metadata_fields(metadata) if metadata else []
+                }
+            
+            # Photos are resolved to print-resolution derivatives here; the
+            # worker process only reads the files
+            images = {}
+            image_paths = metadata.get('image_paths')
+            if image_paths:
+                for node in report['nodes']:
+                    if node['type'] == 'image_slot':
+                        paths = [path for path in self._slot_images(node['half'], image_paths) if os.path.exists(path)]
+                        images[node['half']] = [
+                            (derivative, os.path.basename(path))
+                            for path, derivative in zip(paths, self.derivatives.get_many(paths))
+                        ]
+            
+            started = time.perf_counter()
+            data = pdf_renderer.render_in_pool(
+                pdf_renderer.render_report,
+                nodes=report['nodes'],
+                header=header,
+                images=images,
+                generated=datetime.now().strftime("%B %d, %Y at %I:%M %p")
+            )
+            timings['render_pdf'] = time.perf_counter() - started
+            record_document_stages(timings)
+            
+            return self._output_result(data, document_type, 'pdf', persist)
+        
         except Exception as e:
             return {
                 'success': False,
@@ -103,6 +247,39 @@ class DocumentGenerator:
                 'message': 'Failed to generate document'
             }
     
+    def _output_result(self, data, document_type, extension, persist=None):
+        """
+        Name a generated document and optionally write it to outputs/documents
+        
+        Returns:
+            dict: success, data, size, filepath (None unless persisted), filename, message
+        """
+        if persist is None:
+            persist = os.getenv('DOCX_PERSIST', 'false').lower() == 'true'
+        
+        # Generate filename
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        safe_type = document_type.replace(' ', '_').lower()
+        filename = f"{safe_type}_{timestamp}.{extension}"
+        
+        filepath = None
+        if persist:
+            # Ensure output folder exists before saving
+            os.makedirs(self.output_folder, exist_ok=True)
+            filepath = os.path.join(self.output_folder, filename)
+            with open(filepath, 'wb') as f:
+                f.write(data)
+            print(f"Document saved successfully to: {filepath}")
+        
+        return {
+            'success': True,
+            'data': data,
+            'size': len(data),
+            'filepath': filepath,
+            'filename': filename,
+            'message': 'Document generated successfully'
+        }
+    
     def _set_document_styles(self, doc):
         """Set default styles for the document"""
         # Set page margins
@@ -128,353 +305,142 @@ class DocumentGenerator:
         }
         return subtitles.get(document_type, 'Event Document')
     
-    def _add_metadata_section(self, doc, metadata):
-        """Add metadata information to document"""
-        doc.add_paragraph()
-        
-        # Add metadata table or formatted info
+    def _metadata_fields(self, metadata):
+        """Label / value pairs shown under the title of markdown reports"""
+        fields = []
         if metadata.get('event_description'):
-            p = doc.add_paragraph()
-            p.add_run('Event Description: ').bold = True
-            p.add_run(metadata['event_description'][:200] + '...' if len(metadata['event_description']) > 200 else metadata['event_description'])
+            description = metadata['event_description']
+            fields.append(('Event Description', description[:200] + '...' if len(description) > 200 else description))
         
-        # Add generation date
-        p = doc.add_paragraph()
-        p.add_run('Generated: ').bold = True
-        p.add_run(datetime.now().strftime('%B %d, %Y at %I:%M %p'))
+        # Generation date
+        fields.append(('Generated', datetime.now().strftime('%B %d, %Y at %I:%M %p')))
         
         if metadata.get('template_used'):
+            fields.append(('Template', metadata.get('template_format', 'Custom Template')))
+        return fields
+    
+    def _add_metadata_section(self, doc, metadata):
+        """Add metadata information to document"""
+        doc.add_paragraph()
+        
+        for label, value in self._metadata_fields(metadata):
             p = doc.add_paragraph()
-            p.add_run('Template: ').bold = True
-            p.add_run(metadata.get('template_format', 'Custom Template'))
+            p.add_run(f'{label}: ').bold = True
+            p.add_run(value)
         
         doc.add_paragraph()
     
-    def _parse_and_add_content(self, doc, content, image_paths=None):
+    def render_nodes(self, doc, nodes, image_paths=None):
         """
-        Parse the AI-generated content and format it properly
-        Handles headers, bullet points, tables, sections, images, etc.
+        Add parsed report nodes to the document
         
         Args:
             doc: Document object
-            content: Generated content text
-            image_paths: List of image file paths to insert
+            nodes: Nodes from services.report_parser
+            image_paths: List of image file paths for the photo sections
         """
-        # Split content into lines
-        lines = content.split('\n')
-        
-        # Track which images have been added
-        geo_images_added = False
-        non_geo_images_added = False
-        
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
+        for node in nodes:
+            kind = node['type']
             
-            if not line:
-                # Empty line - add spacing
+            if kind == 'spacer':
                 doc.add_paragraph()
-                i += 1
-                continue
-            
-            # Check if this is the start of a markdown table
-            if '|' in line and i + 1 < len(lines) and '---' in lines[i + 1]:
-                # Parse the table
-                table_lines = [line]
-                i += 1
-                # Skip the separator line
-                i += 1
-                # Collect remaining table rows
-                while i < len(lines) and '|' in lines[i]:
-                    table_lines.append(lines[i].strip())
-                    i += 1
-                
-                # Add the table to document
-                self._add_markdown_table(doc, table_lines)
-                continue
-            
-            # Check if line is a header (all caps or starts with numbers like "1.", "2.")
-            if self._is_header(line):
-                heading_level = self._get_heading_level(line)
-                doc.add_heading(line, level=heading_level)
-                
-                # Check if this is a photo section header
-                if image_paths and 'photograph section' in line.lower():
-                    if 'geo-tagged' in line.lower() and not geo_images_added:
-                        # Add first half of images for geo-tagged section
-                        self._add_images_to_document(doc, image_paths[:len(image_paths)//2] if len(image_paths) > 1 else image_paths)
-                        geo_images_added = True
-                    elif 'non geo-tagged' in line.lower() and not non_geo_images_added:
-                        # Add second half of images for non-geo-tagged section
-                        self._add_images_to_document(doc, image_paths[len(image_paths)//2:] if len(image_paths) > 1 else [])
-                        non_geo_images_added = True
-            
-            # Check if line is a bullet point
-            elif line.startswith('•') or line.startswith('-') or line.startswith('*'):
-                bullet_text = line[1:].strip()
-                doc.add_paragraph(bullet_text, style='List Bullet')
             
-            # Check if line is a numbered item
-            elif self._is_numbered_item(line):
-                doc.add_paragraph(line, style='List Number')
+            elif kind == 'heading':
+                doc.add_heading(node['text'], level=node['level'])
             
-            # Check if line contains bold markers (e.g., **text**)
-            elif '**' in line:
-                self._add_formatted_paragraph(doc, line)
+            elif kind == 'bullet':
+                doc.add_paragraph(node['text'], style='List Bullet')
             
-            # Regular paragraph
-            else:
-                doc.add_paragraph(line)
+            elif kind == 'numbered':
+                doc.add_paragraph(node['text'], style='List Number')
             
-            i += 1
-    
-    def _parse_form_style_content(self, doc, content, image_paths=None):
-        """
-        Parse form-style content with table-based structure
-        
-        Args:
-            doc: Document object
-            content: Generated content text with [TABLE:...] markers
-            image_paths: List of image file paths to insert
-        """
-        lines = content.split('\n')
-        i = 0
-        geo_images_added = False
-        non_geo_images_added = False
-        
-        while i < len(lines):
-            line = lines[i].strip()
-            
-            # Skip empty lines
-            if not line:
-                i += 1
-                continue
+            elif kind == 'paragraph':
+                if node['runs']:
+                    # Inline **bold** spans
+                    p = doc.add_paragraph()
+                    for text, bold in node['runs']:
+                        run = p.add_run(text)
+                        if bold:
+                            run.bold = True
+                else:
+                    doc.add_paragraph(node['text'])
             
-            # Handle title line (first line with "Title:")
-            if line.startswith('Title:'):
-                title_text = line.replace('Title:', '').strip()
-                title_para = doc.add_paragraph(title_text)
+            elif kind == 'title':
+                title_para = doc.add_paragraph(node['text'])
                 title_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                title_para.runs[0].bold = True
-                title_para.runs[0].font.size = Pt(14)
-                doc.add_paragraph()  # Add spacing
-                i += 1
-                continue
-            
-            # Handle table markers
-            if line.startswith('[TABLE:'):
-                # Extract table description
-                table_desc = line.replace('[TABLE:', '').replace(']', '').strip()
-                i += 1
-                
-                # Collect table rows until we hit next section or table marker
-                table_rows = []
-                while i < len(lines):
-                    row_line = lines[i].strip()
-                    
-                    # Stop if we hit another table marker, empty line followed by marker, or section header
-                    if (row_line.startswith('[TABLE:') or 
-                        row_line.startswith('##') or
-                        (not row_line and i + 1 < len(lines) and 
-                         (lines[i+1].strip().startswith('[TABLE:') or lines[i+1].strip().startswith('##')))):
-                        break
-                    
-                    if row_line and '|' in row_line:
-                        table_rows.append(row_line)
-                    
-                    i += 1
-                
-                # Create the table
-                if table_rows:
-                    if 'Program Outcomes' in table_desc:
-                        # Special handling for Program Outcomes table (4 columns)
-                        self._add_program_outcomes_table(doc, table_rows)
-                    else:
-                        # Standard 2-column field/value table
-                        self._add_field_value_table(doc, table_rows)
-                    
-                    doc.add_paragraph()  # Add spacing after table
-                continue
-            
-            # Handle section headers (##, ###)
-            if line.startswith('##'):
-                header_text = line.replace('##', '').replace('###', '').strip()
-                doc.add_heading(header_text, level=2)
-                
-                # Check if this is a photo section header
-                if image_paths and 'photograph' in header_text.lower():
-                    if 'geo-tagged' in header_text.lower() and not geo_images_added:
-                        # Add first half of images
-                        self._add_images_to_document(doc, image_paths[:len(image_paths)//2] if len(image_paths) > 1 else image_paths)
-                        geo_images_added = True
-                    elif 'non geo-tagged' in header_text.lower() and not non_geo_images_added:
-                        # Add second half of images
-                        self._add_images_to_document(doc, image_paths[len(image_paths)//2:] if len(image_paths) > 1 else [])
-                        non_geo_images_added = True
-                i += 1
-                continue
-            
-            # Handle bullet points
-            if line.startswith('•') or line.startswith('-') or line.startswith('*'):
-                bullet_text = line[1:].strip()
-                doc.add_paragraph(bullet_text, style='List Bullet')
-                i += 1
-                continue
+                if title_para.runs:
+                    title_para.runs[0].bold = True
+                    title_para.runs[0].font.size = Pt(14)
+            
+            elif kind == 'table':
+                if node['kind'] == 'markdown':
+                    self._add_markdown_table(doc, node)
+                elif node['kind'] == 'program_outcomes':
+                    self._add_program_outcomes_table(doc, node)
+                else:
+                    self._add_field_value_table(doc, node)
             
-            # Regular paragraph
-            doc.add_paragraph(line)
-            i += 1
+            elif kind == 'image_slot' and image_paths:
+                self._add_images_to_document(doc, self._slot_images(node['half'], image_paths))
     
-    def _add_field_value_table(self, doc, table_rows):
+    def _slot_images(self, half, image_paths):
+        """Photos for an image slot: geo-tagged section gets the first half, non geo-tagged the rest"""
+        if half == 'first':
+            return image_paths[:len(image_paths)//2] if len(image_paths) > 1 else image_paths
+        return image_paths[len(image_paths)//2:] if len(image_paths) > 1 else []
+    
+    def _add_field_value_table(self, doc, node):
         """
         Add a 2-column field/value table (for event details)
         
         Args:
             doc: Document object
-            table_rows: List of "Field | Value" strings
+            node: field_value table node (rows of [field, value, ...] cells)
         """
-        if not table_rows:
+        if not node['rows']:
             return
         
-        # Create table with 2 columns
-        table = doc.add_table(rows=len(table_rows), cols=2)
-        table.style = 'Table Grid'
+        rows = []
+        for parts in node['rows']:
+            if len(parts) < 2:
+                rows.append([])
+                continue
+            # Bold field name; light green shading for the key identity rows
+            shaded = any(keyword in parts[0].lower() for keyword in FIELD_SHADE_KEYWORDS)
+            rows.append([(parts[0], FIELD_SHADED if shaded else FIELD), (parts[1], PLAIN)])
         
-        # Populate table
-        for idx, row_text in enumerate(table_rows):
-            parts = [p.strip() for p in row_text.split('|') if p.strip()]
-            if len(parts) >= 2:
-                # Field name (left column)
-                cell_0 = table.rows[idx].cells[0]
-                cell_0.text = parts[0]
-                cell_0.paragraphs[0].runs[0].bold = True
-                
-                # Apply light green shading to certain rows (optional - customize as needed)
-                if any(keyword in parts[0].lower() for keyword in ['club', 'event', 'student', 'mode', 'participants']):
-                    self._shade_cell(cell_0, 'D6EAD6')  # Light green
-                
-                # Value (right column)
-                cell_1 = table.rows[idx].cells[1]
-                cell_1.text = parts[1]
+        add_table(doc, rows, 2, 'Table Grid')
     
-    def _add_program_outcomes_table(self, doc, table_rows):
+    def _add_program_outcomes_table(self, doc, node):
         """
         Add a 4-column Program Outcomes table with ratings
         
         Args:
             doc: Document object
-            table_rows: List of table rows with "S.No. | Program Outcome | Rating (0-3) | Remarks"
-        """
-        if not table_rows:
-            return
-        
-        # First row is header
-        header_parts = [p.strip() for p in table_rows[0].split('|') if p.strip()]
-        num_cols = len(header_parts)
-        
-        # Create table
-        table = doc.add_table(rows=len(table_rows), cols=num_cols)
-        table.style = 'Table Grid'
-        
-        # Add header row with formatting
-        for col_idx, header_text in enumerate(header_parts):
-            cell = table.rows[0].cells[col_idx]
-            cell.text = header_text
-            cell.paragraphs[0].runs[0].bold = True
-            self._shade_cell(cell, 'D6EAD6')  # Light green header
-        
-        # Add data rows
-        for row_idx in range(1, len(table_rows)):
-            row_parts = [p.strip() for p in table_rows[row_idx].split('|') if p.strip()]
-            for col_idx in range(min(len(row_parts), num_cols)):
-                table.rows[row_idx].cells[col_idx].text = row_parts[col_idx]
-    
-    def _shade_cell(self, cell, color_hex):
+            node: program_outcomes table node (header "S.No. | Program Outcome | Rating (0-3) | Remarks")
         """
-        Apply background color shading to a table cell
-        
-        Args:
-            cell: Table cell object
-            color_hex: Hex color code (e.g., 'D6EAD6' for light green)
-        """
-        try:
-            from docx.oxml.shared import OxmlElement
-            from docx.oxml.ns import qn
-            
-            shading_elm = OxmlElement('w:shd')
-            shading_elm.set(qn('w:fill'), color_hex)
-            cell._element.get_or_add_tcPr().append(shading_elm)
-        except Exception as e:
-            # If shading fails, just log and continue
-            print(f"Warning: Could not apply cell shading: {e}")
+        num_cols = len(node['header'])
+        rows = [[(text, OUTCOMES_HEADER) for text in node['header']]]
+        rows.extend([(text, PLAIN) for text in row[:num_cols]] for row in node['rows'])
+        add_table(doc, rows, num_cols, 'Table Grid')
     
-    def _add_markdown_table(self, doc, table_lines):
+    def _add_markdown_table(self, doc, node):
         """
         Add a markdown table to the document with professional formatting
         
         Args:
             doc: The document object
-            table_lines: List of table lines in markdown format
+            node: markdown table node (header cells, data rows, source lines)
         """
-        if not table_lines:
-            return
-        
         try:
-            # Parse header row
-            header_row = [cell.strip() for cell in table_lines[0].split('|') if cell.strip()]
-            num_cols = len(header_row)
-            
-            # Parse data rows
-            data_rows = []
-            for line in table_lines[1:]:
-                row_data = [cell.strip() for cell in line.split('|') if cell.strip()]
-                if row_data:
-                    data_rows.append(row_data)
-            
-            if not data_rows:
+            num_cols = len(node['header'])
+            if not node['rows']:
                 return
             
-            # Create table
-            num_rows = len(data_rows) + 1  # +1 for header
-            table = doc.add_table(rows=num_rows, cols=num_cols)
-            table.style = 'Light Grid Accent 1'
-            
-            # Add header row with bold and background
-            header_cells = table.rows[0].cells
-            for i, header_text in enumerate(header_row):
-                if i < num_cols:
-                    # Remove markdown bold markers
-                    header_text = header_text.replace('**', '')
-                    cell = header_cells[i]
-                    cell.text = header_text
-                    
-                    # Make header bold with larger font
-                    for paragraph in cell.paragraphs:
-                        for run in paragraph.runs:
-                            run.bold = True
-                            run.font.size = Pt(11)
-                    
-                    # Add shading to header (light blue-gray)
-                    from docx.oxml.shared import OxmlElement
-                    from docx.oxml.ns import qn
-                    shading_elm = OxmlElement('w:shd')
-                    shading_elm.set(qn('w:fill'), 'D9E2F3')  # Light blue background
-                    cell._element.get_or_add_tcPr().append(shading_elm)
-            
-            # Add data rows
-            for row_idx, row_data in enumerate(data_rows):
-                row_cells = table.rows[row_idx + 1].cells
-                for col_idx, cell_text in enumerate(row_data):
-                    if col_idx < num_cols:
-                        # Remove markdown bold markers
-                        cell_text = cell_text.replace('**', '')
-                        cell = row_cells[col_idx]
-                        cell.text = cell_text
-                        
-                        # Set font size for data cells
-                        for paragraph in cell.paragraphs:
-                            for run in paragraph.runs:
-                                run.font.size = Pt(10)
+            # Bold 11pt header on light blue, 10pt data; markdown bold markers removed
+            rows = [[(text.replace('**', ''), MARKDOWN_HEADER) for text in node['header']]]
+            rows.extend([(text.replace('**', ''), MARKDOWN_CELL) for text in row[:num_cols]] for row in node['rows'])
+            add_table(doc, rows, num_cols, 'Light Grid Accent 1')
             
             # Add spacing after table
             doc.add_paragraph()
@@ -482,54 +448,9 @@ class DocumentGenerator:
         except Exception as e:
             print(f"Error adding table: {e}")
             # Fallback: add as paragraph
-            for line in table_lines:
+            for line in node['lines']:
                 doc.add_paragraph(line)
     
-    def _is_header(self, line):
-        """Check if line should be treated as a header"""
-        # All caps with at least 3 words
-        if line.isupper() and len(line.split()) >= 2:
-            return True
-        
-        # Starts with number pattern like "1.", "1.1", etc.
-        if re.match(r'^\d+\.(\d+\.?)?\s+[A-Z]', line):
-            return True
-        
-        # Ends with colon and is relatively short
-        if line.endswith(':') and len(line) < 60:
-            return True
-        
-        return False
-    
-    def _get_heading_level(self, line):
-        """Determine appropriate heading level"""
-        if line.isupper() and len(line.split()) <= 5:
-            return 1
-        if re.match(r'^\d+\.\s+', line):
-            return 2
-        if re.match(r'^\d+\.\d+\.\s+', line):
-            return 3
-        return 2
-    
-    def _is_numbered_item(self, line):
-        """Check if line is a numbered list item"""
-        return re.match(r'^\d+[\.\)]\s+', line) is not None
-    
-    def _add_formatted_paragraph(self, doc, line):
-        """Add paragraph with inline formatting (bold, italic, etc.)"""
-        p = doc.add_paragraph()
-        
-        # Split by bold markers
-        parts = re.split(r'\*\*(.*?)\*\*', line)
-        
-        for i, part in enumerate(parts):
-            if i % 2 == 0:
-                # Regular text
-                p.add_run(part)
-            else:
-                # Bold text
-                p.add_run(part).bold = True
-    
     def _add_images_to_document(self, doc, image_paths):
         """
         Add images to the document
@@ -542,6 +463,9 @@ class DocumentGenerator:
             return
         
         try:
+            existing = [path for path in image_paths if os.path.exists(path)]
+            derivatives = dict(zip(existing, self.derivatives.get_many(existing)))
+            
             for img_path in image_paths:
                 if os.path.exists(img_path):
                     # Add paragraph for spacing
@@ -552,8 +476,8 @@ class DocumentGenerator:
                     run = paragraph.add_run()
                     
                     try:
-                        # Add image with max width of 6 inches
-                        run.add_picture(img_path, width=Inches(6))
+                        # Add image with max width of 6 inches (print-resolution copy)
+                        run.add_picture(derivatives.get(img_path, img_path), width=Inches(6))
                         
                         # Center align the image
                         paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
@@ -602,7 +526,6 @@ class DocumentGenerator:
             days (int): Delete files older than this many days
         """
         try:
-            import time
             now = time.time()
             cutoff = now - (days * 86400)
             
@@ -613,6 +536,8 @@ class DocumentGenerator:
                     if file_modified < cutoff:
                         os.remove(filepath)
                         print(f"Deleted old file: {filename}")
+            
+            self.derivatives.cleanup(days=max(days, 30))
         
         except Exception as e:
             print(f"Error cleaning up old files: {e}")
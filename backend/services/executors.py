@@ -0,0 +1,280 @@
+"""
+Shared worker pools
+Named, bounded thread pools (I/O-bound work such as API calls) and process
+pools (CPU-bound work such as image decoding) reused across requests, plus
+one-process-per-task execution for work that may have to be killed
+"""
+import contextvars
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+
+_thread_pools = {}
+_process_pools = {}
+_process_task_slots = {}
+_pools_lock = threading.Lock()
+
+
+def get_thread_pool(name, max_workers):
+    """
+    Get (or create) a named thread pool
+
+    The pool size is fixed by the first caller; later calls reuse it.
+
+    Args:
+        name: Pool name (e.g., 'llm', 'images')
+        max_workers: Maximum concurrent workers
+
+    Returns:
+        ThreadPoolExecutor
+    """
+    pool = _thread_pools.get(name)
+    if pool is None:
+        with _pools_lock:
+            pool = _thread_pools.get(name)
+            if pool is None:
+                pool = ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix=f'campusops-{name}')
+                _thread_pools[name] = pool
+    return pool
+
+
+def available_cpus():
+    """CPUs this process may run on (respects affinity / container limits where exposed)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+
+# Imported once by the fork server, so workers start with them loaded
+PROCESS_PRELOAD = ('services.image_preprocess', 'services.pdf_renderer', 'services.template_analyzer')
+
+
+def _process_context():
+    """
+    Start method for worker processes
+
+    forkserver: workers are forked from a small single-threaded server
+    process, never from the app process, which runs pymongo's monitor
+    threads and request threads whose locks a forked child could inherit
+    mid-use. Pools and task processes can therefore be started at any
+    time. The server preloads the worker modules but not __main__, so
+    main.py (MongoDB and LLM clients) is not imported in workers. spawn is
+    the fallback where forkserver is unavailable.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(list(PROCESS_PRELOAD))
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+def get_process_pool(name, max_workers=None):
+    """
+    Get (or create) a named process pool for CPU-bound work
+
+    Args:
+        name: Pool name (e.g., 'cpu')
+        max_workers: Worker processes (defaults to the available CPUs)
+
+    Returns:
+        ProcessPoolExecutor
+    """
+    pool = _process_pools.get(name)
+    if pool is None:
+        with _pools_lock:
+            pool = _process_pools.get(name)
+            if pool is None:
+                workers = max(1, int(max_workers or available_cpus()))
+                pool = ProcessPoolExecutor(max_workers=workers, mp_context=_process_context())
+                _process_pools[name] = pool
+    return pool
+
+
+def reset_process_pool(name):
+    """Drop a (broken) process pool so the next get_process_pool starts a fresh one"""
+    with _pools_lock:
+        pool = _process_pools.pop(name, None)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _process_slots(name, max_workers=None):
+    """Named semaphore bounding how many run_in_process tasks run at once"""
+    slots = _process_task_slots.get(name)
+    if slots is None:
+        with _pools_lock:
+            slots = _process_task_slots.get(name)
+            if slots is None:
+                slots = threading.BoundedSemaphore(max(1, int(max_workers or available_cpus())))
+                _process_task_slots[name] = slots
+    return slots
+
+
+def _run_task(conn, fn, args, kwargs):
+    """Body of a run_in_process child: report the start, run fn, send back the outcome"""
+    try:
+        conn.send(('started', None))
+        try:
+            outcome = ('ok', fn(*args, **kwargs))
+        except Exception as e:
+            outcome = ('error', e)
+        try:
+            conn.send(outcome)
+        except Exception as e:
+            # Result or exception could not be pickled
+            conn.send(('error', RuntimeError(f"{type(e).__name__}: {e}")))
+    finally:
+        conn.close()
+
+
+def run_in_process(name, fn, *args, timeout=None, max_workers=None, **kwargs):
+    """
+    Run fn in its own worker process and wait at most timeout seconds
+
+    At most max_workers tasks of the same name run at once; later callers
+    wait for a slot. The timeout starts when fn starts running in the
+    child, so neither the wait for a slot nor the process start-up counts.
+    A task that overruns is killed on its own - other tasks keep running.
+
+    Args:
+        name: Task group name (e.g., 'parse')
+        fn: Module-level (picklable) function
+        timeout: Seconds fn may run (None = no limit)
+        max_workers: Concurrent processes for this name (fixed by the first caller)
+
+    Returns:
+        fn's return value
+
+    Raises:
+        TimeoutError: fn did not finish in time
+        RuntimeError: The worker process could not start or died
+        Exception: Whatever fn raised
+    """
+    start_timeout = float(os.getenv('PROCESS_START_TIMEOUT', 60))
+    with _process_slots(name, max_workers):
+        context = _process_context()
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(
+            target=_run_task, args=(sender, fn, args, kwargs),
+            name=f'campusops-{name}', daemon=True
+        )
+        try:
+            process.start()
+        except Exception:
+            receiver.close()
+            raise
+        finally:
+            # The child holds its own copy; recv() sees EOF if the child dies
+            sender.close()
+
+        try:
+            if not receiver.poll(start_timeout):
+                raise RuntimeError(f"{name} worker did not start within {start_timeout:g}s")
+            receiver.recv()
+            if not receiver.poll(timeout):
+                raise TimeoutError(f"{getattr(fn, '__name__', 'task')} did not finish within {timeout}s")
+            status, value = receiver.recv()
+        except EOFError:
+            process.join(1)
+            raise RuntimeError(f"{name} worker exited unexpectedly (exit code {process.exitcode})")
+        finally:
+            if process.is_alive():
+                process.kill()
+            process.join()
+            receiver.close()
+
+    if status == 'error':
+        raise value
+    return value
+
+
+def warm_process_pool(name, max_workers=None):
+    """
+    Start a process pool's workers ahead of the first request
+
+    Returns:
+        int: Number of workers started
+    """
+    workers = max(1, int(max_workers or available_cpus()))
+    pool = get_process_pool(name, workers)
+    for future in [pool.submit(os.getpid) for _ in range(workers)]:
+        future.result()
+    return workers
+
+
+def submit(pool, fn, *args, **kwargs):
+    """
+    Submit work to a pool, carrying over the caller's context variables
+
+    Context variables (such as the metrics endpoint label) are not inherited
+    by pool threads on their own, so the task runs inside a copy of the
+    submitting thread's context.
+
+    Returns:
+        concurrent.futures.Future
+    """
+    context = contextvars.copy_context()
+    return pool.submit(context.run, fn, *args, **kwargs)
+
+
+def map_ordered(pool, fn, items, timeout=None):
+    """
+    Run fn over items on a pool and collect the outcomes in input order
+
+    The timeout applies to each item separately and starts when the item
+    begins running, so time spent queued behind other items does not count.
+    A timed-out item cannot be interrupted; its result is discarded.
+
+    Args:
+        pool: Executor from get_thread_pool
+        fn: Callable taking one item
+        items: Items to process
+        timeout: Seconds allowed per item (None = no limit)
+
+    Returns:
+        list: (result, exception) per item; exception is None on success
+    """
+    started = [None] * len(items)
+
+    def run(index, item):
+        started[index] = time.monotonic()
+        return fn(item)
+
+    futures = [submit(pool, run, index, item) for index, item in enumerate(items)]
+
+    outcomes = []
+    for index, future in enumerate(futures):
+        while True:
+            try:
+                if timeout is None:
+                    wait = None
+                elif started[index] is None:
+                    wait = timeout
+                else:
+                    wait = max(0.0, started[index] + timeout - time.monotonic())
+                outcomes.append((future.result(timeout=wait), None))
+                break
+            except FutureTimeoutError:
+                if started[index] is None:
+                    # Still queued behind other items - its clock has not started
+                    continue
+                future.cancel()
+                outcomes.append((None, TimeoutError(f'Timed out after {timeout:g}s')))
+                break
+            except Exception as e:
+                outcomes.append((None, e))
+                break
+    return outcomes
+
+
+def shutdown_all(wait=False):
+    """Shut down every pool (used on process exit)"""
+    with _pools_lock:
+        pools = list(_thread_pools.values()) + list(_process_pools.values())
+        _thread_pools.clear()
+        _process_pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,323 @@
+"""
+Fake Groq Client
+Deterministic, offline stand-in for the Groq API used for load testing
+
+Mirrors the parts of the Groq SDK the services use:
+    client.chat.completions.create(...)
+    client.embeddings.create(...)
+
+Enable with LLM_BACKEND=fake. Tunables (environment variables):
+    FAKE_LLM_LATENCY_MS      Median simulated latency per call (default 800)
+    FAKE_LLM_LATENCY_SIGMA   Log-normal spread of the latency (default 0.5, 0 = fixed)
+    FAKE_LLM_ERROR_RATE      Fraction of calls that raise an error (default 0)
+    FAKE_LLM_SEED            Seed for latency/error sampling (default 42)
+"""
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+
+class FakeGroqError(Exception):
+    """Base class for simulated API failures"""
+
+
+class FakeRateLimitError(FakeGroqError):
+    """Simulated HTTP 429"""
+
+
+class FakeAPITimeoutError(FakeGroqError):
+    """Simulated request timeout"""
+
+
+class FakeInternalServerError(FakeGroqError):
+    """Simulated HTTP 500"""
+
+
+SIMULATED_ERRORS = (FakeRateLimitError, FakeRateLimitError, FakeAPITimeoutError, FakeInternalServerError)
+
+EMBEDDING_DIM = 768
+
+
+def _estimate_tokens(text):
+    """Rough token count (~4 characters per token)"""
+    return max(1, len(text) // 4)
+
+
+def _digest(text):
+    """Stable integer digest of a string"""
+    return int(hashlib.sha256(text.encode('utf-8')).hexdigest()[:16], 16)
+
+
+class _Simulator:
+    """Shared latency / error sampler"""
+
+    def __init__(self, latency_ms=None, latency_sigma=None, error_rate=None, seed=None):
+        self.latency_ms = float(latency_ms if latency_ms is not None else os.getenv('FAKE_LLM_LATENCY_MS', 800))
+        self.latency_sigma = float(latency_sigma if latency_sigma is not None else os.getenv('FAKE_LLM_LATENCY_SIGMA', 0.5))
+        self.error_rate = float(error_rate if error_rate is not None else os.getenv('FAKE_LLM_ERROR_RATE', 0))
+        self._random = random.Random(int(seed if seed is not None else os.getenv('FAKE_LLM_SEED', 42)))
+        self._lock = threading.Lock()
+
+    def simulate(self, scale=1.0):
+        """Sleep for a sampled latency, then maybe raise a simulated error"""
+        with self._lock:
+            noise = self._random.gauss(0.0, 1.0)
+            fail_roll = self._random.random()
+            error_class = self._random.choice(SIMULATED_ERRORS)
+
+        latency = self.latency_ms * scale * math.exp(self.latency_sigma * noise) / 1000.0
+        if latency > 0:
+            time.sleep(latency)
+
+        if fail_roll < self.error_rate:
+            raise error_class(f"Simulated {error_class.__name__} from fake Groq backend")
+
+
+class _FakeCompletions:
+    """Implements chat.completions.create"""
+
+    def __init__(self, simulator):
+        self._simulator = simulator
+
+    def create(self, model, messages, max_tokens=None, temperature=None, **kwargs):
+        system_text, user_text, has_image = _split_messages(messages)
+
+        if has_image:
+            content = _vision_response(user_text)
+        else:
+            content = _text_response(system_text, user_text)
+
+        # Longer answers take longer, like the real API
+        self._simulator.simulate(scale=0.5 + min(len(content), 4000) / 4000.0)
+
+        prompt_tokens = _estimate_tokens(system_text + user_text) + (800 if has_image else 0)
+        completion_tokens = _estimate_tokens(content)
+        if max_tokens:
+            completion_tokens = min(completion_tokens, max_tokens)
+
+        return SimpleNamespace(
+            id=f"fake-{_digest(user_text):x}",
+            model=model,
+            choices=[SimpleNamespace(
+                index=0,
+                finish_reason='stop',
+                message=SimpleNamespace(role='assistant', content=content)
+            )],
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens
+            )
+        )
+
+
+class _FakeEmbeddings:
+    """Implements embeddings.create"""
+
+    def __init__(self, simulator):
+        self._simulator = simulator
+
+    def create(self, input, model, **kwargs):
+        texts = [input] if isinstance(input, str) else list(input)
+        self._simulator.simulate(scale=0.1)
+
+        data = []
+        for index, text in enumerate(texts):
+            rng = random.Random(_digest(text))
+            vector = [rng.gauss(0.0, 1.0) for _ in range(EMBEDDING_DIM)]
+            norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+            data.append(SimpleNamespace(index=index, embedding=[v / norm for v in vector]))
+
+        tokens = sum(_estimate_tokens(text) for text in texts)
+        return SimpleNamespace(
+            model=model,
+            data=data,
+            usage=SimpleNamespace(prompt_tokens=tokens, total_tokens=tokens)
+        )
+
+
+class FakeGroq:
+    """Drop-in replacement for groq.Groq that never leaves the process"""
+
+    def __init__(self, api_key=None, latency_ms=None, latency_sigma=None, error_rate=None, seed=None, **kwargs):
+        self.api_key = api_key
+        simulator = _Simulator(latency_ms, latency_sigma, error_rate, seed)
+        self.chat = SimpleNamespace(completions=_FakeCompletions(simulator))
+        self.embeddings = _FakeEmbeddings(simulator)
+
+
+def _split_messages(messages):
+    """Flatten chat messages into (system text, user text, has image)"""
+    system_parts = []
+    user_parts = []
+    has_image = False
+
+    for message in messages:
+        content = message.get('content')
+        if isinstance(content, list):
+            for part in content:
+                if part.get('type') == 'image_url':
+                    has_image = True
+                elif part.get('type') == 'text':
+                    user_parts.append(part.get('text', ''))
+        elif message.get('role') == 'system':
+            system_parts.append(content or '')
+        else:
+            user_parts.append(content or '')
+
+    return '\n'.join(system_parts), '\n'.join(user_parts), has_image
+
+
+def _vision_response(prompt):
+    """Canned answers for the ImageService prompts"""
+    seed = _digest(prompt)
+    people = 10 + seed % 90
+
+    if 'single JSON object' in prompt:
+        return "```json\n" + json.dumps({
+            'caption': (
+                f"A group of about {people} students attend a session in a college auditorium, "
+                "facing a speaker presenting slides on stage."
+            ),
+            'text': "ANNUAL TECH FEST 2026\nWorkshop Hall B\nRegistration Desk",
+            'tags': ['college event', 'students', 'auditorium', 'presentation', 'workshop', 'audience']
+        }, indent=2) + "\n```"
+
+    if 'Extract ALL text' in prompt:
+        return "ANNUAL TECH FEST 2026\nWorkshop Hall B\nRegistration Desk"
+
+    if 'tags' in prompt.lower():
+        return "college event, students, auditorium, presentation, workshop, audience, stage, technology"
+
+    return (
+        f"A group of about {people} students attend a session in a college auditorium, "
+        "facing a speaker presenting slides on stage. The setting is well lit with a banner "
+        "announcing the event behind the podium."
+    )
+
+
+def _extract_json_skeleton(prompt):
+    """Pull the example JSON structure out of a prompt, if it has one"""
+    start = prompt.find('{')
+    end = prompt.rfind('}')
+    if start == -1 or end <= start:
+        return None
+    try:
+        return json.loads(prompt[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+
+
+def _feedback_json(skeleton, prompt):
+    """Fill the feedback-analysis schema with numbers derived from the input"""
+    # Feedback sits between the instruction line and the JSON schema
+    body = prompt.split('Generate a JSON response')[0].split('\n', 1)[-1]
+    total = max(1, sum(1 for line in body.split('\n') if line.strip()))
+    seed = _digest(prompt)
+    positive = (total * (55 + seed % 20)) // 100
+    negative = (total * (5 + seed % 10)) // 100
+    neutral = total - positive - negative
+
+    skeleton.update({
+        'overall_sentiment': 'positive' if positive >= total / 2 else 'neutral',
+        'satisfaction_score': round(3.5 + (seed % 13) / 10.0, 1),
+        'total_responses': total,
+        'sentiment_distribution': {
+            'positive': positive,
+            'neutral': neutral,
+            'negative': negative
+        },
+        'summary': f"Simulated analysis of {total} feedback responses."
+    })
+    return skeleton
+
+
+def _form_report(prompt):
+    """Templated form-style report matching the event report prompts"""
+    match = re.search(r'for: (.+)', prompt)
+    event = (match.group(1).strip() if match else 'Campus Event')[:80]
+
+    if 'Event Plan' in prompt:
+        kind = 'Event Plan'
+    elif 'Event Summary' in prompt:
+        kind = 'Event Summary'
+    else:
+        kind = 'Event Report'
+
+    po_rows = '\n'.join(
+        f"{i} | Program outcome {i} | {1 + i % 3} | Observed during the event"
+        for i in range(1, 12)
+    )
+
+    return f"""Title: {kind} of Club/Committee Tech Club FF 984
+
+[TABLE: Event Details - 2 columns]
+Name of the Club | Tech Club
+Name of the Event | {event}
+Student Vertical | Engineering
+Date and Time of the Event | 15/03/2026 10:00 AM
+Mode of the Event | Offline - Main Auditorium
+No. of Participants | 120 Students, 8 Faculty
+Duration of Event | 3 hours
+Achievements & Highlights | Hands-on sessions and an interactive Q&A
+
+[TABLE: Program Outcomes - 4 columns]
+S.No. | Program Outcome | Rating (0-3) | Remarks
+{po_rows}
+
+## GEO-Tagged Photograph Section
+- Minimum 3 geo-tagged photographs of the event
+
+## Non GEO-Tagged Photograph Section
+- Minimum 3 photographs of the event
+"""
+
+
+def _mou_text(prompt):
+    """Templated MOU prose"""
+    sections = [
+        'Preamble', 'Purpose and Objectives', 'Scope of Collaboration', 'Roles and Responsibilities',
+        'Duration and Termination', 'Financial Terms', 'Intellectual Property Rights',
+        'Confidentiality', 'Dispute Resolution', 'Miscellaneous Provisions'
+    ]
+    paragraphs = []
+    for number, title in enumerate(sections, start=1):
+        paragraphs.append(
+            f"{number}. {title}\n"
+            f"The Parties agree that the provisions of this clause on {title.lower()} shall apply "
+            "for the duration of this Memorandum and shall be interpreted in good faith."
+        )
+    return '\n\n'.join(paragraphs)
+
+
+def _text_response(system_text, prompt):
+    """Canned answers for the text (non-vision) prompts"""
+    wants_json = 'JSON' in system_text or 'JSON' in prompt
+
+    if wants_json:
+        skeleton = _extract_json_skeleton(prompt)
+        if skeleton is None:
+            return json.dumps({'result': 'Simulated response from fake Groq backend'})
+        if 'sentiment_distribution' in skeleton:
+            skeleton = _feedback_json(skeleton, prompt)
+        return f"```json\n{json.dumps(skeleton, indent=2)}\n```"
+
+    if '[TABLE:' in prompt or '[TABLE:' in system_text:
+        return _form_report(prompt)
+
+    if 'Memorandum of Understanding' in prompt:
+        return _mou_text(prompt)
+
+    return (
+        "This is a simulated response from the fake Groq backend.\n\n"
+        "1. Venue and Infrastructure: $500\n"
+        "2. Food and Refreshments: $800\n"
+        "3. Marketing and Promotion: $200\n\n"
+        "Total Estimated Budget: $1,500"
+    )
@@ -0,0 +1,426 @@
+"""
+Feedback Analysis Pipeline
+Map-reduce analysis of large feedback files
+
+Feedback is split into token-bounded batches, each batch is analyzed by the
+LLM concurrently (map), and the per-batch results are merged into a single
+analysis deterministically (reduce), so every row is covered while wall-clock
+time stays close to a single batch.
+
+With local scoring enabled (the default), sentiment numbers are computed for
+every row by SentimentScorer and only a clustered, representative sample of
+comments is sent to the LLM for themes and recommendations.
+"""
+import os
+import re
+import numpy as np
+from services import executors
+from services.sentiment_scorer import (
+    SentimentScorer, ReservoirSample, column_scale, count_labels, summarize_counts,
+    parse_ratings, rating_statistics, representative_sample
+)
+
+
+SENTIMENT_LABELS = ('positive', 'neutral', 'negative')
+_scorer = SentimentScorer()
+LIST_FIELDS = ('top_praises', 'top_issues', 'key_themes', 'recommendations')
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+class FeedbackPipeline:
+    """Batches feedback, analyzes batches in parallel and merges the results"""
+
+    def __init__(self, llm, batch_tokens=None, max_workers=None, max_items_per_list=5,
+                 local_scoring=None, sample_size=None):
+        """
+        Args:
+            llm: LLMService instance
+            batch_tokens: Token budget for the feedback text of one batch
+            max_workers: Maximum batches analyzed at the same time
+            max_items_per_list: Items kept per merged list (themes, issues, ...)
+            local_scoring: Score sentiment locally and send only a sample to the LLM
+            sample_size: Comments sent to the LLM when local scoring is on
+        """
+        self.llm = llm
+        self.batch_tokens = int(batch_tokens or os.getenv('FEEDBACK_BATCH_TOKENS', 3000))
+        self.max_workers = int(max_workers or os.getenv('FEEDBACK_MAX_WORKERS', 8))
+        self.max_items_per_list = max_items_per_list
+        if local_scoring is None:
+            local_scoring = os.getenv('FEEDBACK_LOCAL_SCORING', 'true').lower() == 'true'
+        self.local_scoring = local_scoring
+        self.sample_size = int(sample_size or os.getenv('FEEDBACK_SAMPLE_SIZE', 120))
+        # Rows kept (uniformly sampled) for clustering when streaming large files
+        self.reservoir_size = 5000
+
+    def iter_batches(self, feedback_items):
+        """
+        Split feedback into batches whose text fits the token budget
+
+        Args:
+            feedback_items: Iterable of feedback strings
+
+        Returns:
+            generator of batches (lists of strings), in input order
+        """
+        current = []
+        current_tokens = 0
+        max_chars = self.batch_tokens * 4
+
+        for item in feedback_items:
+            # A single huge comment is truncated rather than blowing the budget
+            if len(item) > max_chars:
+                item = item[:max_chars]
+            tokens = estimate_tokens(item)
+
+            if current and current_tokens + tokens > self.batch_tokens:
+                yield current
+                current = []
+                current_tokens = 0
+
+            current.append(item)
+            current_tokens += tokens
+
+        if current:
+            yield current
+
+    def make_batches(self, feedback_items):
+        """List version of iter_batches"""
+        return list(self.iter_batches(feedback_items))
+
+    def analyze(self, feedback_items, ratings=None):
+        """
+        Analyze all feedback items
+
+        Args:
+            feedback_items: List of feedback strings
+            ratings: Optional {column name: [raw values]} for numeric rating columns
+
+        Returns:
+            dict: Merged analysis in the LLMService.analyze_feedback schema,
+                  plus a 'pipeline' section describing the batching
+        """
+        return self.analyze_stream([(feedback_items, ratings or {})])
+
+    def analyze_stream(self, chunks, on_chunk=None):
+        """
+        Analyze feedback arriving in chunks (e.g., FeedbackCSVReader.iter_chunks)
+
+        Only the current chunk is held in memory; every row is scored (or
+        batched for the LLM) as it arrives.
+
+        Args:
+            chunks: Iterable of (texts, ratings) tuples
+            on_chunk: Optional callback(texts, ratings, scores, labels) run for
+                      every chunk, e.g. to persist rows; scores and labels are
+                      None when local scoring is off
+
+        Returns:
+            dict: Same as analyze()
+        """
+        if self.local_scoring:
+            return self._analyze_with_local_scores(chunks, on_chunk)
+        return self._map_reduce(text for texts, _ in _observe(chunks, on_chunk) for text in texts)
+
+    def _map_reduce(self, feedback_items, context=None):
+        """Analyze every item with the LLM in concurrent batches"""
+        pool = executors.get_thread_pool('llm', self.max_workers)
+        batch_sizes = []
+        futures = []
+
+        # Map: batches are submitted as soon as they fill up, so reading the
+        # input overlaps with the LLM calls
+        for batch in self.iter_batches(feedback_items):
+            batch_sizes.append(len(batch))
+            futures.append(executors.submit(pool, self._analyze_batch, batch, context))
+
+        if not futures:
+            return {'error': 'No feedback to analyze'}
+
+        # Reduce: merge in batch order so the output is deterministic
+        results = [future.result() for future in futures]
+        return self.merge(batch_sizes, results)
+
+    def _analyze_batch(self, batch, context=None):
+        """Run the LLM analysis for one batch"""
+        try:
+            return self.llm.analyze_feedback("\n".join(batch), context=context)
+        except Exception as e:
+            return {'error': f'Batch analysis failed: {str(e)}'}
+
+    def _analyze_with_local_scores(self, chunks, on_chunk=None):
+        """
+        Score every row locally, then ask the LLM only about a sample
+
+        Sentiment distribution and satisfaction come from the local scores
+        (and rating columns when present); the LLM contributes themes,
+        praises, issues, recommendations and the summary.
+        """
+        total = 0
+        score_sum = 0.0
+        distribution = dict.fromkeys(SENTIMENT_LABELS, 0)
+        rating_values = {}
+        rating_scales = {}
+        reservoir = ReservoirSample(capacity=self.reservoir_size)
+
+        for texts, ratings in chunks:
+            if not texts:
+                continue
+            scores = _scorer.score(texts)
+            labels = _scorer.label(scores)
+            for label, count in count_labels(labels).items():
+                distribution[label] += count
+            score_sum += float(scores.sum())
+            total += len(texts)
+
+            for column, values in (ratings or {}).items():
+                parsed = parse_ratings(values)
+                rating_values.setdefault(column, []).append(parsed)
+                if rating_scales.get(column) is None:
+                    # Same choice as FeedbackStore: header, else the first chunk with ratings
+                    rating_scales[column] = column_scale(column, parsed)
+            reservoir.extend(texts)
+
+            if on_chunk:
+                on_chunk(texts, ratings, scores, labels)
+
+        if not total:
+            return {'error': 'No feedback to analyze'}
+
+        local = summarize_counts(distribution, score_sum / total)
+
+        rating_stats = {}
+        for column, parts in rating_values.items():
+            stats = rating_statistics(np.concatenate(parts), scale=rating_scales.get(column))
+            if stats:
+                rating_stats[column] = stats
+
+        satisfaction = local['satisfaction_score']
+        if rating_stats:
+            # Prefer what people actually rated over the lexicon estimate
+            first = next(iter(rating_stats.values()))
+            satisfaction = round(first['mean'] / first['scale'] * 5, 1)
+
+        sample = representative_sample(reservoir.items, self.sample_size, population=total)
+        sample_texts = [
+            f"(~{item['weight']} similar responses) {item['text']}" if item['weight'] > 1 else item['text']
+            for item in sample
+        ]
+
+        context = (
+            f"NOTE: These {len(sample)} comments are a representative sample of {total} responses. "
+            f"Sentiment measured across all responses: {distribution['positive']} positive, "
+            f"{distribution['neutral']} neutral, {distribution['negative']} negative "
+            f"(satisfaction {satisfaction}/5). Use these numbers; focus on themes, praises, "
+            f"issues and recommendations."
+        )
+
+        analysis = self._map_reduce(sample_texts, context)
+        pipeline = analysis.pop('pipeline', {})
+
+        if 'error' in analysis:
+            # The LLM part failed - the locally computed numbers are still valid
+            llm_error = analysis.pop('error')
+            analysis = {field: [] for field in LIST_FIELDS}
+            analysis['summary'] = ''
+            analysis['llm_error'] = llm_error
+
+        analysis.update({
+            'overall_sentiment': local['overall_sentiment'],
+            'satisfaction_score': satisfaction,
+            'total_responses': total,
+            'analyzed_responses': total,
+            'sentiment_distribution': distribution
+        })
+        # Failed sample batches do not affect the locally scored numbers
+        analysis.pop('failed_batches', None)
+        if pipeline.get('batches', 1) > 1 or not analysis.get('summary'):
+            analysis['summary'] = _compose_summary(
+                local['overall_sentiment'], total, distribution, analysis.get('key_themes', [])
+            )
+
+        analysis['local_scoring'] = {
+            'mean_sentiment': local['mean_sentiment'],
+            'rating_columns': rating_stats,
+            'sample_size': len(sample)
+        }
+        analysis['pipeline'] = {
+            'batches': pipeline.get('batches', 0),
+            'failed_batches': pipeline.get('failed_batches', 0),
+            'rows_total': total,
+            'rows_analyzed': total,
+            'rows_sent_to_llm': len(sample)
+        }
+        return analysis
+
+    def merge(self, batch_sizes, results):
+        """
+        Merge per-batch analyses into one
+
+        Args:
+            batch_sizes: Number of feedback items in each batch
+            results: Analysis dict per batch, same order as batch_sizes
+
+        Returns:
+            dict: Merged analysis
+        """
+        succeeded = [
+            (size, result) for size, result in zip(batch_sizes, results)
+            if isinstance(result, dict) and 'error' not in result
+        ]
+        failed = len(batch_sizes) - len(succeeded)
+
+        if not succeeded:
+            error = results[0] if results and isinstance(results[0], dict) else {'error': 'Analysis failed'}
+            return dict(error, pipeline={
+                'batches': len(batch_sizes), 'failed_batches': failed,
+                'rows_total': sum(batch_sizes), 'rows_analyzed': 0
+            })
+
+        total = sum(batch_sizes)
+        analyzed = sum(size for size, _ in succeeded)
+
+        # Sentiment: rescale each batch's distribution to its true row count
+        distribution = dict.fromkeys(SENTIMENT_LABELS, 0)
+        for size, result in succeeded:
+            for label, count in _rescale_distribution(result.get('sentiment_distribution'), size).items():
+                distribution[label] += count
+
+        # Satisfaction: size-weighted mean of batch scores
+        weighted_score = 0.0
+        score_weight = 0
+        for size, result in succeeded:
+            score = _to_float(result.get('satisfaction_score'))
+            if score is not None:
+                weighted_score += score * size
+                score_weight += size
+        satisfaction = round(weighted_score / score_weight, 1) if score_weight else None
+
+        overall = max(SENTIMENT_LABELS, key=lambda label: (distribution[label], -SENTIMENT_LABELS.index(label)))
+
+        # sentiment_distribution and satisfaction_score cover analyzed_responses
+        # rows; total_responses also counts rows in failed batches
+        merged = {
+            'overall_sentiment': overall,
+            'satisfaction_score': satisfaction,
+            'total_responses': total,
+            'analyzed_responses': analyzed,
+            'failed_batches': failed,
+            'sentiment_distribution': distribution
+        }
+
+        for field in LIST_FIELDS:
+            merged[field] = self._merge_ranked_lists(
+                [(size, result.get(field) or []) for size, result in succeeded]
+            )
+
+        if len(succeeded) == 1:
+            merged['summary'] = succeeded[0][1].get('summary', '')
+        else:
+            merged['summary'] = _compose_summary(overall, analyzed, distribution, merged['key_themes'])
+        if failed:
+            merged['summary'] += (
+                f" {total - analyzed} of {total} responses were not analyzed "
+                f"({failed} failed batch{'es' if failed != 1 else ''})."
+            )
+
+        merged['pipeline'] = {
+            'batches': len(batch_sizes),
+            'failed_batches': failed,
+            'rows_total': total,
+            'rows_analyzed': analyzed
+        }
+        return merged
+
+    def _merge_ranked_lists(self, weighted_lists):
+        """
+        Rank list items by how much feedback mentioned them
+
+        Each item is weighted by the size of the batch it came from and by
+        its position in that batch's list. Ties are broken by first
+        appearance, so the result does not depend on timing.
+        """
+        scores = {}
+        first_seen = {}
+        display = {}
+        order = 0
+
+        for size, items in weighted_lists:
+            if not isinstance(items, list):
+                continue
+            for position, item in enumerate(items):
+                text = str(item).strip()
+                key = _normalize(text)
+                if not key:
+                    continue
+                scores[key] = scores.get(key, 0.0) + size / (position + 1)
+                if key not in first_seen:
+                    first_seen[key] = order
+                    display[key] = text
+                order += 1
+
+        ranked = sorted(scores, key=lambda key: (-scores[key], first_seen[key]))
+        return [display[key] for key in ranked[:self.max_items_per_list]]
+
+
+def _normalize(text):
+    """Normalization key used to de-duplicate list items"""
+    return re.sub(r'[^a-z0-9 ]+', '', text.lower()).strip()
+
+
+def _to_float(value):
+    """Parse a numeric value the LLM may have returned as text ('4.2/5')"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = re.search(r'\d+(\.\d+)?', value)
+        if match:
+            return float(match.group(0))
+    return None
+
+
+def _observe(chunks, on_chunk):
+    """Pass chunks through, handing each to the callback first"""
+    for texts, ratings in chunks:
+        if on_chunk and texts:
+            on_chunk(texts, ratings, None, None)
+        yield texts, ratings
+
+
+def _rescale_distribution(distribution, size):
+    """
+    Scale an LLM sentiment distribution so it sums to the batch size
+
+    Uses largest-remainder rounding so counts stay integers and add up.
+    """
+    raw = {}
+    if isinstance(distribution, dict):
+        for label in SENTIMENT_LABELS:
+            value = _to_float(distribution.get(label))
+            raw[label] = max(value, 0.0) if value is not None else 0.0
+
+    total = sum(raw.values())
+    if not total:
+        return {'positive': 0, 'neutral': size, 'negative': 0}
+
+    exact = {label: raw[label] * size / total for label in SENTIMENT_LABELS}
+    counts = {label: int(exact[label]) for label in SENTIMENT_LABELS}
+    remainder = size - sum(counts.values())
+    for label in sorted(SENTIMENT_LABELS, key=lambda l: (-(exact[l] - counts[l]), SENTIMENT_LABELS.index(l)))[:remainder]:
+        counts[label] += 1
+    return counts
+
+
+def _compose_summary(overall, total, distribution, themes):
+    """Build the merged summary from the reduced numbers"""
+    summary = (
+        f"Overall sentiment is {overall} across {total} responses "
+        f"({distribution['positive']} positive, {distribution['neutral']} neutral, "
+        f"{distribution['negative']} negative)."
+    )
+    if themes:
+        summary += f" Main themes: {', '.join(themes[:3])}."
+    return summary
@@ -0,0 +1,347 @@
+"""
+Feedback Store
+Persists every feedback row with its local sentiment score and keeps
+pre-aggregated rollups (per event, per club, per week) up to date with
+$inc upserts, so trend queries never have to touch the raw rows or the LLM
+
+Rollup counters are accumulated while the upload streams in and applied
+once per upload. Uploads are identified by their content hash, so sending
+the same CSV again for the same event does not count it twice.
+"""
+import hashlib
+import re
+from datetime import datetime
+import numpy as np
+from bson import ObjectId
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from services.sentiment_scorer import SentimentScorer, column_scale, rating_cells
+
+
+ROWS_COLLECTION = 'feedback_rows'
+ROLLUPS_COLLECTION = 'feedback_rollups'
+# One document per (file hash, event, club) whose rows are in the rollups
+UPLOADS_COLLECTION = 'feedback_uploads'
+
+COUNTER_FIELDS = ('responses', 'score_sum', 'positive', 'neutral', 'negative', 'rating_count', 'rating_sum')
+
+# Rollup scopes: (scope, key field, period is the ISO week?)
+ROLLUP_SCOPES = (
+    ('event', 'event_id', False),
+    ('club', 'club_id', False),
+    ('club_week', 'club_id', True),
+    ('week', None, True),
+)
+
+ALL_PERIODS = 'all'
+
+_scorer = SentimentScorer()
+_indexed_databases = set()
+
+
+def iso_week(moment):
+    """ISO week label that sorts chronologically, e.g. '2026-W07'"""
+    year, week, _ = moment.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def parse_event_date(value):
+    """Parse an event date (YYYY-MM-DD or DD/MM/YYYY); None if missing or invalid"""
+    if not value:
+        return None
+    for fmt in ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y'):
+        try:
+            return datetime.strptime(value.strip()[:10], fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def upload_hash(binary_stream):
+    """SHA-256 of an upload stream; the stream is rewound afterwards"""
+    digest = hashlib.sha256()
+    binary_stream.seek(0)
+    for block in iter(lambda: binary_stream.read(1024 * 1024), b''):
+        digest.update(block)
+    binary_stream.seek(0)
+    return digest.hexdigest()
+
+
+def slugify(value):
+    """Lower-case, dash-separated key for names used as ids"""
+    return re.sub(r'[^a-z0-9]+', '-', (value or '').lower()).strip('-')
+
+
+class FeedbackStore:
+    """Writes feedback rows and rollups for one upload"""
+
+    def __init__(self, db, upload_id=None, event_id=None, event_name=None, club_id=None,
+                 event_date=None, store_rows=True, content_hash=None):
+        """
+        Args:
+            db: MongoDBClient
+            upload_id: ObjectId of the upload (generated if omitted)
+            event_id: Event key (defaults to a slug of event_name, then the content hash or upload id)
+            event_name: Display name of the event
+            club_id: Club key (e.g., 'tech_club'); 'unknown' if omitted
+            event_date: datetime the feedback belongs to (defaults to now)
+            store_rows: Persist individual rows in addition to the rollups
+            content_hash: upload_hash of the file; re-uploads of the same file
+                          for the same event and club are not recorded again
+        """
+        self.db = db
+        self.upload_id = upload_id or ObjectId()
+        self.event_name = event_name or ''
+        # Without a name, the same file always maps to the same event
+        self.event_id = event_id or slugify(event_name) or (content_hash[:24] if content_hash else str(self.upload_id))
+        self.club_id = club_id or 'unknown'
+        self.created_at = datetime.utcnow()
+        self.event_date = event_date or self.created_at
+        self.week = iso_week(self.event_date)
+        self.store_rows = store_rows
+        self.rows_written = 0
+        # No week in the key: it defaults to the upload time, so the same file
+        # re-uploaded a week later would otherwise be counted twice
+        self.upload_key = f"{content_hash}:{self.event_id}:{self.club_id}" if content_hash else None
+        # Upload id of an earlier recording of the same file (nothing is written then)
+        self.duplicate_of = None
+
+        self._counters = dict.fromkeys(COUNTER_FIELDS, 0)
+        # Fixed by the first chunk with ratings, so every chunk uses the same scale
+        self._rating_column = None
+        self._rating_scale = None
+
+    def is_enabled(self):
+        """True when there is a database to write to"""
+        return self.db is not None and self.db.db is not None
+
+    def check_duplicate(self):
+        """
+        Look for an earlier recording of this upload
+
+        Returns:
+            bool: True if the file was already recorded (this store then
+                  writes nothing)
+        """
+        if not self.is_enabled() or not self.upload_key:
+            return False
+        document = self.db.find_one(UPLOADS_COLLECTION, {'_id': self.upload_key})
+        if document:
+            self.duplicate_of = document['upload_id']
+        return self.duplicate_of is not None
+
+    def ensure_indexes(self):
+        """Create the row and rollup indexes once per database"""
+        if not self.is_enabled() or self.db.db_name in _indexed_databases:
+            return
+        self.db.create_index(ROWS_COLLECTION, [('club_id', ASCENDING), ('week', ASCENDING)])
+        self.db.create_index(ROWS_COLLECTION, [('event_id', ASCENDING)])
+        self.db.create_index(ROWS_COLLECTION, [('upload_id', ASCENDING)])
+        # Every rollup read is an equality on scope/key plus a range on period
+        self.db.create_index(
+            ROLLUPS_COLLECTION,
+            [('scope', ASCENDING), ('key', ASCENDING), ('period', ASCENDING)],
+            unique=True
+        )
+        _indexed_databases.add(self.db.db_name)
+
+    def record_chunk(self, texts, ratings, scores=None, labels=None):
+        """
+        Persist one chunk of feedback and add it to the upload's rollup counters
+
+        Matches the FeedbackPipeline.analyze_stream on_chunk callback.
+
+        Args:
+            texts: Feedback strings
+            ratings: {column name: [raw values]}; the first column is used
+            scores: Local sentiment scores (computed here if None)
+            labels: Sentiment labels (1 / 0 / -1)
+        """
+        if not self.is_enabled() or not texts or self.duplicate_of is not None:
+            return
+        if scores is None:
+            scores = _scorer.score(texts)
+            labels = _scorer.label(scores)
+
+        rating_column, rating_values = self._normalized_ratings(ratings, len(texts))
+
+        if self.store_rows:
+            self._insert_rows(texts, scores, labels, rating_column, rating_values)
+
+        rated = ~np.isnan(rating_values)
+        counters = self._counters
+        counters['responses'] += len(texts)
+        counters['score_sum'] += float(scores.sum())
+        counters['positive'] += int(np.count_nonzero(labels == 1))
+        counters['neutral'] += int(np.count_nonzero(labels == 0))
+        counters['negative'] += int(np.count_nonzero(labels == -1))
+        counters['rating_count'] += int(np.count_nonzero(rated))
+        counters['rating_sum'] += float(rating_values[rated].sum())
+
+    def record_upload(self, filename, analysis, total):
+        """
+        Apply the upload's rollup counters and store the upload-level analysis document
+
+        Nothing is written when the same file was already recorded; if a
+        concurrent upload of the same file finished first, the rows written
+        by this one are removed again.
+
+        Returns:
+            ObjectId or None: Id of the upload (of the earlier one for a duplicate)
+        """
+        if not self.is_enabled():
+            return None
+        if self.duplicate_of is not None:
+            return self.duplicate_of
+
+        if self.upload_key:
+            try:
+                self.db.insert_one(UPLOADS_COLLECTION, {
+                    '_id': self.upload_key,
+                    'upload_id': self.upload_id,
+                    'created_at': self.created_at
+                })
+            except DuplicateKeyError:
+                document = self.db.find_one(UPLOADS_COLLECTION, {'_id': self.upload_key})
+                self.duplicate_of = document['upload_id'] if document else None
+                self.db.get_collection(ROWS_COLLECTION).delete_many({'upload_id': self.upload_id})
+                self.rows_written = 0
+                return self.duplicate_of
+
+        if self._counters['responses']:
+            self._apply_rollups(self._counters)
+
+        return self.db.insert_one('feedback', {
+            '_id': self.upload_id,
+            'filename': filename,
+            'event_id': self.event_id,
+            'event_name': self.event_name,
+            'club_id': self.club_id,
+            'week': self.week,
+            'feedback_count': total,
+            'analysis': analysis,
+            'timestamp': self.created_at
+        })
+
+    def _normalized_ratings(self, ratings, count):
+        """
+        First rating column rescaled to 1-5 (NaN where a row has no rating)
+
+        The column and its scale are chosen once per upload: from the header
+        ('Rating (1-10)') if it states one, otherwise from the largest value
+        in the first chunk that has ratings.
+        """
+        ratings = ratings or {}
+        if self._rating_column is None:
+            for column, values in ratings.items():
+                cells = rating_cells(values)
+                if cells.size != count or np.isnan(cells).all():
+                    continue
+                self._rating_column = column
+                self._rating_scale = column_scale(column, cells)
+                return column, cells / self._rating_scale * 5
+            return None, np.full(count, np.nan)
+
+        values = ratings.get(self._rating_column)
+        cells = rating_cells(values) if values is not None else np.full(count, np.nan)
+        if cells.size != count:
+            return None, np.full(count, np.nan)
+        return self._rating_column, cells / self._rating_scale * 5
+
+    def _insert_rows(self, texts, scores, labels, rating_column, rating_values):
+        """Bulk-insert the chunk's rows"""
+        base = {
+            'upload_id': self.upload_id,
+            'event_id': self.event_id,
+            'club_id': self.club_id,
+            'week': self.week,
+            'created_at': self.created_at
+        }
+        documents = []
+        for text, score, label, rating in zip(texts, scores.tolist(), labels.tolist(), rating_values.tolist()):
+            document = dict(base, text=text, sentiment=round(score, 4), label=label)
+            if rating == rating:  # not NaN
+                document['rating'] = round(rating, 2)
+                document['rating_column'] = rating_column
+            documents.append(document)
+
+        self.db.insert_many(ROWS_COLLECTION, documents)
+        self.rows_written += len(documents)
+
+    def _apply_rollups(self, counters):
+        """One $inc upsert per rollup scope, sent as a single bulk write"""
+        operations = []
+        for scope, key_field, weekly in ROLLUP_SCOPES:
+            key = getattr(self, key_field) if key_field else ALL_PERIODS
+            period = self.week if weekly else ALL_PERIODS
+            on_insert = {'created_at': self.created_at}
+            if scope == 'event':
+                on_insert.update({'club_id': self.club_id, 'event_name': self.event_name})
+            operations.append(UpdateOne(
+                {'scope': scope, 'key': key, 'period': period},
+                {
+                    '$inc': counters,
+                    '$set': {'updated_at': datetime.utcnow()},
+                    '$setOnInsert': on_insert
+                },
+                upsert=True
+            ))
+        self.db.bulk_write(ROLLUPS_COLLECTION, operations)
+
+
+def rollup_view(document):
+    """
+    Turn a raw rollup document into API output
+
+    Satisfaction comes from the ratings when the rows had any, otherwise
+    from the mean local sentiment mapped onto the 1-5 scale.
+    """
+    responses = document.get('responses', 0)
+    rating_count = document.get('rating_count', 0)
+    mean_sentiment = document.get('score_sum', 0.0) / responses if responses else 0.0
+    if rating_count:
+        satisfaction = document.get('rating_sum', 0.0) / rating_count
+    else:
+        satisfaction = 3.0 + 2.0 * mean_sentiment
+
+    return {
+        'scope': document.get('scope'),
+        'key': document.get('key'),
+        'period': document.get('period'),
+        'responses': responses,
+        'satisfaction_score': round(satisfaction, 2),
+        'mean_sentiment': round(mean_sentiment, 4),
+        'rated_responses': rating_count,
+        'sentiment_distribution': {
+            'positive': document.get('positive', 0),
+            'neutral': document.get('neutral', 0),
+            'negative': document.get('negative', 0)
+        },
+        'updated_at': document['updated_at'].isoformat() if document.get('updated_at') else None
+    }
+
+
+def satisfaction_trend(db, club_id=None, start_week=None, end_week=None, limit=104):
+    """
+    Weekly satisfaction trend read straight from the rollups
+
+    Args:
+        db: MongoDBClient
+        club_id: Club key (all clubs when omitted)
+        start_week: First ISO week label to include (e.g., '2026-W01')
+        end_week: Last ISO week label to include
+        limit: Maximum weeks returned
+
+    Returns:
+        list: Rollup views ordered by week
+    """
+    query = {'scope': 'club_week', 'key': club_id} if club_id else {'scope': 'week', 'key': ALL_PERIODS}
+    period = {}
+    if start_week:
+        period['$gte'] = start_week
+    if end_week:
+        period['$lte'] = end_week
+    query['period'] = period or {'$ne': ALL_PERIODS}
+
+    documents = db.find_many(ROLLUPS_COLLECTION, query, limit=limit, sort=[('period', ASCENDING)])
+    return [rollup_view(document) for document in documents]
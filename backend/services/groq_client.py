@@ -0,0 +1,30 @@
+"""
+Groq client factory
+Selects the real Groq SDK or the offline fake backend (LLM_BACKEND=groq|fake)
+"""
+import os
+from groq import Groq
+
+
+def use_fake_backend():
+    """True when the offline fake backend is selected"""
+    return os.getenv('LLM_BACKEND', 'groq').lower() == 'fake'
+
+
+def create_groq_client(api_key=None):
+    """
+    Create the client used by LLMService, ImageService and GroqEmbedder
+
+    Args:
+        api_key: Groq API key (ignored by the fake backend)
+
+    Returns:
+        groq.Groq or FakeGroq instance
+    """
+    if use_fake_backend():
+        try:
+            from services.fake_groq import FakeGroq
+        except ImportError:  # running as a script from services/
+            from fake_groq import FakeGroq
+        return FakeGroq(api_key=api_key)
+    return Groq(api_key=api_key)
@@ -1,8 +1,13 @@
 import os
 from typing import List
 import numpy as np
-from groq import Groq
 from dotenv import load_dotenv
+try:
+    from services.groq_client import create_groq_client
+    from services.metrics import track_llm_call
+except ImportError:  # running as a script from services/ (see test_rag.py)
+    from groq_client import create_groq_client
+    from metrics import track_llm_call
 
 load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
@@ -12,11 +17,13 @@ class GroqEmbedder:
     def __init__(self, api_key: str = None, model: str = None):
         self.api_key = api_key or GROQ_API_KEY
         self.model = model or GROQ_EMBED_MODEL
-        self.client = Groq(api_key=self.api_key)
+        self.client = create_groq_client(api_key=self.api_key)
 
     def get_embeddings(self, texts: List[str]) -> np.ndarray:
         embeddings = []
         for text in texts:
-            resp = self.client.embeddings.create(input=text, model=self.model)
+            with track_llm_call('embedding', self.model) as call:
+                resp = self.client.embeddings.create(input=text, model=self.model)
+                call.response = resp
             embeddings.append(resp.data[0].embedding)
         return np.array(embeddings, dtype=np.float32)
@@ -0,0 +1,264 @@
+"""
+Image Analysis Cache
+Caches caption / OCR / tag results keyed by the image content
+
+Two keys identify an image:
+    - SHA-256 of the file bytes (exact re-uploads)
+    - 64-bit difference hash (dHash) of the picture, so re-encoded copies
+      of the same photo also hit
+
+Near-duplicate (dHash) hits are only used for captions and tags, and only
+between images of the same aspect ratio (a resized copy still hits, a crop
+does not). OCR text and full analyses depend on
+details the hash does not see (two different text documents on a white
+page share a dHash), so they are served for exact SHA-256 matches only.
+
+Results live in an in-memory LRU tier in front of the Mongo
+'image_analyses' collection.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from PIL import Image
+from pymongo import ASCENDING
+from services.image_io import iter_blocks, open_image
+from services.metrics import record_cache
+
+
+COLLECTION = 'image_analyses'
+
+# dHash is split into 4 bands of 16 bits; two hashes within 3 bits of each
+# other always share a band, so band equality finds near-duplicate candidates
+# with an indexed query
+HASH_BANDS = 4
+BAND_BITS = 64 // HASH_BANDS
+
+# Operations whose results may be reused for a near-duplicate image
+NEAR_DUPLICATE_OPERATIONS = ('caption', 'tags')
+# Largest relative aspect-ratio difference between near duplicates
+# (resizing rounds each side to whole pixels)
+ASPECT_TOLERANCE = 0.02
+
+
+def content_hash(source):
+    """SHA-256 hex digest of the image bytes (path, bytes or file object)"""
+    digest = hashlib.sha256()
+    for block in iter_blocks(source):
+        digest.update(block)
+    return digest.hexdigest()
+
+
+def perceptual_hash(source):
+    """
+    64-bit difference hash of an image
+
+    The image is shrunk to 9x8 grayscale and each bit records whether a
+    pixel is brighter than its right neighbour, which survives re-encoding,
+    resizing and small colour changes.
+
+    Returns:
+        int: Hash value
+    """
+    with open_image(source) as img:
+        return _difference_hash(img)
+
+
+def _difference_hash(img):
+    """dHash of an open image (see perceptual_hash)"""
+    # JPEG draft mode decodes at a fraction of the size - plenty for 9x8
+    img.draft('L', (64, 64))
+    pixels = img.convert('L').resize((9, 8), Image.Resampling.BILINEAR).tobytes()
+
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            value = (value << 1) | (1 if left > right else 0)
+    return value
+
+
+def hamming_distance(a, b):
+    """Number of differing bits between two hashes"""
+    return bin(a ^ b).count('1')
+
+
+def hash_bands(value):
+    """Band keys ('<band>:<hex>') used for the near-duplicate index"""
+    mask = (1 << BAND_BITS) - 1
+    return [
+        f"{band}:{(value >> (band * BAND_BITS)) & mask:04x}"
+        for band in range(HASH_BANDS)
+    ]
+
+
+class ImageFingerprint:
+    """Content hash, perceptual hash and pixel dimensions of one image"""
+
+    def __init__(self, sha256, phash, size=None):
+        self.sha256 = sha256
+        self.phash = phash
+        self.size = tuple(size) if size else None
+
+    @classmethod
+    def from_source(cls, source):
+        """Fingerprint a path, bytes or binary file object"""
+        with open_image(source) as img:
+            size = img.size
+            phash = _difference_hash(img)
+        return cls(content_hash(source), phash, size)
+
+    def near(self, phash, size, max_distance):
+        """True if another image's hash and aspect ratio make it a near duplicate"""
+        return (
+            self.same_aspect(size)
+            and hamming_distance(phash, self.phash) <= max_distance
+        )
+
+    def same_aspect(self, size):
+        """True if another image's width / height matches this one's within ASPECT_TOLERANCE"""
+        if not self.size or not size or 0 in self.size or 0 in size:
+            return False
+        ratio = self.size[0] / self.size[1]
+        other = size[0] / size[1]
+        return abs(ratio - other) <= ASPECT_TOLERANCE * max(ratio, other)
+
+
+class ImageCache:
+    """Two-tier (memory LRU + Mongo) cache of ImageService results"""
+
+    def __init__(self, db=None, capacity=None, max_distance=None):
+        """
+        Args:
+            db: MongoDBClient (memory-only when None or disconnected)
+            capacity: Entries kept in memory
+            max_distance: Largest dHash distance treated as the same photo
+                          (captions and tags only)
+        """
+        self.db = db
+        self.capacity = int(capacity or os.getenv('IMAGE_CACHE_SIZE', 512))
+        self.max_distance = int(max_distance if max_distance is not None else os.getenv('IMAGE_CACHE_MAX_DISTANCE', 3))
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._indexed = False
+
+    def _db_enabled(self):
+        return self.db is not None and self.db.db is not None
+
+    def _ensure_indexes(self):
+        if self._indexed or not self._db_enabled():
+            return
+        self.db.create_index(COLLECTION, [('sha256', ASCENDING), ('operation', ASCENDING), ('variant', ASCENDING)])
+        self.db.create_index(COLLECTION, [('operation', ASCENDING), ('variant', ASCENDING), ('bands', ASCENDING)])
+        self._indexed = True
+
+    def get(self, fingerprint, operation, variant=''):
+        """
+        Look up a cached result
+
+        Args:
+            fingerprint: ImageFingerprint of the image
+            operation: 'caption', 'ocr', 'tags' or 'analyze'
+            variant: Anything else the result depends on (context, model)
+
+        Returns:
+            dict or None: Cached result (a copy)
+        """
+        result = self._get_memory(fingerprint, operation, variant)
+        if result is None and self._db_enabled():
+            result = self._get_db(fingerprint, operation, variant)
+            if result is not None:
+                self._put_memory(fingerprint, operation, variant, result)
+
+        record_cache('image_analysis', result is not None)
+        return dict(result) if result is not None else None
+
+    def put(self, fingerprint, operation, variant, result):
+        """Store a successful result in both tiers"""
+        if not result or not result.get('success'):
+            return
+        self._put_memory(fingerprint, operation, variant, result)
+
+        if self._db_enabled():
+            try:
+                self._ensure_indexes()
+                self.db.get_collection(COLLECTION).update_one(
+                    {'_id': f"{fingerprint.sha256}:{operation}:{_variant_key(variant)}"},
+                    {'$set': {
+                        'sha256': fingerprint.sha256,
+                        'phash': f"{fingerprint.phash:016x}",
+                        'bands': hash_bands(fingerprint.phash),
+                        'size': list(fingerprint.size) if fingerprint.size else None,
+                        'operation': operation,
+                        'variant': _variant_key(variant),
+                        'result': result,
+                        'updated_at': datetime.utcnow()
+                    }},
+                    upsert=True
+                )
+            except Exception as e:
+                print(f"⚠️  Image cache write failed: {e}")
+
+    def _get_memory(self, fingerprint, operation, variant):
+        key = (fingerprint.sha256, operation, variant)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry[2]
+
+            if operation not in NEAR_DUPLICATE_OPERATIONS:
+                return None
+
+            # Near-duplicate scan over the (small, bounded) memory tier
+            for (_, entry_operation, entry_variant), (phash, size, result) in reversed(self._memory.items()):
+                if (entry_operation == operation and entry_variant == variant
+                        and fingerprint.near(phash, size, self.max_distance)):
+                    return result
+        return None
+
+    def _put_memory(self, fingerprint, operation, variant, result):
+        key = (fingerprint.sha256, operation, variant)
+        with self._lock:
+            self._memory[key] = (fingerprint.phash, fingerprint.size, dict(result))
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.capacity:
+                self._memory.popitem(last=False)
+
+    def _get_db(self, fingerprint, operation, variant):
+        try:
+            collection = self.db.get_collection(COLLECTION)
+            variant_key = _variant_key(variant)
+            document = collection.find_one({'sha256': fingerprint.sha256, 'operation': operation, 'variant': variant_key})
+            if document:
+                return document['result']
+            if operation not in NEAR_DUPLICATE_OPERATIONS or fingerprint.size is None:
+                return None
+
+            candidates = collection.find(
+                {
+                    'operation': operation,
+                    'variant': variant_key,
+                    'bands': {'$in': hash_bands(fingerprint.phash)}
+                },
+                {'phash': 1, 'size': 1, 'result': 1}
+            ).limit(50)
+            best = None
+            for candidate in candidates:
+                phash = int(candidate['phash'], 16)
+                if not fingerprint.near(phash, candidate.get('size'), self.max_distance):
+                    continue
+                distance = hamming_distance(phash, fingerprint.phash)
+                if best is None or distance < best[0]:
+                    best = (distance, candidate['result'])
+            return best[1] if best else None
+        except Exception as e:
+            print(f"⚠️  Image cache lookup failed: {e}")
+            return None
+
+
+def _variant_key(variant):
+    """Short stable key for a variant string"""
+    return hashlib.sha1((variant or '').encode('utf-8')).hexdigest()[:16]
@@ -0,0 +1,133 @@
+"""
+Image Derivative Store
+Print-resolution copies of uploaded photos for embedding in DOCX reports
+
+A 6" wide picture needs about 1200px for 200 DPI, so embedding the original
+12-48MP photo only bloats the document. Derivatives are made once per image
+content (SHA-256) and reused by every report that includes the same photo.
+"""
+import hashlib
+import os
+import threading
+import time
+from services import executors
+from services.image_preprocess import preprocess_in_pool
+
+
+class DerivativeStore:
+    """Content-addressed cache of downscaled JPEGs"""
+
+    def __init__(self, root=None, max_side=None, quality=None):
+        """
+        Args:
+            root: Directory for derivatives (defaults to outputs/derivatives)
+            max_side: Longest side in pixels (default 1200 = 200 DPI at 6")
+            quality: JPEG quality
+        """
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.root = root or os.path.join(backend_dir, 'outputs', 'derivatives')
+        self.max_side = int(max_side or os.getenv('DOCX_IMAGE_MAX_SIDE', 1200))
+        self.quality = int(quality or os.getenv('DOCX_IMAGE_QUALITY', 82))
+        os.makedirs(self.root, exist_ok=True)
+
+        # (path, size, mtime) -> sha256, so unchanged files are not re-hashed
+        self._digests = {}
+        self._lock = threading.Lock()
+
+    def get(self, image_path):
+        """
+        Path of the derivative for an image, creating it if needed
+
+        Args:
+            image_path: Path to the original image
+
+        Returns:
+            str: Derivative path, or the original path if no derivative could
+                 be made (e.g., the file is not a decodable image)
+        """
+        try:
+            digest = self._digest(image_path)
+            stem = os.path.join(self.root, digest[:2], f"{digest}_{self.max_side}q{self.quality}")
+            target = f"{stem}.jpg"
+            if os.path.exists(target):
+                # Touch so cleanup() keeps derivatives that are still in use
+                os.utime(target)
+                return target
+            # Marker left when the original turned out to be the smaller copy
+            original_marker = f"{stem}.original"
+            if os.path.exists(original_marker):
+                os.utime(original_marker)
+                return image_path
+
+            if os.path.getsize(image_path) == 0:
+                return image_path
+
+            prepared = preprocess_in_pool(
+                image_path,
+                max_side=self.max_side,
+                quality=self.quality,
+                output_format='jpeg',
+                resample='bicubic',
+                exif_transpose=True
+            )
+            if len(prepared['data']) >= os.path.getsize(image_path):
+                # Already small - the original is the better copy; remember
+                # that so the next report does not decode it again
+                os.makedirs(os.path.dirname(original_marker), exist_ok=True)
+                open(original_marker, 'wb').close()
+                return image_path
+
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            temp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(prepared['data'])
+            # Atomic, so a concurrent request never embeds a half-written file
+            os.replace(temp_path, target)
+            return target
+
+        except Exception as e:
+            print(f"Could not create derivative for {image_path}: {e}")
+            return image_path
+
+    def get_many(self, image_paths):
+        """
+        Derivatives for several images, created concurrently
+
+        Returns:
+            list: Paths in the same order as image_paths
+        """
+        if len(image_paths) <= 1:
+            return [self.get(path) for path in image_paths]
+        pool = executors.get_thread_pool('derivatives', executors.available_cpus() * 2)
+        outcomes = executors.map_ordered(pool, self.get, list(image_paths))
+        return [result if error is None else path for path, (result, error) in zip(image_paths, outcomes)]
+
+    def cleanup(self, days=30):
+        """Delete derivatives and markers that were not used for the given number of days"""
+        cutoff = time.time() - days * 86400
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                filepath = os.path.join(directory, filename)
+                try:
+                    if os.path.getmtime(filepath) < cutoff:
+                        os.remove(filepath)
+                except OSError:
+                    pass
+
+    def _digest(self, image_path):
+        """SHA-256 of the file, memoized by path, size and mtime"""
+        stat = os.stat(image_path)
+        key = (os.path.abspath(image_path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._digests.get(key)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(image_path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    sha.update(block)
+            digest = sha.hexdigest()
+            with self._lock:
+                if len(self._digests) > 10000:
+                    self._digests.clear()
+                self._digests[key] = digest
+        return digest
@@ -0,0 +1,95 @@
+"""
+Image sources
+Lets the image services work on a file path, raw bytes or an in-memory
+upload buffer interchangeably, so uploads never have to touch the disk
+"""
+import io
+import os
+import shutil
+import tempfile
+from PIL import Image
+
+
+def open_image(source):
+    """
+    Open an image with PIL
+
+    Args:
+        source: File path, bytes, or a seekable binary file object
+
+    Returns:
+        PIL.Image.Image (use as a context manager)
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return Image.open(io.BytesIO(source))
+    if hasattr(source, 'read'):
+        source.seek(0)
+    return Image.open(source)
+
+
+def iter_blocks(source, block_size=1024 * 1024):
+    """
+    Yield the raw bytes of an image source in blocks
+
+    Args:
+        source: File path, bytes, or a seekable binary file object
+        block_size: Bytes per block
+
+    Returns:
+        generator of bytes
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield bytes(source)
+        return
+    if hasattr(source, 'read'):
+        source.seek(0)
+        for block in iter(lambda: source.read(block_size), b''):
+            yield block
+        source.seek(0)
+        return
+    with open(source, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            yield block
+
+
+def source_name(source, default='image'):
+    """Display name of an image source (file name for paths and named uploads)"""
+    if isinstance(source, str):
+        return os.path.basename(source)
+    name = getattr(source, 'filename', None) or getattr(source, 'name', None)
+    return os.path.basename(name) if isinstance(name, str) else default
+
+
+class SpooledUpload(tempfile.SpooledTemporaryFile):
+    """
+    In-memory copy of an uploaded image
+
+    Stays in RAM up to max_size bytes and spills to an anonymous,
+    uniquely named temporary file above that, so concurrent uploads with the
+    same name can never collide.
+    """
+
+    def __init__(self, filename, max_size, dir=None):
+        super().__init__(max_size=max_size, mode='w+b', prefix='campusops_img_', dir=dir)
+        self.filename = filename
+
+
+def spool_upload(file_storage, filename, max_size, dir=None):
+    """
+    Copy a werkzeug FileStorage into a SpooledUpload
+
+    The copy outlives the request stream, so it can be handed to worker threads.
+
+    Args:
+        file_storage: Uploaded file
+        filename: Display name to attach (e.g., the secured upload name)
+        max_size: Bytes kept in memory before spilling to a temp file
+        dir: Directory for spilled files (system temp dir by default)
+
+    Returns:
+        SpooledUpload positioned at the start
+    """
+    upload = SpooledUpload(filename, max_size, dir=dir)
+    shutil.copyfileobj(file_storage.stream, upload, 1024 * 1024)
+    upload.seek(0)
+    return upload
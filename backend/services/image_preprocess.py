@@ -0,0 +1,299 @@
+"""
+Image Preprocessing
+Shrinks photos to what the vision model needs before they are uploaded
+
+Phone photos (12-48MP) are decoded straight to near-target size: JPEGs use
+libjpeg's DCT scaling (draft mode), other formats use Image.reduce, and only
+the last small step is done with a real resampling filter. Each stage is
+timed so the savings can be checked in /api/admin/llm-stats.
+
+preprocess_in_pool (and run_in_pool for other CPU-bound image work) runs in
+a process pool so concurrent uploads use every core instead of contending
+for the GIL; image bytes reach the worker through shared memory rather than
+being pickled down a pipe.
+"""
+import io
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import resource_tracker, shared_memory
+from PIL import Image, ImageOps
+from services import executors
+from services.image_io import iter_blocks, open_image
+
+
+# Size budget per vision model. Groq accepts base64 images up to 4MB per
+# request, so encoded bytes stay under 3MB (base64 adds a third).
+DEFAULT_BUDGET = {'max_side': 1024, 'quality': 85, 'max_bytes': 3 * 1024 * 1024}
+
+VISION_BUDGETS = {
+    'meta-llama/llama-4-scout-17b-16e-instruct': {'max_side': 1024, 'quality': 85, 'max_bytes': 3 * 1024 * 1024},
+    'meta-llama/llama-4-maverick-17b-128e-instruct': {'max_side': 1024, 'quality': 85, 'max_bytes': 3 * 1024 * 1024},
+}
+
+RESAMPLE_FILTERS = {
+    'nearest': Image.Resampling.NEAREST,
+    'bilinear': Image.Resampling.BILINEAR,
+    'bicubic': Image.Resampling.BICUBIC,
+    'lanczos': Image.Resampling.LANCZOS,
+}
+
+OUTPUT_FORMATS = {
+    'jpeg': ('JPEG', 'image/jpeg'),
+    'webp': ('WEBP', 'image/webp'),
+}
+
+# Lowest quality tried when an image has to be squeezed under max_bytes
+MIN_QUALITY = 50
+
+# Inputs smaller than this are cheaper to process inline than to hand off
+INLINE_MAX_BYTES = 256 * 1024
+
+PROCESS_POOL = 'cpu'
+
+
+def budget_for_model(model):
+    """
+    Preprocessing settings for a vision model
+
+    Environment overrides (IMAGE_MAX_SIDE, IMAGE_QUALITY, IMAGE_FORMAT,
+    IMAGE_RESAMPLE) apply on top of the per-model budget.
+
+    Returns:
+        dict: max_side, quality, max_bytes, output_format, resample
+    """
+    budget = dict(VISION_BUDGETS.get(model, DEFAULT_BUDGET))
+    budget['max_side'] = int(os.getenv('IMAGE_MAX_SIDE', budget['max_side']))
+    budget['quality'] = int(os.getenv('IMAGE_QUALITY', budget['quality']))
+    budget['output_format'] = os.getenv('IMAGE_FORMAT', 'jpeg').lower()
+    budget['resample'] = os.getenv('IMAGE_RESAMPLE', 'bilinear').lower()
+    return budget
+
+
+def preprocess_image(source, max_side=1024, quality=85, output_format='jpeg', resample='bilinear', max_bytes=None,
+                     exif_transpose=False):
+    """
+    Decode, shrink and re-encode an image for a vision model
+
+    Args:
+        source: File path, bytes, or a binary file object
+        max_side: Longest side of the output in pixels
+        quality: Encoder quality (1-100)
+        output_format: 'jpeg' or 'webp'
+        resample: Final resize filter ('bilinear', 'bicubic', 'lanczos', 'nearest')
+        max_bytes: Re-encode at lower quality until the output fits (None = no limit)
+        exif_transpose: Apply the EXIF orientation (for output shown to people)
+
+    Returns:
+        dict: data (bytes), mime, width, height, original_size (w, h), quality
+              and timings ({'decode', 'resize', 'encode'} in seconds)
+    """
+    pil_format, mime = OUTPUT_FORMATS.get(output_format, OUTPUT_FORMATS['jpeg'])
+    timings = {}
+
+    started = time.perf_counter()
+    with open_image(source) as img:
+        original_size = img.size
+        # JPEG: let the decoder scale by 1/2, 1/4 or 1/8 while decoding.
+        # draft() never goes below the requested size.
+        if img.format == 'JPEG':
+            img.draft('RGB', _target_size(img.size, max_side))
+        img.load()
+        timings['decode'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        if exif_transpose:
+            img = ImageOps.exif_transpose(img)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+
+        if max(img.size) > max_side:
+            # Integer box reduction first (cheap), then one small filtered resize
+            factor = max(img.size) // (2 * max_side)
+            if factor >= 2:
+                img = img.reduce(factor)
+            img = img.resize(_target_size(img.size, max_side), RESAMPLE_FILTERS.get(resample, Image.Resampling.BILINEAR))
+        timings['resize'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        data = _encode(img, pil_format, quality)
+        while max_bytes and len(data) > max_bytes and quality > MIN_QUALITY:
+            quality = max(MIN_QUALITY, quality - 10)
+            data = _encode(img, pil_format, quality)
+        timings['encode'] = time.perf_counter() - started
+
+        return {
+            'data': data,
+            'mime': mime,
+            'width': img.width,
+            'height': img.height,
+            'original_size': original_size,
+            'quality': quality,
+            'timings': timings
+        }
+
+
+def _target_size(size, max_side):
+    """Size that fits inside max_side x max_side, keeping the aspect ratio"""
+    width, height = size
+    scale = min(1.0, max_side / float(max(width, height)))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _encode(img, pil_format, quality):
+    """Encode an RGB image to bytes"""
+    buffer = io.BytesIO()
+    if pil_format == 'WEBP':
+        # method 4 is the speed/size sweet spot of libwebp (0 fastest, 6 smallest)
+        img.save(buffer, format='WEBP', quality=quality, method=4)
+    else:
+        img.save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+def process_pool_enabled():
+    """True unless IMAGE_PROCESS_POOL=false"""
+    return os.getenv('IMAGE_PROCESS_POOL', 'true').lower() == 'true'
+
+
+def preprocess_in_pool(source, **options):
+    """
+    Run preprocess_image in the CPU process pool
+
+    Args:
+        source: File path, bytes, or a binary file object
+        **options: preprocess_image keyword arguments
+
+    Returns:
+        dict: Same as preprocess_image, with a 'handoff' timing added
+    """
+    started = time.perf_counter()
+    result = run_in_pool(preprocess_image, source, **options)
+    elapsed = time.perf_counter() - started
+    result['timings']['handoff'] = max(0.0, elapsed - sum(result['timings'].values()))
+    return result
+
+
+def run_in_pool(fn, source, inline_below=INLINE_MAX_BYTES, **options):
+    """
+    Run fn(source, **options) in the CPU process pool
+
+    Paths are passed as-is; bytes and file objects are copied once into a
+    shared memory block the worker reads in place. Small images, a disabled
+    pool, or a pool failure fall back to running inline.
+
+    Args:
+        fn: Module-level function taking an image source (must be picklable)
+        source: File path, bytes, or a binary file object
+        inline_below: Sources smaller than this many bytes run inline
+        **options: Keyword arguments for fn
+
+    Returns:
+        fn's return value
+    """
+    if not process_pool_enabled() or _source_size(source) < inline_below:
+        return fn(source, **options)
+
+    block = None
+    try:
+        try:
+            if isinstance(source, str):
+                job = (fn, source)
+            else:
+                block = _to_shared_memory(source)
+                job = (_run_shared, fn, block.name, _source_size(source))
+            pool = executors.get_process_pool(PROCESS_POOL, os.getenv('IMAGE_PROCESS_WORKERS') or None)
+            future = pool.submit(*job, **options)
+        except (OSError, RuntimeError) as e:
+            # No shared memory / cannot start workers - still serve the request
+            print(f"⚠️  Image process pool unavailable ({e}), processing inline")
+            return fn(source, **options)
+
+        try:
+            return future.result()
+        except BrokenProcessPool as e:
+            print(f"⚠️  Image process pool failed ({e}), processing inline")
+            executors.reset_process_pool(PROCESS_POOL)
+            return fn(source, **options)
+    finally:
+        if block is not None:
+            block.close()
+            block.unlink()
+
+
+def _source_size(source):
+    """Size in bytes of a path, bytes or seekable file object"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return len(source)
+    if isinstance(source, str):
+        return os.path.getsize(source)
+    size = source.seek(0, io.SEEK_END)
+    source.seek(0)
+    return size
+
+
+def _to_shared_memory(source):
+    """Copy bytes or a file object into a new shared memory block"""
+    size = _source_size(source)
+    block = shared_memory.SharedMemory(create=True, size=size)
+    position = 0
+    for chunk in iter_blocks(source):
+        block.buf[position:position + len(chunk)] = chunk
+        position += len(chunk)
+    return block
+
+
+def _run_shared(fn, name, size, **options):
+    """Process-pool entry point: run fn on an image held in shared memory"""
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        # The parent owns (and unlinks) the block; don't let this process's
+        # resource tracker claim it as well
+        resource_tracker.unregister(block._name, 'shared_memory')
+    except Exception:
+        pass
+    reader = _MemoryReader(block.buf[:size])
+    try:
+        return fn(reader, **options)
+    finally:
+        reader.close()
+        block.close()
+
+
+class _MemoryReader(io.RawIOBase):
+    """Read-only file object over a memoryview (no copy of the whole buffer)"""
+
+    def __init__(self, view):
+        self._view = view
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = min(len(buffer), len(self._view) - self._position)
+        buffer[:count] = self._view[self._position:self._position + count]
+        self._position += count
+        return count
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self._position = offset
+        elif whence == io.SEEK_CUR:
+            self._position += offset
+        else:
+            self._position = len(self._view) + offset
+        self._position = max(0, min(self._position, len(self._view)))
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    def close(self):
+        # Release the view so the shared memory block can be closed
+        if not self.closed:
+            self._view.release()
+        super().close()
@@ -1,97 +1,118 @@
 """
 Image Service - AI-powered image captioning and OCR
-Uses Groq vision models and Tesseract OCR
+Uses Groq vision models and Tesseract OCR (local first, when installed)
 """
 
 import os
 import base64
-from groq import Groq
-from PIL import Image
-import io
+import json
+from services import executors, local_ocr
+from services.groq_client import create_groq_client, use_fake_backend
+from services.image_cache import ImageFingerprint
+from services.image_io import source_name
+from services.image_preprocess import budget_for_model, preprocess_in_pool
+from services.metrics import track_llm_call, record_image_stages
 
 
 class ImageService:
     """Service for image captioning and OCR using Groq AI"""
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, cache=None):
         """
         Initialize Image Service with Groq API
         
         Args:
             api_key: Groq API key (defaults to environment variable)
+            cache: Optional ImageCache for caption / OCR / tag results
         """
+        self.cache = cache
         self.api_key = api_key or os.getenv('GROQ_API_KEY')
-        if not self.api_key:
+        if not self.api_key and not use_fake_backend():
             raise ValueError("GROQ_API_KEY not found in environment variables")
         
-        self.client = Groq(api_key=self.api_key)
+        self.client = create_groq_client(api_key=self.api_key)
         # Using Llama 4 Scout (17B parameter multimodal model)
         # This is the current active vision model on Groq as of Feb 2026 (replaced Llama 3.2 vision models)
         self.vision_model = os.getenv('GROQ_VISION_MODEL', 'meta-llama/llama-4-scout-17b-16e-instruct')
         self.text_model = os.getenv('GROQ_MODEL', 'llama-3.3-70b-versatile')
+        # Upper bound for one vision API call, so a stuck request cannot hold a worker
+        self.request_timeout = float(os.getenv('IMAGE_REQUEST_TIMEOUT', 60))
     
     def encode_image_to_base64(self, image_path):
         """
-        Convert image file to base64 encoding
+        Convert image to a base64 data URL sized for the vision model
         
         Args:
-            image_path: Path to image file
+            image_path: Path to image file, image bytes, or a binary file object
             
         Returns:
             str: Base64 encoded image data URL
         """
         try:
-            with Image.open(image_path) as img:
-                # Convert to RGB if necessary
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                
-                # Resize if image is too large (max 1024x1024 for efficiency)
-                max_size = 1024
-                if img.width > max_size or img.height > max_size:
-                    img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-                
-                # Convert to bytes
-                buffer = io.BytesIO()
-                img.save(buffer, format='JPEG', quality=85)
-                img_bytes = buffer.getvalue()
-                
-                # Encode to base64
-                img_base64 = base64.b64encode(img_bytes).decode('utf-8')
-                return f"data:image/jpeg;base64,{img_base64}"
+            budget = budget_for_model(self.vision_model)
+            prepared = preprocess_in_pool(
+                image_path,
+                max_side=budget['max_side'],
+                quality=budget['quality'],
+                output_format=budget['output_format'],
+                resample=budget['resample'],
+                max_bytes=budget['max_bytes']
+            )
+            record_image_stages(prepared['timings'])
+            
+            # Encode to base64
+            img_base64 = base64.b64encode(prepared['data']).decode('utf-8')
+            return f"data:{prepared['mime']};base64,{img_base64}"
                 
         except Exception as e:
             raise ValueError(f"Failed to encode image: {str(e)}")
     
-    def generate_caption(self, image_path, context="event photo"):
+    def _cached(self, operation, variant, image_path, compute):
         """
-        Generate descriptive caption for an image
+        Serve a result from the image cache, or compute and store it
         
         Args:
-            image_path: Path to image file
-            context: Context about the image (e.g., "Annual tech fest", "Guest lecture", "Sports day")
+            operation: Cache operation name (caption, ocr, tags, analyze)
+            variant: Other inputs the result depends on (e.g., context)
+            image_path: Path to image file, image bytes, or a binary file object
+            compute: Callable producing the result on a miss
             
         Returns:
-            dict: Caption result with text and metadata
+            dict: Result (with 'cached': True when served from cache)
         """
+        if self.cache is None:
+            return compute()
         try:
-            # Encode image
-            image_data = self.encode_image_to_base64(image_path)
-            
-            # Create vision prompt - concise and context-aware
-            if context and context.strip() and context != "event photo":
-                prompt = f"""Context: {context}
-
-Analyze this image and provide a concise 2-3 sentence caption describing the key elements relevant to this context. Focus on main subjects, their activities, and important details."""
-            else:
-                prompt = """Analyze this image and provide a concise 2-3 sentence caption describing:
-- Main subjects and their activities
-- Key setting or environment
-- Purpose or significance of the scene
-
-Be specific and factual."""
+            fingerprint = ImageFingerprint.from_source(image_path)
+        except Exception:
+            # Unreadable image - let the real call report the error
+            return compute()
+        
+        variant = f"{self.vision_model}|{variant or ''}"
+        result = self.cache.get(fingerprint, operation, variant)
+        if result is not None:
+            result.update({'image': source_name(image_path), 'cached': True})
+            return result
+        
+        result = compute()
+        self.cache.put(fingerprint, operation, variant, result)
+        return result
+    
+    def _vision_request(self, image_data, prompt, operation, max_tokens, temperature):
+        """
+        Send one image + text prompt to the vision model
+        
+        Args:
+            image_data: Base64 image data URL
+            prompt: Text instruction for the model
+            operation: Operation name used for metrics (caption, ocr, tags)
+            max_tokens: Maximum tokens in response
+            temperature: Sampling temperature
             
-            # Call Groq vision API
+        Returns:
+            Chat completion response
+        """
+        with track_llm_call(operation, self.vision_model) as call:
             response = self.client.chat.completions.create(
                 model=self.vision_model,
                 messages=[
@@ -111,9 +132,49 @@ Be specific and factual."""
                         ]
                     }
                 ],
-                max_tokens=500,
-                temperature=0.7
+                max_tokens=max_tokens,
+                temperature=temperature,
+                timeout=self.request_timeout
             )
+            call.response = response
+        return response
+    
+    def generate_caption(self, image_path, context="event photo", image_data=None):
+        """
+        Generate descriptive caption for an image
+        
+        Args:
+            image_path: Path to image file, image bytes, or a binary file object
+            context: Context about the image (e.g., "Annual tech fest", "Guest lecture", "Sports day")
+            image_data: Pre-encoded image data URL (skips re-encoding)
+            
+        Returns:
+            dict: Caption result with text and metadata
+        """
+        return self._cached('caption', context, image_path, lambda: self._generate_caption(image_path, context, image_data))
+    
+    def _generate_caption(self, image_path, context="event photo", image_data=None):
+        """Uncached implementation of generate_caption"""
+        try:
+            # Encode image (unless the caller already did)
+            if image_data is None:
+                image_data = self.encode_image_to_base64(image_path)
+            
+            # Create vision prompt - concise and context-aware
+            if context and context.strip() and context != "event photo":
+                prompt = f"""Context: {context}
+
+Analyze this image and provide a concise 2-3 sentence caption describing the key elements relevant to this context. Focus on main subjects, their activities, and important details."""
+            else:
+                prompt = """Analyze this image and provide a concise 2-3 sentence caption describing:
+- Main subjects and their activities
+- Key setting or environment
+- Purpose or significance of the scene
+
+Be specific and factual."""
+            
+            # Call Groq vision API
+            response = self._vision_request(image_data, prompt, 'caption', max_tokens=500, temperature=0.7)
             
             caption = response.choices[0].message.content
             
@@ -121,29 +182,48 @@ Be specific and factual."""
                 'success': True,
                 'caption': caption,
                 'model': self.vision_model,
-                'image': os.path.basename(image_path)
+                'image': source_name(image_path)
             }
             
         except Exception as e:
             return {
                 'success': False,
                 'error': f"Caption generation failed: {str(e)}",
-                'image': os.path.basename(image_path) if image_path else 'unknown'
+                'image': source_name(image_path, 'unknown') if image_path is not None else 'unknown'
             }
     
-    def extract_text_ocr(self, image_path):
+    def extract_text_ocr(self, image_path, image_data=None, layout=False):
         """
-        Extract text from image using vision model
+        Extract text from image
+        
+        Tesseract runs first (when installed); the vision model is only
+        called when its confidence is below LOCAL_OCR_MIN_CONFIDENCE, it
+        finds no text, or layout understanding is requested.
         
         Args:
-            image_path: Path to image file
+            image_path: Path to image file, image bytes, or a binary file object
+            image_data: Pre-encoded image data URL (skips re-encoding)
+            layout: Skip local OCR and let the vision model read the layout
             
         Returns:
             dict: OCR result with extracted text and metadata
         """
+        return self._cached(
+            'ocr', 'layout' if layout else '', image_path,
+            lambda: self._extract_text_ocr(image_path, image_data, layout)
+        )
+    
+    def _extract_text_ocr(self, image_path, image_data=None, layout=False):
+        """Uncached implementation of extract_text_ocr"""
+        if not layout and local_ocr.is_available():
+            local_result = self._extract_text_local(image_path)
+            if local_result is not None:
+                return local_result
+        
         try:
-            # Encode image
-            image_data = self.encode_image_to_base64(image_path)
+            # Encode image (unless the caller already did)
+            if image_data is None:
+                image_data = self.encode_image_to_base64(image_path)
             
             # Create OCR prompt
             prompt = """Extract ALL text visible in this image.
@@ -158,28 +238,7 @@ Instructions:
 Provide only the extracted text without additional commentary."""
             
             # Call Groq vision API
-            response = self.client.chat.completions.create(
-                model=self.vision_model,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": image_data
-                                }
-                            },
-                            {
-                                "type": "text",
-                                "text": prompt
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=800,
-                temperature=0.3  # Lower temperature for accuracy
-            )
+            response = self._vision_request(image_data, prompt, 'ocr', max_tokens=800, temperature=0.3)  # Lower temperature for accuracy
             
             extracted_text = response.choices[0].message.content
             
@@ -188,29 +247,62 @@ Provide only the extracted text without additional commentary."""
                 'text': extracted_text,
                 'has_text': extracted_text.lower() != "no text detected",
                 'model': self.vision_model,
-                'image': os.path.basename(image_path)
+                'engine': 'vision',
+                'image': source_name(image_path)
             }
             
         except Exception as e:
             return {
                 'success': False,
                 'error': f"OCR failed: {str(e)}",
-                'image': os.path.basename(image_path) if image_path else 'unknown'
+                'image': source_name(image_path, 'unknown') if image_path is not None else 'unknown'
             }
     
-    def generate_image_tags(self, image_path):
+    def _extract_text_local(self, image_path):
+        """
+        Tesseract OCR on the process pool
+        
+        Returns:
+            dict or None: OCR result, or None when the vision model should be used
+        """
+        try:
+            recognized = local_ocr.recognize_in_pool(image_path)
+        except Exception as e:
+            print(f"⚠️  Local OCR failed, using vision model: {e}")
+            return None
+        
+        if not recognized['words'] or recognized['confidence'] < local_ocr.min_confidence():
+            return None
+        
+        return {
+            'success': True,
+            'text': recognized['text'],
+            'has_text': True,
+            'model': 'tesseract',
+            'engine': 'local',
+            'confidence': recognized['confidence'],
+            'image': source_name(image_path)
+        }
+    
+    def generate_image_tags(self, image_path, image_data=None):
         """
         Generate relevant tags/keywords for an image
         
         Args:
-            image_path: Path to image file
+            image_path: Path to image file, image bytes, or a binary file object
+            image_data: Pre-encoded image data URL (skips re-encoding)
             
         Returns:
             dict: Tags result with list of keywords
         """
+        return self._cached('tags', '', image_path, lambda: self._generate_image_tags(image_path, image_data))
+    
+    def _generate_image_tags(self, image_path, image_data=None):
+        """Uncached implementation of generate_image_tags"""
         try:
-            # Encode image
-            image_data = self.encode_image_to_base64(image_path)
+            # Encode image (unless the caller already did)
+            if image_data is None:
+                image_data = self.encode_image_to_base64(image_path)
             
             # Create tagging prompt
             prompt = """Analyze this image and provide relevant tags/keywords.
@@ -226,28 +318,7 @@ Include tags for:
 Format: Return only a comma-separated list of tags."""
             
             # Call Groq vision API
-            response = self.client.chat.completions.create(
-                model=self.vision_model,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": image_data
-                                }
-                            },
-                            {
-                                "type": "text",
-                                "text": prompt
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=200,
-                temperature=0.5
-            )
+            response = self._vision_request(image_data, prompt, 'tags', max_tokens=200, temperature=0.5)
             
             tags_text = response.choices[0].message.content
             tags = [tag.strip() for tag in tags_text.split(',')]
@@ -256,45 +327,130 @@ Format: Return only a comma-separated list of tags."""
                 'success': True,
                 'tags': tags,
                 'model': self.vision_model,
-                'image': os.path.basename(image_path)
+                'image': source_name(image_path)
             }
             
         except Exception as e:
             return {
                 'success': False,
                 'error': f"Tag generation failed: {str(e)}",
-                'image': os.path.basename(image_path) if image_path else 'unknown'
+                'image': source_name(image_path, 'unknown') if image_path is not None else 'unknown'
             }
     
-    def analyze_image_comprehensive(self, image_path, context="event photo"):
+    def analyze_image_comprehensive(self, image_path, context="event photo", mode=None):
         """
         Comprehensive image analysis: caption, OCR, and tags
         
+        The image is encoded once. In 'combined' mode (default) a single
+        vision call returns all three as JSON; 'parallel' mode sends the three
+        separate prompts at the same time. Combined mode falls back to
+        parallel if the model's answer is not usable JSON.
+        
         Args:
-            image_path: Path to image file
+            image_path: Path to image file, image bytes, or a binary file object
             context: Context about the image
+            mode: 'combined' or 'parallel' (defaults to IMAGE_ANALYSIS_MODE)
             
         Returns:
             dict: Complete analysis with caption, text, and tags
         """
+        return self._cached(
+            'analyze', context, image_path,
+            lambda: self._analyze_image_comprehensive(image_path, context, mode)
+        )
+    
+    def _analyze_image_comprehensive(self, image_path, context="event photo", mode=None):
+        """Uncached implementation of analyze_image_comprehensive"""
+        mode = mode or os.getenv('IMAGE_ANALYSIS_MODE', 'combined')
         try:
-            caption_result = self.generate_caption(image_path, context)
-            ocr_result = self.extract_text_ocr(image_path)
-            tags_result = self.generate_image_tags(image_path)
+            image_data = self.encode_image_to_base64(image_path)
             
-            return {
+            result = None
+            if mode == 'combined':
+                result = self._analyze_combined(image_data, context)
+            if result is None:
+                result = self._analyze_parallel(image_path, image_data, context)
+            
+            result.update({
                 'success': True,
-                'image': os.path.basename(image_path),
-                'caption': caption_result.get('caption', ''),
-                'extracted_text': ocr_result.get('text', ''),
-                'has_text': ocr_result.get('has_text', False),
-                'tags': tags_result.get('tags', []),
+                'image': source_name(image_path),
                 'model': self.vision_model
-            }
+            })
+            return result
             
         except Exception as e:
             return {
                 'success': False,
                 'error': f"Comprehensive analysis failed: {str(e)}",
-                'image': os.path.basename(image_path) if image_path else 'unknown'
+                'image': source_name(image_path, 'unknown') if image_path is not None else 'unknown'
             }
+    
+    def _analyze_combined(self, image_data, context):
+        """
+        Caption, OCR text and tags from one vision call
+        
+        Returns:
+            dict or None: Analysis fields, or None if the response was not valid JSON
+        """
+        context_line = f"Context: {context}\n\n" if context and context.strip() and context != "event photo" else ""
+        prompt = f"""{context_line}Analyze this image and respond with a single JSON object with exactly these keys:
+
+{{
+  "caption": "A concise 2-3 sentence caption describing the main subjects, their activities, the setting and its significance",
+  "text": "Every piece of visible text exactly as it appears, keeping line breaks, or \"No text detected\"",
+  "tags": ["5-10 descriptive tags: event type, activities, setting/venue, number of people, notable objects"]
+}}
+
+Be specific and factual. Respond with the JSON object only."""
+        
+        response = self._vision_request(image_data, prompt, 'analyze', max_tokens=1500, temperature=0.3)
+        data = _parse_json_response(response.choices[0].message.content)
+        if not isinstance(data, dict) or 'caption' not in data:
+            print("⚠️  Combined image analysis returned invalid JSON, falling back to separate prompts")
+            return None
+        
+        extracted_text = str(data.get('text') or 'No text detected').strip()
+        tags = data.get('tags') or []
+        if isinstance(tags, str):
+            tags = tags.split(',')
+        
+        return {
+            'caption': str(data.get('caption', '')).strip(),
+            'extracted_text': extracted_text,
+            'has_text': extracted_text.lower() != "no text detected",
+            'tags': [str(tag).strip() for tag in tags if str(tag).strip()]
+        }
+    
+    def _analyze_parallel(self, image_path, image_data, context):
+        """Send the caption, OCR and tag prompts concurrently and merge the results"""
+        pool = executors.get_thread_pool('vision', int(os.getenv('IMAGE_VISION_WORKERS', 12)))
+        caption_future = executors.submit(pool, self._generate_caption, image_path, context, image_data=image_data)
+        ocr_future = executors.submit(pool, self._extract_text_ocr, image_path, image_data=image_data)
+        tags_future = executors.submit(pool, self._generate_image_tags, image_path, image_data=image_data)
+        
+        caption_result = caption_future.result()
+        ocr_result = ocr_future.result()
+        tags_result = tags_future.result()
+        
+        return {
+            'caption': caption_result.get('caption', ''),
+            'extracted_text': ocr_result.get('text', ''),
+            'has_text': ocr_result.get('has_text', False),
+            'tags': tags_result.get('tags', [])
+        }
+
+
+def _parse_json_response(text):
+    """Parse a JSON object from a model response, with or without code fences"""
+    try:
+        if "```json" in text:
+            text = text.split("```json")[1].split("```")[0]
+        elif "```" in text:
+            text = text.split("```")[1].split("```")[0]
+        else:
+            start, end = text.find('{'), text.rfind('}')
+            if start != -1 and end > start:
+                text = text[start:end + 1]
+        return json.loads(text.strip())
+    except (json.JSONDecodeError, IndexError):
+        return None
@@ -0,0 +1,326 @@
+"""
+Batch Report Jobs
+Generates many event reports in the background and packages them as one ZIP
+
+Each event of a batch is a task on a shared worker pool. LLM calls and DOCX
+rendering are additionally gated by their own semaphores, so a large batch
+cannot flood the AI API or starve interactive requests of CPU. Finished
+documents are written to a per-job temporary directory and streamed into the
+ZIP on download; jobs and their files expire after BATCH_JOB_TTL seconds.
+"""
+import atexit
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from datetime import datetime
+from werkzeug.utils import secure_filename
+from services import executors
+from services.document_generator import get_document_generator
+
+
+class BatchJob:
+    """One batch of event reports"""
+
+    def __init__(self, items, document_type, template_analysis=None, images=None, output_format='docx'):
+        self.id = uuid.uuid4().hex
+        self.created_at = time.time()
+        self.document_type = document_type
+        self.output_format = output_format
+        self.template_analysis = template_analysis
+        self.directory = tempfile.mkdtemp(prefix=f'campusops_batch_{self.id[:8]}_')
+        self.image_paths = self._save_images(images or [])
+        self.items = [
+            {
+                'index': index,
+                'event_description': item['event_description'],
+                'document_type': item.get('document_type') or document_type,
+                'status': 'queued',
+                'filename': None,
+                'error': None
+            }
+            for index, item in enumerate(items)
+        ]
+        self._lock = threading.Lock()
+        self._removed = False
+
+    def _save_images(self, images):
+        """
+        Save uploaded photos into the job's own directory
+
+        Shared upload folders could be overwritten by a later upload with the
+        same file name while the job is still running.
+
+        Args:
+            images: Uploaded files (werkzeug FileStorage)
+
+        Returns:
+            list: Saved paths, named after the uploads
+        """
+        image_dir = os.path.join(self.directory, 'images')
+        os.makedirs(image_dir, exist_ok=True)
+        image_paths = []
+        for image in images:
+            if not image.filename:
+                continue
+            stem, extension = os.path.splitext(secure_filename(image.filename) or 'image')
+            filepath = os.path.join(image_dir, f"{stem}{extension}")
+            copy = 1
+            while os.path.exists(filepath):
+                copy += 1
+                filepath = os.path.join(image_dir, f"{stem}_{copy}{extension}")
+            image.save(filepath)
+            image_paths.append(filepath)
+        return image_paths
+
+    def update(self, index, **fields):
+        with self._lock:
+            self.items[index].update(fields)
+
+    def counts(self):
+        with self._lock:
+            counts = {'queued': 0, 'running': 0, 'done': 0, 'failed': 0}
+            for item in self.items:
+                counts[item['status']] += 1
+        return counts
+
+    @property
+    def finished(self):
+        counts = self.counts()
+        return counts['queued'] == 0 and counts['running'] == 0
+
+    def status(self):
+        """JSON-serializable job status"""
+        counts = self.counts()
+        with self._lock:
+            items = [
+                {key: item[key] for key in ('index', 'document_type', 'status', 'filename', 'error')}
+                for item in self.items
+            ]
+        return {
+            'job_id': self.id,
+            'output_format': self.output_format,
+            'state': 'complete' if counts['queued'] == counts['running'] == 0 else 'running',
+            'total': len(items),
+            'counts': counts,
+            'created_at': datetime.utcfromtimestamp(self.created_at).isoformat(),
+            'items': items
+        }
+
+    def iter_zip(self, chunk_size=1024 * 1024):
+        """
+        Stream a ZIP of the finished documents plus a manifest.json
+
+        The finished documents are opened before this returns, so an
+        expire() that deletes the job directory while the download is
+        still streaming cannot cut it short (open files outlive the unlink).
+        The archive is produced incrementally; only one chunk is held in
+        memory at a time.
+
+        Returns:
+            generator of bytes
+
+        Raises:
+            FileNotFoundError: The job's files were already removed
+        """
+        manifest = self.status()
+        sources = []
+        with self._lock:
+            if self._removed:
+                raise FileNotFoundError(f"Batch job {self.id} has expired")
+            try:
+                for item in manifest['items']:
+                    if item['status'] == 'done':
+                        sources.append((item['filename'], open(os.path.join(self.directory, item['filename']), 'rb')))
+            except OSError:
+                for _, source in sources:
+                    source.close()
+                raise
+        return self._stream_zip(sources, manifest, chunk_size)
+
+    @staticmethod
+    def _stream_zip(sources, manifest, chunk_size):
+        """Write the opened documents and the manifest into a streamed ZIP"""
+        stream = _ZipStream()
+        try:
+            with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+                for filename, source in sources:
+                    with archive.open(filename, 'w') as target:
+                        for block in iter(lambda: source.read(chunk_size), b''):
+                            target.write(block)
+                            if stream.pending:
+                                yield stream.drain()
+                archive.writestr('manifest.json', json.dumps(manifest, indent=2))
+            yield stream.drain()
+        finally:
+            for _, source in sources:
+                source.close()
+
+    def remove_files(self):
+        # Under the lock, so iter_zip either opens every file or sees the job as removed
+        with self._lock:
+            self._removed = True
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class JobQueue:
+    """In-process queue of batch report jobs"""
+
+    def __init__(self, workers=None, llm_concurrency=None, docx_concurrency=None, ttl=None):
+        """
+        Args:
+            workers: Events processed at once
+            llm_concurrency: LLM calls in flight at once
+            docx_concurrency: Document (DOCX or PDF) renders at once
+            ttl: Seconds a job (and its files) is kept after creation
+        """
+        self.workers = int(workers or os.getenv('BATCH_WORKERS', 4))
+        self.llm_slots = threading.BoundedSemaphore(int(llm_concurrency or os.getenv('BATCH_LLM_CONCURRENCY', 3)))
+        self.docx_slots = threading.BoundedSemaphore(
+            int(docx_concurrency or os.getenv('BATCH_DOCX_CONCURRENCY', executors.available_cpus()))
+        )
+        self.ttl = float(ttl or os.getenv('BATCH_JOB_TTL', 3600))
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, llm, db, items, document_type='report', template_analysis=None, images=None,
+               output_format='docx'):
+        """
+        Queue a batch
+
+        Args:
+            llm: LLMService
+            db: MongoDBClient (events are recorded when connected)
+            items: List of {'event_description', optional 'document_type'}
+            document_type: Default document type
+            template_analysis: Shared TemplateAnalyzer result
+            images: Uploaded photos shared by the photograph sections; saved
+                    into the job's directory before the job is queued
+            output_format: 'docx' or 'pdf'
+
+        Returns:
+            BatchJob
+        """
+        self.expire()
+        job = BatchJob(items, document_type, template_analysis, images, output_format)
+        with self._lock:
+            self._jobs[job.id] = job
+
+        pool = executors.get_thread_pool('batch', self.workers)
+        for index in range(len(job.items)):
+            executors.submit(pool, self._run_item, job, index, llm, db)
+        return job
+
+    def get(self, job_id):
+        # Status and download calls expire old jobs too, so files do not
+        # outlive the TTL when no new batch is submitted
+        self.expire()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def expire(self):
+        """Drop finished jobs older than the TTL and delete their files"""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = [job for job in self._jobs.values() if job.created_at < cutoff and job.finished]
+            for job in expired:
+                del self._jobs[job.id]
+        for job in expired:
+            job.remove_files()
+
+    def shutdown(self):
+        """Delete the files of every job (used on process exit)"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+            self._jobs.clear()
+        for job in jobs:
+            job.remove_files()
+
+    def _run_item(self, job, index, llm, db):
+        item = job.items[index]
+        job.update(index, status='running')
+        try:
+            with self.llm_slots:
+                result = llm.generate_event_report_with_template(
+                    item['event_description'],
+                    item['document_type'],
+                    job.template_analysis
+                )
+
+            metadata = {
+                'event_description': item['event_description'],
+                'document_type': item['document_type'],
+                'images_uploaded': len(job.image_paths),
+                'image_paths': job.image_paths,
+                'template_used': job.template_analysis is not None,
+                'template_format': job.template_analysis.get('format') if job.template_analysis else None
+            }
+            generator = get_document_generator()
+            generate = generator.generate_event_pdf if job.output_format == 'pdf' else generator.generate_event_document
+            with self.docx_slots:
+                doc_result = generate(result, item['document_type'], metadata, persist=False)
+            if not doc_result.get('success'):
+                raise RuntimeError(doc_result.get('error'))
+
+            filename = f"{index + 1:03d}_{doc_result['filename']}"
+            with open(os.path.join(job.directory, filename), 'wb') as f:
+                f.write(doc_result['data'])
+
+            if db is not None and db.is_connected():
+                db.insert_one('events', {
+                    'event_description': item['event_description'],
+                    'document_type': item['document_type'],
+                    'generated_content': result,
+                    'image_paths': job.image_paths,
+                    'template_used': job.template_analysis is not None,
+                    'output_format': job.output_format,
+                    'batch_id': job.id
+                })
+
+            job.update(index, status='done', filename=filename)
+
+        except Exception as e:
+            print(f"⚠️  Batch {job.id} item {index} failed: {e}")
+            job.update(index, status='failed', error=str(e))
+
+
+class _ZipStream(io.RawIOBase):
+    """Write-only, non-seekable sink that hands written bytes back in chunks"""
+
+    def __init__(self):
+        self._chunks = []
+        self.pending = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self.pending += len(data)
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        self.pending = 0
+        return data
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Shared JobQueue for the process"""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue()
+                atexit.register(_queue.shutdown)
+    return _queue
@@ -3,9 +3,10 @@ LLM Service using Groq API
 Handles all AI text generation tasks
 """
 import os
-from groq import Groq
 from dotenv import load_dotenv
 import json
+from services.groq_client import create_groq_client, use_fake_backend
+from services.metrics import record_cache, track_llm_call
 
 load_dotenv()
 
@@ -18,9 +19,11 @@ class LLMService:
         self.client = None
         self.default_model = "llama-3.3-70b-versatile"
         
-        if self.api_key:
+        if self.api_key or use_fake_backend():
             try:
-                self.client = Groq(api_key=self.api_key)
+                self.client = create_groq_client(api_key=self.api_key)
+                if use_fake_backend():
+                    print("🧪 Using fake Groq backend (LLM_BACKEND=fake)")
                 print("✅ Groq LLM Service initialized")
             except Exception as e:
                 print(f"⚠️  Groq initialization failed: {e}")
@@ -62,12 +65,14 @@ class LLMService:
                 "content": prompt
             })
             
-            response = self.client.chat.completions.create(
-                model=self.default_model,
-                messages=messages,
-                max_tokens=max_tokens,
-                temperature=temperature
-            )
+            with track_llm_call('generate_text', self.default_model) as call:
+                response = self.client.chat.completions.create(
+                    model=self.default_model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature
+                )
+                call.response = response
             
             return response.choices[0].message.content
         
@@ -75,6 +80,20 @@ class LLMService:
             print(f"Error in generate_text: {e}")
             return f"Error generating text: {str(e)}"
     
+    def generate_response(self, prompt, system_prompt=None, max_tokens=3000):
+        """
+        Generate a long-form text response (used by the MOU and budget routes)
+        
+        Args:
+            prompt: User prompt
+            system_prompt: System prompt for context
+            max_tokens: Maximum tokens in response
+        
+        Returns:
+            Generated text string
+        """
+        return self.generate_text(prompt, system_prompt=system_prompt, max_tokens=max_tokens)
+    
     def generate_json(self, prompt, system_prompt=None, max_tokens=2000):
         """
         Generate JSON output using Groq API
@@ -214,49 +233,26 @@ Generate a JSON response with this structure:
             dict: Generated report matching template style
         """
         
-        # Try to use RAG to get standard templates
-        try:
-            from services.rag_service import RAGService
-            import os
-            
-            backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            docs_folder = os.path.join(backend_dir, 'rag', 'source_docs')
-            faiss_path = os.path.join(backend_dir, 'rag', 'index.faiss')
-            meta_path = os.path.join(backend_dir, 'rag', 'metadata.pkl')
-            
-            # Initialize RAG service
-            rag = RAGService(
-                docs_folder=docs_folder,
-                faiss_path=faiss_path,
-                meta_path=meta_path,
-                groq_api_key=self.api_key,
-                embed_model=os.getenv('GROQ_EMBED_MODEL', 'nomic-embed-text-v1.5')
-            )
-            
-            # Build index if it doesn't exist
-            if not os.path.exists(faiss_path) or not os.path.exists(meta_path):
-                print("Building RAG index for event templates...")
-                rag.build()
-            
-            # Retrieve template based on document type
-            query = f"{document_type} template format structure sections"
-            retrieved_docs = rag.retrieve(query, top_k=2)
-            
-            # Combine retrieved templates
-            template_context = "\n\n".join([doc['text'] for doc in retrieved_docs])
-            
-        except Exception as e:
-            print(f"RAG retrieval failed: {e}")
-            template_context = ""
+        template_context = ""
+        library_template = None
         
-        # If user provided custom template, use it
         if template_analysis and template_analysis.get('success'):
+            # If user provided custom template, use it
             from services.template_analyzer import TemplateAnalyzer
-            analyzer = TemplateAnalyzer()
-            template_instructions = analyzer.create_template_prompt(template_analysis)
+            # Cached analyses carry their prompt already
+            template_instructions = template_analysis.get('prompt') or TemplateAnalyzer().create_template_prompt(template_analysis)
         else:
-            # Use RAG-retrieved template
-            template_instructions = f"""Use this professional template format:
+            # Standard templates are precomputed at startup
+            from services.template_library import get_template_library, library_enabled
+            if library_enabled():
+                library_template = get_template_library().get(document_type)
+            
+            if library_template:
+                template_instructions = library_template['prompt']
+            else:
+                template_context = self._retrieve_rag_templates(document_type)
+                # Use RAG-retrieved template
+                template_instructions = f"""Use this professional template format:
 
 {template_context}
 
@@ -389,24 +385,80 @@ Generate a complete, institutional form-style event report."""
             'success': True,
             'content': text_response,
             'template_matched': True,
-            'template_format': template_analysis.get('format') if template_analysis else 'Standard RAG Template',
-            'template_sections': template_analysis.get('structure', {}).get('common_sections', []) if template_analysis else [],
+            'template_format': template_analysis.get('format') if template_analysis else (
+                'Standard Template Library' if library_template else 'Standard RAG Template'
+            ),
+            'template_sections': template_analysis.get('structure', {}).get('common_sections', []) if template_analysis else (
+                library_template['skeleton'] if library_template else []
+            ),
             'metadata': {
                 'document_type': document_type,
                 'event_description': event_description,
                 'word_count': len(text_response.split()),
-                'rag_used': len(template_context) > 0
+                'rag_used': len(template_context) > 0,
+                'template_library_used': library_template is not None
             }
         }
     
-    def analyze_feedback(self, feedback_text):
-        """Analyze feedback text and extract insights"""
+    def _retrieve_rag_templates(self, document_type):
+        """
+        Retrieve standard template text for a document type through RAG
+        
+        Returns:
+            str: Retrieved template chunks ('' if retrieval failed)
+        """
+        try:
+            from services.rag_service import RAGService
+            
+            backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            docs_folder = os.path.join(backend_dir, 'rag', 'source_docs')
+            faiss_path = os.path.join(backend_dir, 'rag', 'index.faiss')
+            meta_path = os.path.join(backend_dir, 'rag', 'metadata.pkl')
+            
+            # Initialize RAG service
+            rag = RAGService(
+                docs_folder=docs_folder,
+                faiss_path=faiss_path,
+                meta_path=meta_path,
+                groq_api_key=self.api_key,
+                embed_model=os.getenv('GROQ_EMBED_MODEL', 'nomic-embed-text-v1.5')
+            )
+            
+            # Build index if it doesn't exist (the saved index caches the template embeddings)
+            index_cached = os.path.exists(faiss_path) and os.path.exists(meta_path)
+            record_cache('rag_index', index_cached)
+            if not index_cached:
+                print("Building RAG index for event templates...")
+                rag.build()
+            
+            # Retrieve template based on document type
+            query = f"{document_type} template format structure sections"
+            retrieved_docs = rag.retrieve(query, top_k=2)
+            
+            # Combine retrieved templates
+            return "\n\n".join([doc['text'] for doc in retrieved_docs])
+            
+        except Exception as e:
+            print(f"RAG retrieval failed: {e}")
+            return ""
+    
+    def analyze_feedback(self, feedback_text, context=None):
+        """
+        Analyze feedback text and extract insights
+        
+        Args:
+            feedback_text: Feedback comments, one per line
+            context: Optional note about the data (e.g., that it is a sample
+                     and what the locally computed sentiment numbers are)
+        """
         
         system_prompt = """You are an expert at analyzing feedback and extracting insights.
 Provide sentiment analysis, key themes, and actionable recommendations."""
         
+        context_note = f"\n{context}\n" if context else ""
+        
         prompt = f"""Analyze this feedback data and provide insights:
-
+{context_note}
 {feedback_text}
 
 Generate a JSON response with this structure:
@@ -0,0 +1,88 @@
+"""
+Local OCR
+Tesseract-based text extraction used before falling back to the vision model
+
+Optional: needs the pytesseract package and the tesseract binary. When
+either is missing, is_available() is False and ImageService goes straight
+to the vision model.
+"""
+import os
+import shutil
+from services.image_io import open_image
+from services.image_preprocess import run_in_pool
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+
+# Tesseract works best around 300 DPI; larger inputs only cost time
+OCR_MAX_SIDE = 2500
+
+_available = None
+
+
+def is_available():
+    """True if pytesseract and the tesseract binary can be used"""
+    global _available
+    if _available is None:
+        if pytesseract is None or os.getenv('LOCAL_OCR', 'true').lower() != 'true':
+            _available = False
+        else:
+            command = getattr(pytesseract.pytesseract, 'tesseract_cmd', 'tesseract')
+            _available = shutil.which(command) is not None or os.path.isfile(command)
+            if not _available:
+                print("⚠️  tesseract binary not found - OCR will use the vision model only")
+    return _available
+
+
+def min_confidence():
+    """Mean word confidence (0-100) required to trust the local result"""
+    return float(os.getenv('LOCAL_OCR_MIN_CONFIDENCE', 80))
+
+
+def recognize(source, lang='eng'):
+    """
+    Run Tesseract on an image
+
+    Args:
+        source: File path, bytes, or a binary file object
+        lang: Tesseract language code(s)
+
+    Returns:
+        dict: text (line breaks preserved), confidence (mean word confidence
+              weighted by word length, 0-100) and words (count)
+    """
+    with open_image(source) as img:
+        img.draft('L', (OCR_MAX_SIDE, OCR_MAX_SIDE))
+        gray = img.convert('L')
+    if max(gray.size) > OCR_MAX_SIDE:
+        gray.thumbnail((OCR_MAX_SIDE, OCR_MAX_SIDE))
+
+    data = pytesseract.image_to_data(gray, lang=lang, output_type=pytesseract.Output.DICT)
+
+    lines = {}
+    weighted = 0.0
+    characters = 0
+    for index, word in enumerate(data['text']):
+        word = (word or '').strip()
+        confidence = float(data['conf'][index])
+        if not word or confidence < 0:
+            continue
+        key = (data['block_num'][index], data['par_num'][index], data['line_num'][index])
+        lines.setdefault(key, []).append(word)
+        weighted += confidence * len(word)
+        characters += len(word)
+
+    text = '\n'.join(' '.join(words) for _, words in sorted(lines.items()))
+    return {
+        'text': text,
+        'confidence': round(weighted / characters, 1) if characters else 0.0,
+        'words': sum(len(words) for words in lines.values())
+    }
+
+
+def recognize_in_pool(source, lang='eng'):
+    """recognize() on the CPU process pool (always handed off - OCR is slow even for small images)"""
+    return run_in_pool(recognize, source, inline_below=0, lang=lang)
@@ -0,0 +1,401 @@
+"""
+Metrics Service
+Records request counts, token usage, latency and cache hits for AI calls
+"""
+import contextvars
+import threading
+import time
+
+
+# Endpoint label for the request being served (set by the app before each request)
+current_endpoint = contextvars.ContextVar('current_endpoint', default='offline')
+
+# Latency histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_HELP = {
+    'campusops_llm_requests_total': ('counter', 'AI API requests by endpoint, model, operation and status'),
+    'campusops_llm_prompt_tokens_total': ('counter', 'Prompt tokens reported by the AI API'),
+    'campusops_llm_completion_tokens_total': ('counter', 'Completion tokens reported by the AI API'),
+    'campusops_llm_errors_total': ('counter', 'Failed AI API requests by error class'),
+    'campusops_llm_latency_seconds': ('histogram', 'AI API request latency in seconds'),
+    'campusops_cache_requests_total': ('counter', 'Cache lookups by cache name and result'),
+    'campusops_image_preprocess_seconds': ('histogram', 'Image preprocessing time by stage (decode, resize, encode)'),
+    'campusops_document_stage_seconds': ('histogram', 'Document generation time by stage (parse, render, serialize)'),
+}
+
+
+class MetricsRegistry:
+    """
+    Thread-sharded metrics store
+
+    Every thread writes to its own shard, so recording a sample never takes a
+    lock. Shards are only merged when metrics are read (scrape / stats call);
+    shards of finished threads are also folded in as new threads register,
+    so the shard list stays bounded even if metrics are never read.
+    """
+
+    # Shard count that triggers folding in dead threads' shards on registration
+    PRUNE_THRESHOLD = 64
+
+    def __init__(self, latency_buckets=LATENCY_BUCKETS):
+        self.latency_buckets = tuple(latency_buckets)
+        self._local = threading.local()
+        self._shards = []  # (thread, counters, histograms)
+        self._retired_counters = {}
+        self._retired_histograms = {}
+        self._registry_lock = threading.Lock()
+        self._prune_at = self.PRUNE_THRESHOLD
+
+    def _shard(self):
+        """Get (or lazily register) the calling thread's shard"""
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = (threading.current_thread(), {}, {})
+            with self._registry_lock:
+                self._shards.append(shard)
+                if len(self._shards) >= self._prune_at:
+                    self._retire_dead_shards()
+                    # Doubling keeps the scans amortized O(1) per new thread
+                    self._prune_at = max(self.PRUNE_THRESHOLD, 2 * len(self._shards))
+            self._local.shard = shard
+        return shard
+
+    def inc(self, name, labels=(), amount=1):
+        """
+        Increment a counter
+
+        Args:
+            name: Metric name
+            labels: Tuple of (label, value) pairs
+            amount: Increment value
+        """
+        counters = self._shard()[1]
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        """
+        Record a histogram sample
+
+        Args:
+            name: Metric name
+            labels: Tuple of (label, value) pairs
+            value: Observed value (seconds for latency)
+        """
+        histograms = self._shard()[2]
+        key = (name, labels)
+        state = histograms.get(key)
+        if state is None:
+            # One slot per bucket plus +Inf, then sum and count
+            state = [0] * (len(self.latency_buckets) + 1) + [0.0, 0]
+            histograms[key] = state
+
+        index = len(self.latency_buckets)
+        for i, bound in enumerate(self.latency_buckets):
+            if value <= bound:
+                index = i
+                break
+        state[index] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    def snapshot(self):
+        """
+        Merge all shards into a single view
+
+        Returns:
+            tuple: (counters dict, histograms dict) keyed by (name, labels)
+        """
+        with self._registry_lock:
+            self._retire_dead_shards()
+
+            counters = dict(self._retired_counters)
+            histograms = {key: list(state) for key, state in self._retired_histograms.items()}
+            for _, shard_counters, shard_histograms in self._shards:
+                self._merge(shard_counters, shard_histograms, counters, histograms)
+
+        return counters, histograms
+
+    def _retire_dead_shards(self):
+        """Fold finished threads' shards into the retired totals (caller holds the registry lock)"""
+        live_shards = []
+        for shard in self._shards:
+            if shard[0].is_alive():
+                live_shards.append(shard)
+            else:
+                # Nobody writes to a dead thread's shard any more - fold it in for good
+                self._merge(shard[1], shard[2], self._retired_counters, self._retired_histograms)
+        self._shards = live_shards
+
+    def _merge(self, src_counters, src_histograms, dst_counters, dst_histograms):
+        """Add one shard's values into the destination dicts"""
+        # list() copies the items atomically under the GIL while the owner keeps writing
+        for key, value in list(src_counters.items()):
+            dst_counters[key] = dst_counters.get(key, 0) + value
+        for key, state in list(src_histograms.items()):
+            state = list(state)
+            target = dst_histograms.get(key)
+            if target is None:
+                dst_histograms[key] = state
+            else:
+                for i, value in enumerate(state):
+                    target[i] += value
+
+    def render_prometheus(self):
+        """
+        Render all metrics in the Prometheus text exposition format
+
+        Returns:
+            str: Metrics text
+        """
+        counters, histograms = self.snapshot()
+        lines = []
+
+        by_name = {}
+        for (name, labels), value in counters.items():
+            by_name.setdefault(name, []).append((labels, value))
+        for (name, labels), state in histograms.items():
+            by_name.setdefault(name, []).append((labels, state))
+
+        for name in sorted(by_name):
+            metric_type, help_text = METRIC_HELP.get(name, ('untyped', name))
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+
+            for labels, value in sorted(by_name[name], key=lambda item: item[0]):
+                if metric_type != 'histogram':
+                    lines.append(f'{name}{_format_labels(labels)} {value}')
+                    continue
+
+                cumulative = 0
+                for bound, count in zip(self.latency_buckets + ('+Inf',), value):
+                    cumulative += count
+                    bucket_labels = labels + (('le', str(bound)),)
+                    lines.append(f'{name}_bucket{_format_labels(bucket_labels)} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {value[-2]}')
+                lines.append(f'{name}_count{_format_labels(labels)} {value[-1]}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _format_labels(labels):
+    """Format a labels tuple as {key="value",...}"""
+    if not labels:
+        return ''
+    parts = []
+    for key, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+
+# Process-wide registry used by all services
+registry = MetricsRegistry()
+
+
+class LLMCall:
+    """
+    Context manager timing a single AI API request
+
+    Usage:
+        with track_llm_call('generate_text', model) as call:
+            response = client.chat.completions.create(...)
+            call.response = response
+    """
+
+    __slots__ = ('operation', 'model', 'response', 'started')
+
+    def __init__(self, operation, model):
+        self.operation = operation
+        self.model = model
+        self.response = None
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        labels = (
+            ('endpoint', current_endpoint.get()),
+            ('model', self.model),
+            ('operation', self.operation),
+        )
+
+        registry.observe('campusops_llm_latency_seconds', labels, elapsed)
+
+        if exc_type is not None:
+            registry.inc('campusops_llm_requests_total', labels + (('status', 'error'),))
+            registry.inc('campusops_llm_errors_total', labels + (('error', exc_type.__name__),))
+            return False
+
+        registry.inc('campusops_llm_requests_total', labels + (('status', 'ok'),))
+
+        usage = getattr(self.response, 'usage', None)
+        if usage is not None:
+            prompt_tokens = getattr(usage, 'prompt_tokens', None) or 0
+            completion_tokens = getattr(usage, 'completion_tokens', None) or 0
+            if prompt_tokens:
+                registry.inc('campusops_llm_prompt_tokens_total', labels, prompt_tokens)
+            if completion_tokens:
+                registry.inc('campusops_llm_completion_tokens_total', labels, completion_tokens)
+        return False
+
+
+def track_llm_call(operation, model):
+    """
+    Start tracking an AI API request
+
+    Args:
+        operation: Logical operation name (e.g., 'generate_text', 'caption')
+        model: Model identifier sent to the API
+
+    Returns:
+        LLMCall: Context manager; assign the API response to `.response`
+    """
+    return LLMCall(operation, model)
+
+
+def record_cache(cache_name, hit):
+    """
+    Record a cache lookup
+
+    Args:
+        cache_name: Name of the cache (e.g., 'image_analysis')
+        hit: True if the lookup was served from cache
+    """
+    registry.inc('campusops_cache_requests_total', (('cache', cache_name), ('result', 'hit' if hit else 'miss')))
+
+
+def record_image_stages(timings):
+    """
+    Record image preprocessing stage timings
+
+    Args:
+        timings: {stage name: seconds} as returned by preprocess_image
+    """
+    for stage, seconds in timings.items():
+        registry.observe('campusops_image_preprocess_seconds', (('stage', stage),), seconds)
+
+
+def record_document_stages(timings):
+    """
+    Record document generation stage timings
+
+    Args:
+        timings: {stage name: seconds}, e.g. parse / render / serialize
+    """
+    for stage, seconds in timings.items():
+        registry.observe('campusops_document_stage_seconds', (('stage', stage),), seconds)
+
+
+def _estimate_quantile(buckets, state, quantile):
+    """Estimate a quantile from histogram buckets (linear interpolation)"""
+    total = state[-1]
+    if not total:
+        return None
+
+    rank = quantile * total
+    cumulative = 0
+    lower = 0.0
+    for i, bound in enumerate(buckets):
+        count = state[i]
+        if cumulative + count >= rank and count:
+            return round(lower + (bound - lower) * (rank - cumulative) / count, 4)
+        cumulative += count
+        lower = bound
+    # Falls into the +Inf bucket - best we can say is "above the last bound"
+    return buckets[-1]
+
+
+def llm_stats():
+    """
+    Summarize AI usage for the admin stats endpoint
+
+    Returns:
+        dict: Per endpoint/model/operation totals, latency and cache stats
+    """
+    counters, histograms = registry.snapshot()
+
+    calls = {}
+
+    def entry(labels):
+        label_map = dict(labels)
+        key = (label_map.get('endpoint'), label_map.get('model'), label_map.get('operation'))
+        if key not in calls:
+            calls[key] = {
+                'endpoint': key[0],
+                'model': key[1],
+                'operation': key[2],
+                'requests': 0,
+                'errors': 0,
+                'error_classes': {},
+                'prompt_tokens': 0,
+                'completion_tokens': 0,
+                'latency': {}
+            }
+        return calls[key], label_map
+
+    cache = {}
+
+    for (name, labels), value in counters.items():
+        if name == 'campusops_cache_requests_total':
+            label_map = dict(labels)
+            stats = cache.setdefault(label_map['cache'], {'hits': 0, 'misses': 0})
+            stats['hits' if label_map['result'] == 'hit' else 'misses'] += value
+            continue
+
+        item, label_map = entry(labels)
+        if name == 'campusops_llm_requests_total':
+            item['requests'] += value
+        elif name == 'campusops_llm_errors_total':
+            item['errors'] += value
+            item['error_classes'][label_map['error']] = item['error_classes'].get(label_map['error'], 0) + value
+        elif name == 'campusops_llm_prompt_tokens_total':
+            item['prompt_tokens'] += value
+        elif name == 'campusops_llm_completion_tokens_total':
+            item['completion_tokens'] += value
+
+    buckets = registry.latency_buckets
+    image_stages = {}
+    document_stages = {}
+    for (name, labels), state in histograms.items():
+        if name in ('campusops_image_preprocess_seconds', 'campusops_document_stage_seconds'):
+            stages = image_stages if name == 'campusops_image_preprocess_seconds' else document_stages
+            count = state[-1]
+            stages[dict(labels)['stage']] = {
+                'count': count,
+                'avg_ms': round(state[-2] / count * 1000, 2) if count else None
+            }
+            continue
+
+        item, _ = entry(labels)
+        count = state[-1]
+        item['latency'] = {
+            'count': count,
+            'avg_seconds': round(state[-2] / count, 4) if count else None,
+            'p50_seconds': _estimate_quantile(buckets, state, 0.5),
+            'p95_seconds': _estimate_quantile(buckets, state, 0.95),
+            'p99_seconds': _estimate_quantile(buckets, state, 0.99)
+        }
+
+    for stats in cache.values():
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else None
+
+    items = sorted(calls.values(), key=lambda c: (str(c['endpoint']), str(c['model']), str(c['operation'])))
+
+    return {
+        'totals': {
+            'requests': sum(c['requests'] for c in items),
+            'errors': sum(c['errors'] for c in items),
+            'prompt_tokens': sum(c['prompt_tokens'] for c in items),
+            'completion_tokens': sum(c['completion_tokens'] for c in items)
+        },
+        'calls': items,
+        'cache': cache,
+        'image_preprocess': image_stages,
+        'documents': document_stages
+    }
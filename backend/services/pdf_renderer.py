@@ -0,0 +1,249 @@
+"""
+PDF Renderer
+Renders parsed reports (services.report_parser nodes) and MOUs to PDF with
+ReportLab, so PDFs are produced server-side without a LibreOffice round trip
+
+Optional: needs the reportlab package. When it is missing, is_available()
+is False and the PDF endpoints answer 501.
+
+Rendering is CPU-bound, so render_in_pool runs it in the shared CPU process
+pool; the renderers only take plain data (node dicts, strings, file paths)
+so the arguments pickle cheaply.
+"""
+import io
+import os
+from concurrent.futures.process import BrokenProcessPool
+from xml.sax.saxutils import escape
+from services import executors
+
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+    from reportlab.lib.pagesizes import LETTER
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Image, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+except ImportError:
+    colors = None
+
+
+PROCESS_POOL = 'cpu'
+
+# Same palette as the DOCX tables
+MARKDOWN_HEADER_FILL = '#D9E2F3'
+FIELD_FILL = '#D6EAD6'
+FIELD_SHADE_KEYWORDS = ('club', 'event', 'student', 'mode', 'participants')
+
+PAGE_FOOTER = 'CampusOps Event Report Generator'
+
+
+def is_available():
+    """True if reportlab is installed"""
+    return colors is not None
+
+
+def render_in_pool(fn, **kwargs):
+    """
+    Run a renderer in the CPU process pool (inline if the pool is disabled or unavailable)
+
+    Args:
+        fn: render_report or render_mou
+        **kwargs: Renderer arguments
+
+    Returns:
+        bytes: The PDF
+    """
+    if os.getenv('IMAGE_PROCESS_POOL', 'true').lower() != 'true':
+        return fn(**kwargs)
+    try:
+        pool = executors.get_process_pool(PROCESS_POOL, os.getenv('IMAGE_PROCESS_WORKERS') or None)
+        future = pool.submit(fn, **kwargs)
+    except (OSError, RuntimeError) as e:
+        print(f"⚠️  Process pool unavailable ({e}), rendering PDF inline")
+        return fn(**kwargs)
+    try:
+        return future.result()
+    except BrokenProcessPool as e:
+        print(f"⚠️  Process pool failed ({e}), rendering PDF inline")
+        executors.reset_process_pool(PROCESS_POOL)
+        return fn(**kwargs)
+
+
+def render_report(nodes, header=None, images=None, generated=None):
+    """
+    Render report nodes to PDF
+
+    Args:
+        nodes: Nodes from services.report_parser
+        header: For markdown reports: {'title', 'subtitle', 'fields': [(label, value)]}
+        images: {'first': [(path, caption)], 'second': [...]} for the photo slots
+        generated: Generation date text for the closing footer
+
+    Returns:
+        bytes: The PDF
+    """
+    styles = _styles()
+    images = images or {}
+    story = []
+
+    if header:
+        story.append(Paragraph(escape(header['title']), styles['Title']))
+        story.append(Paragraph(escape(header['subtitle']), styles['Heading1']))
+        if header.get('fields'):
+            story.append(Spacer(1, 8))
+            for label, value in header['fields']:
+                story.append(Paragraph(f"<b>{escape(label)}:</b> {escape(value)}", styles['BodyText']))
+            story.append(Spacer(1, 8))
+
+    for node in nodes:
+        kind = node['type']
+        if kind == 'spacer':
+            story.append(Spacer(1, 8))
+        elif kind == 'heading':
+            story.append(Paragraph(escape(node['text']), styles[f"Heading{min(max(node['level'], 1), 3)}"]))
+        elif kind == 'title':
+            story.append(Paragraph(f"<b>{escape(node['text'])}</b>", styles['FormTitle']))
+        elif kind == 'bullet':
+            story.append(Paragraph(escape(node['text']), styles['Bullet'], bulletText='•'))
+        elif kind == 'numbered':
+            story.append(Paragraph(escape(node['text']), styles['BodyText']))
+        elif kind == 'paragraph':
+            story.append(Paragraph(_markup(node), styles['BodyText']))
+        elif kind == 'table':
+            table = _table(node, styles)
+            if table is not None:
+                story.append(table)
+                story.append(Spacer(1, 8))
+        elif kind == 'image_slot':
+            story.extend(_images(images.get(node['half'], []), styles))
+
+    story.append(Spacer(1, 16))
+    closing = PAGE_FOOTER + (f"<br/>Date: {escape(generated)}" if generated else '')
+    story.append(Paragraph(f"Generated by {closing}", styles['Footer']))
+    return _build(story)
+
+
+def render_mou(paragraphs, party1, party2):
+    """
+    Render an MOU to PDF (same layout as the DOCX: title block, justified body, signatures)
+
+    Args:
+        paragraphs: Paragraph nodes from report_parser.parse_mou
+        party1, party2: Party names
+
+    Returns:
+        bytes: The PDF
+    """
+    styles = _styles()
+    story = [
+        Paragraph('<b>MEMORANDUM OF UNDERSTANDING</b>', styles['MouTitle']),
+        Paragraph(f"<b>Between<br/>{escape(party1)}<br/>and<br/>{escape(party2)}</b>", styles['MouSubtitle']),
+        Spacer(1, 16)
+    ]
+    for node in paragraphs:
+        story.append(Paragraph(escape(node['text']).replace('\n', '<br/>'), styles['Justified']))
+
+    for party in (party1, party2):
+        story.append(Spacer(1, 36))
+        story.append(Paragraph('_' * 50, styles['BodyText']))
+        story.append(Paragraph(f"Authorized Signatory - {escape(party)}", styles['BodyText']))
+        story.append(Paragraph('Date: _____________________', styles['BodyText']))
+    return _build(story)
+
+
+def _styles():
+    """Paragraph styles (the sample sheet plus the report-specific ones)"""
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle('FormTitle', parent=styles['BodyText'], fontSize=14, leading=18, alignment=TA_CENTER))
+    styles.add(ParagraphStyle('MouTitle', parent=styles['BodyText'], fontSize=16, leading=20, alignment=TA_CENTER))
+    styles.add(ParagraphStyle('MouSubtitle', parent=styles['BodyText'], fontSize=12, leading=16, alignment=TA_CENTER))
+    styles.add(ParagraphStyle('Justified', parent=styles['BodyText'], alignment=TA_JUSTIFY, leading=14, spaceAfter=6))
+    styles.add(ParagraphStyle('Cell', parent=styles['BodyText'], fontSize=10, leading=12))
+    styles.add(ParagraphStyle('Caption', parent=styles['BodyText'], fontSize=9, textColor=colors.grey, alignment=TA_CENTER))
+    styles.add(ParagraphStyle('Footer', parent=styles['BodyText'], fontSize=9, textColor=colors.grey, alignment=TA_CENTER))
+    return styles
+
+
+def _markup(node):
+    """ReportLab markup for a paragraph node (inline bold spans)"""
+    if not node['runs']:
+        return escape(node['text'])
+    return ''.join(f"<b>{escape(text)}</b>" if bold else escape(text) for text, bold in node['runs'])
+
+
+def _table(node, styles):
+    """ReportLab Table for a table node (None if there is nothing to draw)"""
+    cell = styles['Cell']
+    commands = [('GRID', (0, 0), (-1, -1), 0.5, colors.grey), ('VALIGN', (0, 0), (-1, -1), 'TOP')]
+
+    if node['kind'] == 'field_value':
+        cols = 2
+        data = []
+        for row_idx, parts in enumerate(node['rows']):
+            if len(parts) < 2:
+                data.append(['', ''])
+                continue
+            data.append([Paragraph(f"<b>{escape(parts[0])}</b>", cell), Paragraph(escape(parts[1]), cell)])
+            if any(keyword in parts[0].lower() for keyword in FIELD_SHADE_KEYWORDS):
+                commands.append(('BACKGROUND', (0, row_idx), (0, row_idx), colors.HexColor(FIELD_FILL)))
+    else:
+        header = node['header']
+        cols = len(header)
+        if not cols or (node['kind'] == 'markdown' and not node['rows']):
+            return None
+        strip = node['kind'] == 'markdown'
+        fill = MARKDOWN_HEADER_FILL if strip else FIELD_FILL
+
+        def text(value):
+            return escape(value.replace('**', '') if strip else value)
+
+        data = [[Paragraph(f"<b>{text(value)}</b>", cell) for value in header]]
+        for row in node['rows']:
+            cells = [Paragraph(text(value), cell) for value in row[:cols]]
+            data.append(cells + [''] * (cols - len(cells)))
+        commands.append(('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(fill)))
+
+    if not data:
+        return None
+    width = LETTER[0] - 2 * inch
+    table = Table(data, colWidths=[width / cols] * cols, repeatRows=1 if node['kind'] != 'field_value' else 0)
+    table.setStyle(TableStyle(commands))
+    return table
+
+
+def _images(images, styles):
+    """Flowables for photos (6 inches wide, captioned)"""
+    from PIL import Image as PILImage
+
+    flowables = []
+    for path, caption in images:
+        try:
+            with PILImage.open(path) as img:
+                width, height = img.size
+            display_width = 6 * inch
+            display_height = min(display_width * height / float(width), 8 * inch)
+            flowables.append(Spacer(1, 8))
+            flowables.append(Image(path, width=display_height * width / float(height), height=display_height))
+            flowables.append(Paragraph(f"Image: {escape(caption)}", styles['Caption']))
+            flowables.append(Spacer(1, 8))
+        except Exception as e:
+            print(f"Error adding image {path}: {e}")
+            flowables.append(Paragraph(f"<i>[Image: {escape(caption)} - Could not be loaded]</i>", styles['BodyText']))
+    return flowables
+
+
+def _build(story):
+    """Lay out the story on Letter pages with 1" margins and a page footer"""
+    buffer = io.BytesIO()
+    document = SimpleDocTemplate(buffer, pagesize=LETTER, leftMargin=inch, rightMargin=inch,
+                                 topMargin=inch, bottomMargin=inch)
+    document.build(story, onFirstPage=_page_footer, onLaterPages=_page_footer)
+    return buffer.getvalue()
+
+
+def _page_footer(canvas, document):
+    canvas.saveState()
+    canvas.setFont('Helvetica', 8)
+    canvas.setFillColor(colors.grey)
+    canvas.drawCentredString(LETTER[0] / 2, 0.5 * inch, f"{PAGE_FOOTER} - Page {document.page}")
+    canvas.restoreState()
@@ -0,0 +1,272 @@
+"""
+Report Parser
+Turns LLM report markup into a flat list of nodes for the document renderers
+
+Two layouts are produced by the LLM:
+    - markdown: headings, bullets, numbered items, **bold** and | tables |
+    - form: the institutional template with [TABLE: ...] blocks and ## sections
+
+Each is parsed in a single pass over the lines with precompiled patterns.
+The result does not depend on python-docx, so the same nodes can be
+rendered to DOCX, PDF or HTML.
+
+Node types (dicts with a 'type' key):
+    spacer                              empty paragraph
+    title         text                  centered bold title (form)
+    heading       text, level
+    bullet        text
+    numbered      text
+    paragraph     text, runs            runs: [(text, bold)] or None
+    table         kind, header, rows, lines
+                  kind: markdown | field_value | program_outcomes
+    image_slot    half                  'first' or 'second' half of the photos
+"""
+import re
+
+
+NUMBERED_HEADING = re.compile(r'^\d+\.(\d+\.?)?\s+[A-Z]')
+LEVEL_2_HEADING = re.compile(r'^\d+\.\s+')
+LEVEL_3_HEADING = re.compile(r'^\d+\.\d+\.\s+')
+NUMBERED_ITEM = re.compile(r'^\d+[\.\)]\s+')
+BOLD_SPAN = re.compile(r'\*\*(.*?)\*\*')
+
+BULLET_MARKERS = ('•', '-', '*')
+
+
+def is_form_style(content):
+    """True if the content uses the table-based form template"""
+    return '[TABLE:' in content or 'Name of the Club' in content
+
+
+def parse_report(content):
+    """
+    Parse report content in whichever layout it uses
+
+    Returns:
+        dict: layout ('form' or 'markdown') and nodes
+    """
+    if is_form_style(content):
+        return {'layout': 'form', 'nodes': parse_form(content)}
+    return {'layout': 'markdown', 'nodes': parse_markdown(content)}
+
+
+def parse_mou(content):
+    """
+    Parse MOU text (blank-line separated paragraphs)
+
+    Returns:
+        list: paragraph nodes
+    """
+    return [
+        {'type': 'paragraph', 'text': block.strip(), 'runs': None}
+        for block in content.split('\n\n')
+        if block.strip()
+    ]
+
+
+def split_cells(line):
+    """Non-empty, stripped cells of a '|' separated row"""
+    return [cell.strip() for cell in line.split('|') if cell.strip()]
+
+
+def parse_markdown(content):
+    """
+    Parse markdown-style report content
+
+    Args:
+        content: Report text
+
+    Returns:
+        list: Nodes
+    """
+    lines = content.split('\n')
+    nodes = []
+    slots = _PhotoSlots('photograph section')
+
+    i = 0
+    count = len(lines)
+    while i < count:
+        line = lines[i].strip()
+
+        if not line:
+            nodes.append({'type': 'spacer'})
+            i += 1
+            continue
+
+        # Header row followed by a |---| separator starts a table
+        if '|' in line and i + 1 < count and '---' in lines[i + 1]:
+            table_lines = [line]
+            i += 2
+            while i < count and '|' in lines[i]:
+                table_lines.append(lines[i].strip())
+                i += 1
+            nodes.append(_markdown_table(table_lines))
+            continue
+
+        if _is_header(line):
+            nodes.append({'type': 'heading', 'text': line, 'level': _heading_level(line)})
+            slot = slots.match(line)
+            if slot:
+                nodes.append(slot)
+        elif line.startswith(BULLET_MARKERS):
+            nodes.append({'type': 'bullet', 'text': line[1:].strip()})
+        elif NUMBERED_ITEM.match(line):
+            nodes.append({'type': 'numbered', 'text': line})
+        elif '**' in line:
+            parts = BOLD_SPAN.split(line)
+            runs = [(part, index % 2 == 1) for index, part in enumerate(parts)]
+            nodes.append({'type': 'paragraph', 'text': line, 'runs': runs})
+        else:
+            nodes.append({'type': 'paragraph', 'text': line, 'runs': None})
+
+        i += 1
+
+    return nodes
+
+
+def parse_form(content):
+    """
+    Parse form-style report content ([TABLE: ...] blocks, ## sections)
+
+    Args:
+        content: Report text
+
+    Returns:
+        list: Nodes
+    """
+    lines = [line.strip() for line in content.split('\n')]
+    nodes = []
+    slots = _PhotoSlots('photograph')
+
+    i = 0
+    count = len(lines)
+    while i < count:
+        line = lines[i]
+
+        if not line:
+            i += 1
+            continue
+
+        if line.startswith('Title:'):
+            nodes.append({'type': 'title', 'text': line.replace('Title:', '').strip()})
+            nodes.append({'type': 'spacer'})
+            i += 1
+            continue
+
+        if line.startswith('[TABLE:'):
+            description = line.replace('[TABLE:', '').replace(']', '').strip()
+            i += 1
+
+            # Rows run until the next table or section (or a blank line before one)
+            rows = []
+            while i < count:
+                row_line = lines[i]
+                if row_line.startswith(('[TABLE:', '##')):
+                    break
+                if not row_line and i + 1 < count and lines[i + 1].startswith(('[TABLE:', '##')):
+                    break
+                if row_line and '|' in row_line:
+                    rows.append(row_line)
+                i += 1
+
+            if rows:
+                if 'Program Outcomes' in description:
+                    nodes.append(_outcomes_table(rows))
+                else:
+                    nodes.append(_field_value_table(rows))
+                nodes.append({'type': 'spacer'})
+            continue
+
+        if line.startswith('##'):
+            text = line.replace('##', '').replace('###', '').strip()
+            nodes.append({'type': 'heading', 'text': text, 'level': 2})
+            slot = slots.match(text)
+            if slot:
+                nodes.append(slot)
+            i += 1
+            continue
+
+        if line.startswith(BULLET_MARKERS):
+            nodes.append({'type': 'bullet', 'text': line[1:].strip()})
+        else:
+            nodes.append({'type': 'paragraph', 'text': line, 'runs': None})
+        i += 1
+
+    return nodes
+
+
+class _PhotoSlots:
+    """Places the photos under the geo-tagged / non geo-tagged photograph headings"""
+
+    def __init__(self, marker):
+        self.marker = marker
+        self.geo_added = False
+        self.non_geo_added = False
+
+    def match(self, heading):
+        lowered = heading.lower()
+        if self.marker not in lowered:
+            return None
+        # 'non geo-tagged' also contains 'geo-tagged': the first photo heading
+        # always takes the first half
+        if 'geo-tagged' in lowered and not self.geo_added:
+            self.geo_added = True
+            return {'type': 'image_slot', 'half': 'first'}
+        if 'non geo-tagged' in lowered and not self.non_geo_added:
+            self.non_geo_added = True
+            return {'type': 'image_slot', 'half': 'second'}
+        return None
+
+
+def _is_header(line):
+    """All-caps line, '1.' / '1.1' numbered title, or a short line ending with ':'"""
+    if line.isupper() and len(line.split()) >= 2:
+        return True
+    if NUMBERED_HEADING.match(line):
+        return True
+    return line.endswith(':') and len(line) < 60
+
+
+def _heading_level(line):
+    """Heading level for a header line"""
+    if line.isupper() and len(line.split()) <= 5:
+        return 1
+    if LEVEL_2_HEADING.match(line):
+        return 2
+    if LEVEL_3_HEADING.match(line):
+        return 3
+    return 2
+
+
+def _markdown_table(table_lines):
+    """Table node for a markdown table (header line first, separator already dropped)"""
+    rows = [cells for cells in (split_cells(line) for line in table_lines[1:]) if cells]
+    return {
+        'type': 'table',
+        'kind': 'markdown',
+        'header': split_cells(table_lines[0]),
+        'rows': rows,
+        'lines': table_lines
+    }
+
+
+def _field_value_table(rows):
+    """Two-column field/value table node (rows with fewer than two cells stay empty)"""
+    return {
+        'type': 'table',
+        'kind': 'field_value',
+        'header': None,
+        'rows': [split_cells(row) for row in rows],
+        'lines': rows
+    }
+
+
+def _outcomes_table(rows):
+    """Program Outcomes table node (first row is the header)"""
+    return {
+        'type': 'table',
+        'kind': 'program_outcomes',
+        'header': split_cells(rows[0]),
+        'rows': [split_cells(row) for row in rows[1:]],
+        'lines': rows
+    }
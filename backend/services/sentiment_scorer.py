@@ -0,0 +1,440 @@
+"""
+Sentiment Scorer
+Local, lexicon-based sentiment scoring of feedback over NumPy arrays
+
+Scores every feedback row in one vectorized pass, computes rating-column
+statistics, and picks a small clustered sample of comments that represents
+the whole file so only that sample has to go to the LLM.
+"""
+import re
+import zlib
+import numpy as np
+
+
+# Lexicon tuned for event / workshop feedback: word -> polarity weight
+POSITIVE_WORDS = {
+    'good': 1.0, 'great': 1.5, 'excellent': 2.0, 'amazing': 2.0, 'awesome': 2.0, 'fantastic': 2.0,
+    'wonderful': 2.0, 'outstanding': 2.0, 'superb': 2.0, 'brilliant': 2.0, 'best': 1.5, 'love': 1.5,
+    'loved': 1.5, 'enjoyed': 1.5, 'enjoy': 1.0, 'enjoyable': 1.5, 'fun': 1.0, 'nice': 1.0, 'happy': 1.0,
+    'helpful': 1.5, 'useful': 1.5, 'informative': 1.5, 'insightful': 1.5, 'interesting': 1.0,
+    'engaging': 1.5, 'interactive': 1.0, 'inspiring': 1.5, 'motivating': 1.0, 'valuable': 1.5,
+    'clear': 1.0, 'organized': 1.0, 'organised': 1.0, 'smooth': 1.0, 'punctual': 1.0, 'friendly': 1.0,
+    'knowledgeable': 1.5, 'professional': 1.0, 'recommend': 1.5, 'worth': 1.0, 'impressive': 1.5,
+    'perfect': 2.0, 'satisfied': 1.0, 'thanks': 0.5, 'thank': 0.5, 'learned': 1.0, 'learnt': 1.0,
+    'well': 0.5, 'comfortable': 1.0, 'delicious': 1.0, 'supportive': 1.0, 'efficient': 1.0,
+}
+
+NEGATIVE_WORDS = {
+    'bad': -1.5, 'poor': -1.5, 'terrible': -2.0, 'horrible': -2.0, 'awful': -2.0, 'worst': -2.0,
+    'boring': -1.5, 'dull': -1.0, 'waste': -1.5, 'wasted': -1.5, 'useless': -1.5, 'disappointed': -1.5,
+    'disappointing': -1.5, 'confusing': -1.0, 'confused': -1.0, 'unclear': -1.0, 'disorganized': -1.5,
+    'disorganised': -1.5, 'chaotic': -1.5, 'messy': -1.0, 'late': -1.0, 'delay': -1.0, 'delayed': -1.0,
+    'rushed': -1.0, 'crowded': -1.0, 'noisy': -1.0, 'hot': -0.5, 'uncomfortable': -1.0, 'slow': -1.0,
+    'problem': -1.0, 'problems': -1.0, 'issue': -0.5, 'issues': -0.5, 'difficult': -0.5, 'hard': -0.5,
+    'lacking': -1.0, 'lack': -1.0, 'missing': -0.5, 'irrelevant': -1.0, 'repetitive': -1.0,
+    'expensive': -0.5, 'overpriced': -1.0, 'rude': -1.5, 'unprofessional': -1.5, 'hate': -2.0,
+    'hated': -2.0, 'annoying': -1.0, 'frustrating': -1.5, 'inadequate': -1.0, 'insufficient': -1.0,
+    'cancelled': -1.0, 'canceled': -1.0, 'broken': -1.0, 'unprepared': -1.5,
+}
+
+NEGATORS = {'not', 'no', 'never', 'none', 'nothing', 'hardly', 'barely', 'without', 'neither', 'nor'}
+INTENSIFIERS = {'very': 1.5, 'really': 1.5, 'extremely': 2.0, 'super': 1.5, 'so': 1.3, 'highly': 1.5, 'too': 1.3}
+
+# Label thresholds on the normalized [-1, 1] score
+POSITIVE_THRESHOLD = 0.1
+NEGATIVE_THRESHOLD = -0.1
+
+RATING_COLUMN_PATTERN = re.compile(r'rating|score|satisf|stars', re.IGNORECASE)
+# Scale stated in a header: 'Rating (1-10)', 'Rating 0 to 10', 'Score out of 5', 'Stars /5'.
+# Ranges must start at 0 or 1 and '/' must not follow a digit, so year ranges
+# and ids ('Satisfaction 2024-25', 'Batch 2024/25') are not read as scales
+HEADER_SCALE_PATTERN = re.compile(r'\b[01]\s*(?:-|–|to)\s*(\d+)\b|(?:\bout of|(?<!\d)/)\s*(\d+)\b', re.IGNORECASE)
+MAX_HEADER_SCALE = 100
+
+_TOKEN_PATTERN = re.compile(r"[a-z]+(?:n't|'[a-z]+)?|\n")
+
+HASH_DIM = 512
+
+
+class SentimentScorer:
+    """Vectorized lexicon sentiment scorer"""
+
+    def __init__(self):
+        words = sorted(set(POSITIVE_WORDS) | set(NEGATIVE_WORDS) | NEGATORS | set(INTENSIFIERS))
+        # Index 0 is reserved for "unknown word"
+        self.vocab = {word: i + 1 for i, word in enumerate(words)}
+        size = len(words) + 1
+
+        self.polarity = np.zeros(size, dtype=np.float32)
+        self.is_negator = np.zeros(size, dtype=bool)
+        self.boost = np.ones(size, dtype=np.float32)
+
+        for word, index in self.vocab.items():
+            self.polarity[index] = POSITIVE_WORDS.get(word, NEGATIVE_WORDS.get(word, 0.0))
+            self.is_negator[index] = word in NEGATORS
+            self.boost[index] = INTENSIFIERS.get(word, 1.0)
+
+    def tokenize(self, texts):
+        """
+        Tokenize all texts in one regex pass
+
+        Returns:
+            tuple: (tokens list, row index array) - one entry per token
+        """
+        # Rows are joined with newlines so a single findall covers the whole file
+        combined = '\n'.join(text.replace('\n', ' ') for text in texts).lower() + '\n'
+        tokens = _TOKEN_PATTERN.findall(combined)
+
+        is_break = np.fromiter((token == '\n' for token in tokens), dtype=bool, count=len(tokens))
+        # Row of each token = number of row breaks seen before it
+        row_ids = np.cumsum(is_break) - is_break
+        keep = ~is_break
+        words = [token for token, k in zip(tokens, keep) if k]
+        return words, row_ids[keep]
+
+    def score(self, texts):
+        """
+        Score a list of texts
+
+        Args:
+            texts: List of feedback strings
+
+        Returns:
+            np.ndarray: float32 scores in [-1, 1], one per text
+        """
+        n = len(texts)
+        if n == 0:
+            return np.zeros(0, dtype=np.float32)
+
+        words, row_ids = self.tokenize(texts)
+        vocab = self.vocab
+        ids = np.fromiter(
+            (vocab.get(word, -1 if word.endswith("n't") else 0) for word in words),
+            dtype=np.int64, count=len(words)
+        )
+
+        # Contractions like "wasn't" act as negators
+        contraction = ids == -1
+        ids[contraction] = 0
+
+        weights = self.polarity[ids].copy()
+        negator = self.is_negator[ids] | contraction
+        boost = self.boost[ids]
+
+        # Modifiers apply to the next one or two words within the same row
+        same_row_1 = np.zeros(len(ids), dtype=bool)
+        same_row_1[1:] = row_ids[1:] == row_ids[:-1]
+        same_row_2 = np.zeros(len(ids), dtype=bool)
+        same_row_2[2:] = row_ids[2:] == row_ids[:-2]
+
+        negated = np.zeros(len(ids), dtype=bool)
+        negated[1:] |= negator[:-1] & same_row_1[1:]
+        negated[2:] |= negator[:-2] & same_row_2[2:]
+        weights[negated] *= -0.75
+
+        boosted = np.ones(len(ids), dtype=np.float32)
+        boosted[1:] = np.where(same_row_1[1:], boost[:-1], 1.0)
+        weights *= boosted
+
+        totals = np.bincount(row_ids, weights=weights, minlength=n)
+        hits = np.bincount(row_ids, weights=(self.polarity[ids] != 0).astype(np.float32), minlength=n)
+
+        # Normalize so long comments don't dominate, then squash into [-1, 1]
+        return np.tanh(totals / np.sqrt(hits + 1.0)).astype(np.float32)
+
+    def label(self, scores):
+        """
+        Convert scores to labels
+
+        Returns:
+            np.ndarray: int8 array with 1 (positive), 0 (neutral), -1 (negative)
+        """
+        labels = np.zeros(len(scores), dtype=np.int8)
+        labels[scores > POSITIVE_THRESHOLD] = 1
+        labels[scores < NEGATIVE_THRESHOLD] = -1
+        return labels
+
+
+def sentiment_summary(scores, labels):
+    """
+    Aggregate per-row sentiment
+
+    Returns:
+        dict: distribution, overall sentiment, mean score, satisfaction (1-5)
+    """
+    distribution = count_labels(labels)
+    mean_score = float(scores.mean()) if len(scores) else 0.0
+    return summarize_counts(distribution, mean_score)
+
+
+def count_labels(labels):
+    """Count positive / neutral / negative labels"""
+    return {
+        'positive': int(np.count_nonzero(labels == 1)),
+        'neutral': int(np.count_nonzero(labels == 0)),
+        'negative': int(np.count_nonzero(labels == -1))
+    }
+
+
+def summarize_counts(distribution, mean_score):
+    """
+    Build the sentiment summary from label counts and the mean score
+
+    Used directly when scores are accumulated chunk by chunk.
+    """
+    overall = max(('positive', 'neutral', 'negative'), key=lambda label: distribution[label])
+
+    return {
+        'sentiment_distribution': distribution,
+        'overall_sentiment': overall,
+        'mean_sentiment': round(mean_score, 4),
+        # Map the [-1, 1] score onto the 1-5 satisfaction scale
+        'satisfaction_score': round(3.0 + 2.0 * mean_score, 1)
+    }
+
+
+def is_rating_column(name):
+    """True if a CSV header looks like a numeric rating column"""
+    return bool(name) and RATING_COLUMN_PATTERN.search(name) is not None
+
+
+def parse_ratings(values):
+    """
+    Parse raw rating cells into numbers
+
+    Args:
+        values: Raw cell values (strings); non-numeric cells are dropped
+
+    Returns:
+        np.ndarray: float64 ratings
+    """
+    numbers = rating_cells(values)
+    return numbers[~np.isnan(numbers)]
+
+
+def rating_cells(values):
+    """Parse raw rating cells row by row (NaN where a cell is not numeric)"""
+    return np.array([_parse_number(v) for v in values], dtype=np.float64)
+
+
+def header_scale(name):
+    """Rating scale stated in a column header, or None"""
+    match = HEADER_SCALE_PATTERN.search(name or '')
+    if match:
+        scale = int(match.group(1) or match.group(2))
+        if 1 < scale <= MAX_HEADER_SCALE:
+            return scale
+    return None
+
+
+def rating_scale(maximum):
+    """Rating scale implied by the largest value seen (5, 10, 100 or the value itself)"""
+    return 5 if maximum <= 5 else 10 if maximum <= 10 else 100 if maximum <= 100 else maximum
+
+
+def column_scale(name, values):
+    """
+    Rating scale for a column, chosen once per upload
+
+    The header wins when it states a scale ('Rating (1-10)'); otherwise the
+    scale is implied by the largest of the given values (the first chunk
+    that has ratings). Both the /analyze statistics and the stored rollups
+    use this, so they agree on the scale.
+
+    Args:
+        name: Column header
+        values: Parsed ratings (np.ndarray, NaN allowed)
+
+    Returns:
+        float or None: Scale, or None if there is no rating to go by
+    """
+    scale = header_scale(name)
+    if scale:
+        return scale
+    numbers = values[~np.isnan(values)]
+    return rating_scale(float(numbers.max())) if numbers.size else None
+
+
+def rating_statistics(values, scale=None):
+    """
+    Statistics for one rating column
+
+    Args:
+        values: Parsed ratings (np.ndarray) or raw cell values
+        scale: Scale from column_scale (default: implied by the largest value)
+
+    Returns:
+        dict or None: count, mean, median, std, min, max, scale and distribution
+    """
+    numbers = values if isinstance(values, np.ndarray) else parse_ratings(values)
+    if numbers.size == 0:
+        return None
+
+    maximum = float(numbers.max())
+    scale = scale or rating_scale(maximum)
+    rounded = np.clip(np.rint(numbers), 0, None).astype(np.int64)
+    counts = np.bincount(rounded)
+
+    return {
+        'count': int(numbers.size),
+        'mean': round(float(numbers.mean()), 2),
+        'median': round(float(np.median(numbers)), 2),
+        'std': round(float(numbers.std()), 2),
+        'min': float(numbers.min()),
+        'max': maximum,
+        'scale': scale,
+        'distribution': {str(value): int(count) for value, count in enumerate(counts) if count}
+    }
+
+
+def _parse_number(value):
+    """Parse '4', '4.5' or '4/5' into a float (NaN if not numeric)"""
+    if value is None:
+        return np.nan
+    match = re.match(r'\s*(-?\d+(?:\.\d+)?)', str(value))
+    return float(match.group(1)) if match else np.nan
+
+
+class ReservoirSample:
+    """
+    Fixed-size uniform sample over a stream of texts (Algorithm R)
+
+    Lets the representative sample be drawn from files that are never held
+    in memory as a whole.
+    """
+
+    def __init__(self, capacity=5000, seed=0):
+        self.capacity = capacity
+        self.items = []
+        self.seen = 0
+        self._rng = np.random.default_rng(seed)
+
+    def extend(self, texts):
+        """Offer a chunk of texts to the sample"""
+        count = len(texts)
+        room = max(0, min(self.capacity - len(self.items), count))
+        if room:
+            self.items.extend(texts[:room])
+
+        if room < count:
+            # Item at stream position p replaces a random slot with probability capacity / (p + 1)
+            positions = np.arange(self.seen + room, self.seen + count)
+            slots = (self._rng.random(count - room) * (positions + 1)).astype(np.int64)
+            for offset in np.flatnonzero(slots < self.capacity):
+                self.items[slots[offset]] = texts[room + offset]
+
+        self.seen += count
+
+
+def representative_sample(texts, sample_size=120, max_cluster_rows=5000, clusters=12, seed=0, population=None):
+    """
+    Pick comments that represent the whole file
+
+    Comments are embedded with hashed TF-IDF bag-of-words vectors, grouped
+    with spherical k-means, and each cluster contributes the comments
+    closest to its centroid in proportion to its size.
+
+    Args:
+        texts: List of feedback strings
+        sample_size: Maximum comments to return
+        max_cluster_rows: Rows used for clustering (uniform subsample above this)
+        clusters: Number of clusters
+        seed: RNG seed (results are deterministic for a given input)
+        population: Total responses the texts were drawn from (defaults to len(texts))
+
+    Returns:
+        list: [{'text': str, 'weight': int, 'cluster': int}] - weight is the
+              approximate number of responses the comment stands for
+    """
+    n = len(texts)
+    population = population or n
+    if n <= sample_size:
+        weight = max(1, int(round(population / n))) if n else 1
+        return [{'text': text, 'weight': weight, 'cluster': 0} for text in texts]
+
+    rng = np.random.default_rng(seed)
+    if n > max_cluster_rows:
+        indices = np.sort(rng.choice(n, size=max_cluster_rows, replace=False))
+    else:
+        indices = np.arange(n)
+    rows_per_point = population / len(indices)
+
+    vectors = _hashed_tfidf([texts[i] for i in indices])
+    k = min(clusters, len(indices))
+    assignment, centroids = _spherical_kmeans(vectors, k, rng)
+
+    similarity = np.einsum('ij,ij->i', vectors, centroids[assignment])
+    cluster_sizes = np.bincount(assignment, minlength=k)
+
+    # Proportional allocation, at least one comment per non-empty cluster
+    quotas = np.maximum(1, np.floor(cluster_sizes / cluster_sizes.sum() * sample_size)).astype(np.int64)
+    quotas[cluster_sizes == 0] = 0
+
+    sample = []
+    for cluster in np.argsort(-cluster_sizes, kind='stable'):
+        members = np.flatnonzero(assignment == cluster)
+        if members.size == 0:
+            continue
+        closest = members[np.argsort(-similarity[members], kind='stable')[:quotas[cluster]]]
+        weight = max(1, int(round(cluster_sizes[cluster] * rows_per_point / len(closest))))
+        for member in closest:
+            sample.append({'text': texts[indices[member]], 'weight': weight, 'cluster': int(cluster)})
+
+    return sample[:sample_size]
+
+
+def _hashed_tfidf(texts):
+    """L2-normalized TF-IDF vectors using feature hashing (HASH_DIM buckets)"""
+    bucket_cache = {}
+    rows = []
+    cols = []
+    for row, text in enumerate(texts):
+        for word in re.findall(r'[a-z]{3,}', text.lower()):
+            bucket = bucket_cache.get(word)
+            if bucket is None:
+                # crc32 rather than hash() so buckets are stable across processes
+                bucket = zlib.crc32(word.encode('utf-8')) % HASH_DIM
+                bucket_cache[word] = bucket
+            rows.append(row)
+            cols.append(bucket)
+
+    matrix = np.zeros((len(texts), HASH_DIM), dtype=np.float32)
+    if rows:
+        np.add.at(matrix, (np.array(rows), np.array(cols)), 1.0)
+
+    document_frequency = np.count_nonzero(matrix, axis=0)
+    idf = np.log((1.0 + len(texts)) / (1.0 + document_frequency)) + 1.0
+    matrix = np.log1p(matrix) * idf.astype(np.float32)
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _spherical_kmeans(vectors, k, rng, iterations=15):
+    """Cosine k-means with k-means++ seeding"""
+    n = len(vectors)
+    centroids = np.empty((k, vectors.shape[1]), dtype=np.float32)
+    centroids[0] = vectors[rng.integers(n)]
+    closest = 1.0 - vectors @ centroids[0]
+    for i in range(1, k):
+        weights = np.clip(closest, 0, None) ** 2
+        total = weights.sum()
+        choice = rng.choice(n, p=weights / total) if total > 0 else rng.integers(n)
+        centroids[i] = vectors[choice]
+        closest = np.minimum(closest, 1.0 - vectors @ centroids[i])
+
+    assignment = np.zeros(n, dtype=np.int64)
+    for iteration in range(iterations):
+        new_assignment = np.argmax(vectors @ centroids.T, axis=1)
+        if iteration and np.array_equal(new_assignment, assignment):
+            break
+        assignment = new_assignment
+        for cluster in range(k):
+            members = vectors[assignment == cluster]
+            if len(members):
+                centroid = members.sum(axis=0)
+                norm = np.linalg.norm(centroid)
+                centroids[cluster] = centroid / norm if norm else centroid
+
+    return assignment, centroids
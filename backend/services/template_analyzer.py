@@ -6,6 +6,49 @@ import os
 from docx import Document
 from PyPDF2 import PdfReader
 import re
+from services import executors
+
+
+# Bump when the analysis output changes, so cached analyses are recomputed
+ANALYZER_VERSION = '2'
+
+# Section heading patterns, tried in order (the pattern text is reported with each section)
+SECTION_PATTERNS = {
+    'markdown': r'^#{1,6}\s+(.+)$',  # Markdown headings
+    'caps': r'^[A-Z\s]{3,}:?$',  # ALL CAPS headings
+    'numbered': r'^\d+\.\s+[A-Z]',  # Numbered sections like "1. Introduction"
+    'roman': r'^[IVX]+\.\s+[A-Z]',  # Roman numeral sections
+    'label': r'^[A-Z][a-z]+\s*:$',  # Title case with colon
+}
+SECTION_PATTERN = re.compile('|'.join(
+    f"(?P<{name}>{pattern[1:].replace('(.+)', '(?:.+)')})" for name, pattern in SECTION_PATTERNS.items()
+))
+
+# Line-start numbering markers; the first character decides which one can match
+NUMBERING_PATTERN = re.compile(r'(?P<numeric>\d+\.)|(?P<alphabetic>[a-z]\))|(?P<roman>[IVX]+\.)|(?P<bullets>[*-]\s+)')
+
+SECTION_KEYWORDS = re.compile('|'.join(re.escape(keyword) for keyword in (
+    'abstract', 'introduction', 'background', 'objective', 'objectives',
+    'methodology', 'method', 'approach', 'timeline', 'schedule',
+    'budget', 'cost', 'resources', 'team', 'participants',
+    'results', 'outcome', 'outcomes', 'conclusion', 'summary',
+    'recommendations', 'next steps', 'follow-up', 'references'
+)))
+
+DATE_PATTERN = re.compile(r'\d{1,2}[-/]\d{1,2}[-/]\d{2,4}')
+BULLET_PATTERN = re.compile(r'[•\-\*]\s+\w')
+BULLET_AT_END = re.compile(r'[•\-\*]\s*$')
+NUMBERED_PATTERN = re.compile(r'\d+\.\s+\w')
+NUMBER_AT_END = re.compile(r'\d+\.\s*$')
+WORD_START = re.compile(r'\w')
+
+# PDF templates are read page by page in a worker process, within these budgets
+PDF_PROCESS_POOL = 'parse'
+
+
+def parse_pool_enabled():
+    """True if PDF templates are parsed in worker processes (TEMPLATE_PARSE_POOL)"""
+    return os.getenv('TEMPLATE_PARSE_POOL', 'true').lower() == 'true'
 
 
 class TemplateAnalyzer:
@@ -135,99 +178,133 @@ class TemplateAnalyzer:
             }
     
     def _analyze_pdf_template(self, file_path):
-        """Analyze PDF template"""
+        """
+        Analyze PDF template
+
+        Only the leading pages are read: extraction stops at the page or
+        character budget, or once further pages stop adding structure.
+        Parsing runs in its own worker process (at most
+        TEMPLATE_PARSE_WORKERS at once) and is killed after
+        TEMPLATE_PDF_TIMEOUT seconds of parsing, so a pathological PDF cannot
+        hold a request thread.
+        """
+        budget = {
+            'max_pages': int(os.getenv('TEMPLATE_PDF_MAX_PAGES', 30)),
+            'max_chars': int(os.getenv('TEMPLATE_PDF_MAX_CHARS', 200000)),
+            'stable_pages': int(os.getenv('TEMPLATE_PDF_STABLE_PAGES', 3))
+        }
+        timeout = float(os.getenv('TEMPLATE_PDF_TIMEOUT', 20))
         try:
-            reader = PdfReader(file_path)
-            
-            # Extract text from all pages
-            full_text = []
-            for page in reader.pages:
-                text = page.extract_text()
-                if text:
-                    full_text.append(text)
-            
-            combined_text = '\n'.join(full_text)
-            structure = self._extract_structure(combined_text)
-            
+            pages = self._read_pdf(file_path, budget, timeout)
+        except TimeoutError:
             return {
-                'success': True,
-                'format': 'pdf',
-                'content': combined_text,
-                'structure': structure,
-                'metadata': {
-                    'page_count': len(reader.pages),
-                    'word_count': len(combined_text.split())
-                }
+                'error': f'Template parsing timed out after {timeout:g}s',
+                'structure': None
             }
         except Exception as e:
             return {
                 'error': f'Error reading PDF file: {str(e)}',
                 'structure': None
             }
+        
+        combined_text = pages['text']
+        structure = self._extract_structure(combined_text)
+        
+        return {
+            'success': True,
+            'format': 'pdf',
+            'content': combined_text,
+            'structure': structure,
+            'metadata': {
+                'page_count': pages['page_count'],
+                'pages_read': pages['pages_read'],
+                'truncated': pages['pages_read'] < pages['page_count'] or pages['stop_reason'] == 'max_chars',
+                'stop_reason': pages['stop_reason'],
+                'word_count': len(combined_text.split())
+            }
+        }
+    
+    def _read_pdf(self, file_path, budget, timeout):
+        """
+        Run read_pdf_pages in a worker process
+
+        Inline only when TEMPLATE_PARSE_POOL=false; a worker that cannot be
+        started is an error rather than a reason to parse without a timeout.
+        """
+        if not parse_pool_enabled():
+            return read_pdf_pages(file_path, **budget)
+        return executors.run_in_process(
+            PDF_PROCESS_POOL, read_pdf_pages, file_path,
+            timeout=timeout, max_workers=os.getenv('TEMPLATE_PARSE_WORKERS', 2), **budget
+        )
     
     def _extract_structure(self, text):
         """
         Extract document structure from text
         Identifies sections, numbering patterns, headings, etc.
+        
+        Single pass over the lines; each line is matched once against the
+        section alternation and once against the numbering alternation.
         """
         lines = text.split('\n')
         
-        # Identify sections (lines that look like headings)
         sections = []
-        section_patterns = [
-            r'^#{1,6}\s+(.+)$',  # Markdown headings
-            r'^[A-Z\s]{3,}:?$',  # ALL CAPS headings
-            r'^\d+\.\s+[A-Z]',   # Numbered sections like "1. Introduction"
-            r'^[IVX]+\.\s+[A-Z]',  # Roman numeral sections
-            r'^[A-Z][a-z]+\s*:$',  # Title case with colon
-        ]
+        common_sections = []
+        numbering_seen = set()
+        has_date_format = False
+        has_bullet_points = False
+        has_numbered_list = False
+        # A bullet / number marker ending a line still counts when the next
+        # non-blank line starts with a word (the old whole-text search spanned lines)
+        bullet_pending = False
+        number_pending = False
         
-        for i, line in enumerate(lines):
-            line = line.strip()
-            if not line:
-                continue
+        for i, raw_line in enumerate(lines):
+            line = raw_line.strip()
             
-            for pattern in section_patterns:
-                if re.match(pattern, line):
+            if line:
+                if bullet_pending or number_pending:
+                    if WORD_START.match(line):
+                        has_bullet_points = has_bullet_points or bullet_pending
+                        has_numbered_list = has_numbered_list or number_pending
+                    bullet_pending = number_pending = False
+                
+                # Identify sections (lines that look like headings)
+                match = SECTION_PATTERN.match(line)
+                if match:
                     sections.append({
                         'line_number': i,
                         'text': line,
-                        'pattern': pattern
+                        'pattern': SECTION_PATTERNS[match.lastgroup]
                     })
-                    break
-        
-        # Identify numbering style
-        numbering_style = 'none'
-        if any(re.match(r'^\d+\.', line.strip()) for line in lines):
-            numbering_style = 'numeric'
-        elif any(re.match(r'^[a-z]\)', line.strip()) for line in lines):
-            numbering_style = 'alphabetic'
-        elif any(re.match(r'^[IVX]+\.', line.strip()) for line in lines):
-            numbering_style = 'roman'
-        elif any(re.match(r'^\*\s+', line.strip()) or re.match(r'^-\s+', line.strip()) for line in lines):
-            numbering_style = 'bullets'
-        
-        # Identify common section names
-        common_sections = []
-        section_keywords = [
-            'abstract', 'introduction', 'background', 'objective', 'objectives',
-            'methodology', 'method', 'approach', 'timeline', 'schedule',
-            'budget', 'cost', 'resources', 'team', 'participants',
-            'results', 'outcome', 'outcomes', 'conclusion', 'summary',
-            'recommendations', 'next steps', 'follow-up', 'references'
-        ]
-        
-        for line in lines:
-            line_lower = line.strip().lower()
-            for keyword in section_keywords:
-                if keyword in line_lower and len(line.strip()) < 50:
-                    common_sections.append(line.strip())
-                    break
+                
+                match = NUMBERING_PATTERN.match(line)
+                if match:
+                    numbering_seen.add(match.lastgroup)
+                
+                # Identify common section names
+                if len(line) < 50 and SECTION_KEYWORDS.search(line.lower()):
+                    common_sections.append(line)
+            
+            # Detect formatting patterns
+            if not has_date_format and DATE_PATTERN.search(raw_line):
+                has_date_format = True
+            if not has_bullet_points:
+                if BULLET_PATTERN.search(raw_line):
+                    has_bullet_points = True
+                elif BULLET_AT_END.search(raw_line):
+                    bullet_pending = True
+            if not has_numbered_list:
+                if NUMBERED_PATTERN.search(raw_line):
+                    has_numbered_list = True
+                elif NUMBER_AT_END.search(raw_line):
+                    number_pending = True
         
-        # Detect formatting patterns
-        has_date_format = bool(re.search(r'\d{1,2}[-/]\d{1,2}[-/]\d{2,4}', text))
-        has_bullet_points = bool(re.search(r'[•\-\*]\s+\w+', text))
-        has_numbered_list = bool(re.search(r'\d+\.\s+\w+', text))
+        # Identify numbering style (first match in priority order)
+        numbering_style = next(
+            (style for style in ('numeric', 'alphabetic', 'roman', 'bullets') if style in numbering_seen),
+            'none'
+        )
         
         return {
             'sections': sections,
@@ -314,3 +391,70 @@ class TemplateAnalyzer:
             instructions.append(f"```\n{sample}\n```")
         
         return '\n'.join(instructions)
+
+
+def read_pdf_pages(file_path, max_pages, max_chars, stable_pages):
+    """
+    Extract text from the leading pages of a PDF
+
+    Pages are extracted one at a time and reading stops at the first of:
+    max_pages pages, max_chars characters, or stable_pages consecutive
+    pages that add no new structure (section kind, numbering style,
+    formatting feature or common section name). Module-level so it can
+    run in a worker process.
+
+    Returns:
+        dict: text, page_count, pages_read and stop_reason
+              ('end', 'max_pages', 'max_chars' or 'stable')
+    """
+    reader = PdfReader(file_path)
+    page_count = len(reader.pages)
+    analyzer = TemplateAnalyzer()
+    
+    texts = []
+    chars = 0
+    seen = set()
+    unchanged = 0
+    stop_reason = 'end'
+    pages_read = 0
+    
+    for page in reader.pages:
+        if pages_read >= max_pages:
+            stop_reason = 'max_pages'
+            break
+        text = page.extract_text() or ''
+        pages_read += 1
+        if chars + len(text) > max_chars:
+            texts.append(text[:max_chars - chars])
+            stop_reason = 'max_chars'
+            break
+        if text:
+            texts.append(text)
+            chars += len(text)
+        
+        features = _structure_features(analyzer._extract_structure(text))
+        if features - seen:
+            seen |= features
+            unchanged = 0
+        elif seen:
+            unchanged += 1
+            if unchanged >= stable_pages:
+                stop_reason = 'stable'
+                break
+    
+    return {
+        'text': '\n'.join(texts),
+        'page_count': page_count,
+        'pages_read': pages_read,
+        'stop_reason': stop_reason
+    }
+
+
+def _structure_features(structure):
+    """Set of the structure traits a page shows (used to notice when pages stop adding any)"""
+    features = {('section', section['pattern']) for section in structure['sections']}
+    features.update(('common', name.lower()) for name in structure['common_sections'])
+    features.update(('feature', name) for name, present in structure['formatting_features'].items() if present)
+    if structure['numbering_style'] != 'none':
+        features.add(('numbering', structure['numbering_style']))
+    return features
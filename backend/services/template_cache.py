@@ -0,0 +1,145 @@
+"""
+Template Analysis Cache
+Reuses TemplateAnalyzer results for template files that were seen before
+
+Clubs upload the same college template again and again. Uploads are stored
+under their SHA-256 (uploads/templates/<sha256><ext>), and the analysis,
+including the create_template_prompt text, is cached by that hash in an
+in-memory LRU tier in front of the Mongo 'template_analyses' collection.
+"""
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from services.metrics import record_cache
+from services.template_analyzer import ANALYZER_VERSION, TemplateAnalyzer
+
+
+COLLECTION = 'template_analyses'
+
+
+def store_template(file_storage, upload_folder):
+    """
+    Save an uploaded template under its content hash
+
+    The upload is hashed first; a file that is already stored is not
+    written again, and different templates never overwrite each other.
+
+    Args:
+        file_storage: werkzeug FileStorage
+        upload_folder: Directory for templates
+
+    Returns:
+        tuple: (sha256 hex digest, stored file path)
+    """
+    stream = file_storage.stream
+    stream.seek(0)
+    digest = hashlib.sha256()
+    for block in iter(lambda: stream.read(1024 * 1024), b''):
+        digest.update(block)
+    sha256 = digest.hexdigest()
+
+    extension = os.path.splitext(file_storage.filename or '')[1].lower()
+    if not re.match(r'^\.[a-z0-9]{1,8}$', extension):
+        extension = ''
+    os.makedirs(upload_folder, exist_ok=True)
+    path = os.path.join(upload_folder, f"{sha256}{extension}")
+    if not os.path.exists(path):
+        stream.seek(0)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            for block in iter(lambda: stream.read(1024 * 1024), b''):
+                f.write(block)
+        # Atomic, so concurrent uploads of the same template never see a partial file
+        os.replace(temp_path, path)
+    return sha256, path
+
+
+class TemplateCache:
+    """Two-tier (memory LRU + Mongo) cache of template analyses"""
+
+    def __init__(self, db=None, capacity=None, analyzer=None):
+        """
+        Args:
+            db: MongoDBClient (memory-only when None or disconnected)
+            capacity: Analyses kept in memory
+            analyzer: TemplateAnalyzer used on a miss
+        """
+        self.db = db
+        self.capacity = int(capacity or os.getenv('TEMPLATE_CACHE_SIZE', 64))
+        self.analyzer = analyzer or TemplateAnalyzer()
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _db_enabled(self):
+        return self.db is not None and self.db.db is not None
+
+    def analyze(self, sha256, path):
+        """
+        Analysis of a stored template, from cache when possible
+
+        Args:
+            sha256: Content hash from store_template
+            path: Stored template path (its extension selects the parser)
+
+        Returns:
+            dict: TemplateAnalyzer result with a 'prompt' key (the
+                  create_template_prompt text) and 'cached' flag
+        """
+        key = f"{sha256}:{os.path.splitext(path)[1].lower()}:{ANALYZER_VERSION}"
+
+        analysis = self._get_memory(key)
+        if analysis is None and self._db_enabled():
+            analysis = self._get_db(key)
+            if analysis is not None:
+                self._put_memory(key, analysis)
+        record_cache('template_analysis', analysis is not None)
+        if analysis is not None:
+            return dict(analysis, cached=True)
+
+        analysis = self.analyzer.analyze_template(path)
+        if analysis.get('success'):
+            analysis['prompt'] = self.analyzer.create_template_prompt(analysis)
+            self._put_memory(key, analysis)
+            self._put_db(key, sha256, analysis)
+        return dict(analysis, cached=False)
+
+    def _get_memory(self, key):
+        with self._lock:
+            analysis = self._memory.get(key)
+            if analysis is not None:
+                self._memory.move_to_end(key)
+            return analysis
+
+    def _put_memory(self, key, analysis):
+        with self._lock:
+            self._memory[key] = analysis
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.capacity:
+                self._memory.popitem(last=False)
+
+    def _get_db(self, key):
+        try:
+            document = self.db.get_collection(COLLECTION).find_one({'_id': key})
+            return document['analysis'] if document else None
+        except Exception as e:
+            print(f"⚠️  Template cache lookup failed: {e}")
+            return None
+
+    def _put_db(self, key, sha256, analysis):
+        if not self._db_enabled():
+            return
+        try:
+            self.db.get_collection(COLLECTION).update_one(
+                {'_id': key},
+                {'$set': {
+                    'sha256': sha256,
+                    'analysis': analysis,
+                    'updated_at': datetime.utcnow()
+                }},
+                upsert=True
+            )
+        except Exception as e:
+            print(f"⚠️  Template cache write failed: {e}")
@@ -0,0 +1,120 @@
+"""
+Template Library
+Standard report templates, analyzed once at startup and served by document type
+
+The standard templates in rag/source_docs used to be retrieved per request
+through RAG (query embedding + FAISS search). They are few and fixed, so
+each one is parsed once with TemplateAnalyzer and its prompt instructions
+and section skeleton are kept in a dict keyed by document type.
+LLMService falls back to RAG only for document types not in the library.
+"""
+import glob
+import os
+import threading
+from services.metrics import record_cache
+from services.template_analyzer import TemplateAnalyzer
+
+
+DEFAULT_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'rag', 'source_docs')
+
+# Template file stem -> document type used by the generate endpoints;
+# other '<name>_template.txt' files are served as '<name>'
+DOCUMENT_TYPES = {
+    'event_plan_template': 'event_plan',
+    'event_report_template': 'report',
+    'event_summary_template': 'summary'
+}
+
+SKELETON_MARKERS = ('Title:', '[TABLE:', '##', '●')
+
+
+class TemplateLibrary:
+    """Precomputed standard templates, looked up by document type"""
+
+    def __init__(self, folder=None, analyzer=None):
+        """
+        Args:
+            folder: Directory of .txt templates (defaults to rag/source_docs)
+            analyzer: TemplateAnalyzer used to parse them
+        """
+        self.folder = folder or os.getenv('TEMPLATE_LIBRARY_DIR') or DEFAULT_FOLDER
+        self.analyzer = analyzer or TemplateAnalyzer()
+        self._templates = {}
+
+    def load(self):
+        """
+        Parse every template in the folder
+
+        Returns:
+            int: Number of templates loaded
+        """
+        templates = {}
+        for path in sorted(glob.glob(os.path.join(self.folder, '*.txt'))):
+            stem = os.path.splitext(os.path.basename(path))[0]
+            document_type = DOCUMENT_TYPES.get(stem, stem[:-len('_template')] if stem.endswith('_template') else stem)
+
+            analysis = self.analyzer.analyze_template(path)
+            if not analysis.get('success'):
+                print(f"⚠️  Skipping template {path}: {analysis.get('error')}")
+                continue
+
+            text = analysis['content']
+            templates[document_type] = {
+                'document_type': document_type,
+                'filename': os.path.basename(path),
+                'analysis': analysis,
+                'skeleton': section_skeleton(text),
+                'prompt': f"""Use this professional template format:
+
+{text}
+
+Replace placeholders like [EVENT_NAME], [DATE], [VENUE], etc. with actual details from the event description."""
+            }
+
+        self._templates = templates
+        return len(templates)
+
+    def get(self, document_type):
+        """
+        Precomputed template for a document type
+
+        Returns:
+            dict: document_type, filename, analysis, skeleton and prompt,
+                  or None if the library has no template for the type
+        """
+        template = self._templates.get(document_type)
+        record_cache('template_library', template is not None)
+        return template
+
+    def document_types(self):
+        return sorted(self._templates)
+
+
+def section_skeleton(text):
+    """Title, [TABLE: ...] and section marker lines of a template, in order"""
+    return [
+        line.strip()
+        for line in text.split('\n')
+        if line.strip().startswith(SKELETON_MARKERS)
+    ]
+
+
+def library_enabled():
+    """True if standard templates are served from the library instead of RAG"""
+    return os.getenv('TEMPLATE_LIBRARY', 'true').lower() == 'true'
+
+
+_library = None
+_library_lock = threading.Lock()
+
+
+def get_template_library():
+    """Shared TemplateLibrary for the process (loaded on first use)"""
+    global _library
+    if _library is None:
+        with _library_lock:
+            if _library is None:
+                library = TemplateLibrary()
+                library.load()
+                _library = library
+    return _library
@@ -0,0 +1,109 @@
+"""
+Shared test fixtures
+
+Tests run from backend/ (python -m pytest) without MongoDB or an API key;
+services that take a MongoDBClient get MemoryDB instead.
+"""
+import os
+import sys
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class MemoryCollection:
+    """The few collection methods the services call, over a dict keyed by _id"""
+
+    def __init__(self):
+        self.documents = {}
+        self._next_id = 0
+
+    def _matches(self, document, query):
+        return all(document.get(key) == value for key, value in query.items())
+
+    def insert_one(self, document):
+        if '_id' not in document:
+            self._next_id += 1
+            document['_id'] = self._next_id
+        if document['_id'] in self.documents:
+            raise DuplicateKeyError(f"duplicate _id {document['_id']}")
+        self.documents[document['_id']] = document
+        return document['_id']
+
+    def find_one(self, query):
+        return next((document for document in self.documents.values() if self._matches(document, query)), None)
+
+    def find(self, query=None):
+        return [document for document in self.documents.values() if self._matches(document, query or {})]
+
+    def delete_many(self, query):
+        for key in [key for key, document in self.documents.items() if self._matches(document, query)]:
+            del self.documents[key]
+
+    def upsert(self, query, update):
+        document = self.find_one(query)
+        if document is None:
+            document = dict(query, **update.get('$setOnInsert', {}))
+            self.insert_one(document)
+        for field, amount in update.get('$inc', {}).items():
+            document[field] = document.get(field, 0) + amount
+        document.update(update.get('$set', {}))
+
+
+class MemoryDB:
+    """Stand-in for MongoDBClient backed by MemoryCollection"""
+
+    db_name = 'memory'
+
+    def __init__(self):
+        self.db = self
+        self.collections = {}
+
+    def __getattr__(self, name):
+        # db.<collection> attribute access, as on a pymongo Database
+        if name.startswith('_') or name == 'collections':
+            raise AttributeError(name)
+        return self.get_collection(name)
+
+    def is_connected(self):
+        return True
+
+    def get_collection(self, name):
+        return self.collections.setdefault(name, MemoryCollection())
+
+    def insert_one(self, name, document):
+        return self.get_collection(name).insert_one(document)
+
+    def insert_many(self, name, documents, ordered=False):
+        return [self.get_collection(name).insert_one(document) for document in documents]
+
+    def find_one(self, name, query):
+        return self.get_collection(name).find_one(query)
+
+    def bulk_write(self, name, operations, ordered=False):
+        for operation in operations:
+            self.get_collection(name).upsert(operation._filter, operation._doc)
+
+    def create_index(self, name, keys, **kwargs):
+        return None
+
+
+class FakeLLM:
+    """Returns a short report, or fails for descriptions containing 'fail'"""
+
+    def generate_event_report_with_template(self, event_description, document_type, template_analysis=None):
+        if 'fail' in event_description:
+            raise RuntimeError('LLM unavailable')
+        return f"# {document_type.title()}\n\n## Overview\n{event_description}\n\n● Attendance was high"
+
+
+@pytest.fixture
+def memory_db():
+    return MemoryDB()
+
+
+@pytest.fixture
+def fake_llm():
+    return FakeLLM()
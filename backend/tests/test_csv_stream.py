@@ -0,0 +1,65 @@
+"""
+FeedbackCSVReader: encoding detection, column resolution and chunking
+"""
+import codecs
+import io
+
+from services.csv_stream import SNIFF_BYTES, FeedbackCSVReader, detect_encoding
+
+
+CSV = 'Name,Feedback,Rating\r\nAsha,"Great talk, très bien",5\r\nRavi,Café was cold,3\r\n'
+
+
+def read_all(data, chunk_size=10000):
+    reader = FeedbackCSVReader(io.BytesIO(data))
+    return reader, list(reader.iter_chunks(chunk_size))
+
+
+def test_utf8_bom_is_stripped_from_the_header():
+    reader, chunks = read_all(codecs.BOM_UTF8 + CSV.encode('utf-8'))
+    assert reader.encoding == 'utf-8-sig'
+    assert reader.fieldnames == ['Name', 'Feedback', 'Rating']
+    assert reader.feedback_column == 'Feedback'
+    assert chunks == [(['Great talk, très bien', 'Café was cold'], {'Rating': ['5', '3']})]
+
+
+def test_utf16_bom():
+    reader, chunks = read_all(CSV.encode('utf-16'))
+    assert reader.encoding == 'utf-16'
+    assert chunks[0][0] == ['Great talk, très bien', 'Café was cold']
+
+
+def test_cp1252_fallback():
+    data = 'Feedback\nCafé – “excellent”\n'.encode('cp1252')
+    assert detect_encoding(data) == 'cp1252'
+    _, chunks = read_all(data)
+    assert chunks == [(['Café – “excellent”'], {})]
+
+
+def test_utf8_character_split_at_the_sniff_boundary():
+    # 'é' straddles the end of the sniffed prefix; still detected as UTF-8
+    padding = 'x' * (SNIFF_BYTES - len('Feedback\n') - 1)
+    data = f'Feedback\n{padding}é\n'.encode('utf-8')
+    assert data[:SNIFF_BYTES].endswith(b'\xc3')
+
+    reader, chunks = read_all(data)
+    assert reader.encoding == 'utf-8'
+    assert chunks[0][0] == [f'{padding}é']
+
+
+def test_chunks_and_missing_feedback_fallback():
+    rows = ''.join(f'row {i},,{i % 5 + 1}\n' for i in range(25))
+    reader, chunks = read_all(f'Name,Comment,Rating (1-5)\n{rows}\n'.encode('utf-8'), chunk_size=10)
+
+    # Empty comments fall back to the first column; the blank line is skipped
+    assert [len(texts) for texts, _ in chunks] == [10, 10, 5]
+    assert chunks[0][0][0] == 'row 0'
+    assert chunks[2][1]['Rating (1-5)'] == ['1', '2', '3', '4', '5']
+    assert reader.rows_read == 26
+
+
+def test_empty_upload():
+    reader, chunks = read_all(b'')
+    assert reader.fieldnames == []
+    assert reader.feedback_column is None
+    assert chunks == []
@@ -0,0 +1,45 @@
+"""
+Event endpoints accept the same document output_format values
+"""
+import pytest
+from flask import Flask
+
+from routes import event_routes
+from services import job_queue
+
+
+@pytest.fixture
+def client(memory_db, fake_llm, monkeypatch):
+    monkeypatch.setattr(job_queue, '_queue', job_queue.JobQueue(workers=1))
+    app = Flask(__name__)
+    app.db = memory_db
+    app.llm = fake_llm
+    app.register_blueprint(event_routes.bp)
+    yield app.test_client()
+    job_queue._queue.shutdown()
+
+
+@pytest.mark.parametrize('output_format', ['document', 'docx', 'DOCX'])
+def test_generate_accepts_document_and_docx(client, output_format):
+    response = client.post('/api/events/generate', data={
+        'event_description': 'AI workshop',
+        'output_format': output_format
+    })
+    assert response.status_code == 200
+    assert response.mimetype == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+
+@pytest.mark.parametrize('output_format', ['document', 'docx'])
+def test_batch_accepts_document_and_docx(client, output_format):
+    response = client.post('/api/events/batch', data={
+        'events': '["AI workshop"]',
+        'output_format': output_format
+    })
+    assert response.status_code == 202
+    job = job_queue.get_job_queue().get(response.get_json()['job_id'])
+    assert job.output_format == 'docx'
+
+
+def test_unknown_format_is_rejected_on_both(client):
+    assert client.post('/api/events/generate', data={'event_description': 'x', 'output_format': 'odt'}).status_code == 400
+    assert client.post('/api/events/batch', data={'events': '["x"]', 'output_format': 'odt'}).status_code == 400
@@ -0,0 +1,73 @@
+"""
+run_in_process: one process per task, timeouts that only count running time
+"""
+import os
+import threading
+import time
+
+import pytest
+
+from services import executors
+
+
+def nap(seconds, value=None):
+    time.sleep(seconds)
+    return value
+
+
+def fail():
+    raise ValueError('bad template')
+
+
+def crash():
+    os._exit(3)
+
+
+def run_threads(*calls):
+    """Run (name, fn, args, kwargs) calls concurrently; returns result or exception per call"""
+    outcomes = [None] * len(calls)
+
+    def run(index, name, fn, args, kwargs):
+        try:
+            outcomes[index] = executors.run_in_process(name, fn, *args, **kwargs)
+        except Exception as e:
+            outcomes[index] = e
+
+    threads = [threading.Thread(target=run, args=(index,) + call) for index, call in enumerate(calls)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+def test_returns_the_result_and_raises_the_error():
+    assert executors.run_in_process('test-basic', nap, 0, value={'pages': 2}) == {'pages': 2}
+    with pytest.raises(ValueError, match='bad template'):
+        executors.run_in_process('test-basic', fail)
+
+
+def test_timeout_kills_only_the_overrunning_task():
+    started = time.monotonic()
+    slow, healthy = run_threads(
+        ('test-kill', nap, (30,), {'timeout': 1, 'max_workers': 2}),
+        ('test-kill', nap, (2, 'parsed'), {'timeout': 10, 'max_workers': 2})
+    )
+    assert isinstance(slow, TimeoutError)
+    assert healthy == 'parsed'
+    assert time.monotonic() - started < 20
+
+
+def test_time_waiting_for_a_slot_does_not_count():
+    first, queued = run_threads(
+        ('test-queue', nap, (2, 'first'), {'timeout': 10, 'max_workers': 1}),
+        ('test-queue', nap, (0.5, 'queued'), {'timeout': 1.5, 'max_workers': 1})
+    )
+    assert first == 'first'
+    assert queued == 'queued'
+
+
+def test_crashed_worker_is_an_error():
+    with pytest.raises(RuntimeError, match='exit code 3'):
+        executors.run_in_process('test-crash', crash, timeout=10)
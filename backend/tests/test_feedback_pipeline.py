@@ -0,0 +1,37 @@
+"""
+FeedbackPipeline.merge: totals when some LLM batches fail
+"""
+from services.feedback_pipeline import FeedbackPipeline
+
+
+def batch(positive, neutral, negative, score):
+    return {
+        'overall_sentiment': 'positive',
+        'satisfaction_score': score,
+        'sentiment_distribution': {'positive': positive, 'neutral': neutral, 'negative': negative},
+        'key_themes': ['venue'],
+        'summary': 'Fine'
+    }
+
+
+def test_failed_batches_are_reported_next_to_the_total():
+    pipeline = FeedbackPipeline(llm=None, local_scoring=False)
+    merged = pipeline.merge(
+        [40, 30, 30],
+        [batch(30, 5, 5, 4.0), {'error': 'Batch analysis failed: timeout'}, batch(10, 10, 10, 3.0)]
+    )
+
+    assert merged['total_responses'] == 100
+    assert merged['analyzed_responses'] == 70
+    assert merged['failed_batches'] == 1
+    assert sum(merged['sentiment_distribution'].values()) == merged['analyzed_responses']
+    assert '30 of 100 responses were not analyzed' in merged['summary']
+
+
+def test_all_batches_analyzed():
+    pipeline = FeedbackPipeline(llm=None, local_scoring=False)
+    merged = pipeline.merge([10, 10], [batch(5, 5, 0, 4.0), batch(2, 8, 0, 3.0)])
+
+    assert merged['analyzed_responses'] == merged['total_responses'] == 20
+    assert merged['failed_batches'] == 0
+    assert 'not analyzed' not in merged['summary']
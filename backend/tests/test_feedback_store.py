@@ -0,0 +1,138 @@
+"""
+FeedbackStore: rating normalization and once-per-upload rollups
+"""
+import io
+from datetime import datetime
+
+from services.feedback_pipeline import FeedbackPipeline
+from services.feedback_store import ROLLUPS_COLLECTION, ROWS_COLLECTION, FeedbackStore, upload_hash
+
+
+EVENT_DATE = datetime(2026, 3, 10)
+
+
+def make_store(db, content_hash='abc', **kwargs):
+    kwargs.setdefault('event_name', 'AI Workshop')
+    kwargs.setdefault('club_id', 'tech')
+    return FeedbackStore(db, event_date=EVENT_DATE, content_hash=content_hash, **kwargs)
+
+
+def record(store, chunks, column='Rating'):
+    store.check_duplicate()
+    total = 0
+    for ratings in chunks:
+        texts = ['great session'] * len(ratings)
+        store.record_chunk(texts, {column: [str(value) for value in ratings]})
+        total += len(texts)
+    return store.record_upload('feedback.csv', {}, total)
+
+
+def rollup(db, scope, key):
+    period = '2026-W11' if scope in ('week', 'club_week') else 'all'
+    return db.find_one(ROLLUPS_COLLECTION, {'scope': scope, 'key': key, 'period': period})
+
+
+def test_scale_from_header_applies_to_every_chunk(memory_db):
+    store = make_store(memory_db)
+    # The first chunk of a 1-10 survey never goes above 5
+    record(store, [[4, 5], [10, 8]], column='Rating (1-10)')
+
+    event = rollup(memory_db, 'event', 'ai-workshop')
+    assert event['rating_count'] == 4
+    assert event['rating_sum'] == (4 + 5 + 10 + 8) / 10 * 5
+
+
+def test_scale_from_first_chunk_is_kept(memory_db):
+    store = make_store(memory_db)
+    record(store, [[10, 8], [4, 5]])
+
+    event = rollup(memory_db, 'event', 'ai-workshop')
+    assert event['rating_sum'] == (10 + 8 + 4 + 5) / 10 * 5
+    ratings = sorted(row['rating'] for row in memory_db.get_collection(ROWS_COLLECTION).find())
+    assert ratings == [2.0, 2.5, 4.0, 5.0]
+
+
+def test_rollups_applied_once_per_upload(memory_db):
+    first = make_store(memory_db)
+    upload_id = record(first, [[4, 5, 3]])
+
+    again = make_store(memory_db)
+    assert record(again, [[4, 5, 3]]) == upload_id
+    assert again.duplicate_of == upload_id
+    assert again.rows_written == 0
+
+    for scope, key in (('event', 'ai-workshop'), ('club', 'tech'), ('club_week', 'tech'), ('week', 'all')):
+        assert rollup(memory_db, scope, key)['responses'] == 3
+    assert len(memory_db.get_collection(ROWS_COLLECTION).find()) == 3
+    assert len(memory_db.get_collection('feedback').find()) == 1
+
+
+def test_concurrent_duplicate_removes_its_rows(memory_db):
+    first = make_store(memory_db)
+    second = make_store(memory_db)
+    first.check_duplicate()
+    second.check_duplicate()
+    for store in (first, second):
+        store.record_chunk(['good'] * 2, {'Rating': ['5', '4']})
+
+    upload_id = first.record_upload('feedback.csv', {}, 2)
+    assert second.record_upload('feedback.csv', {}, 2) == upload_id
+
+    assert rollup(memory_db, 'event', 'ai-workshop')['responses'] == 2
+    rows = memory_db.get_collection(ROWS_COLLECTION).find()
+    assert {row['upload_id'] for row in rows} == {first.upload_id}
+
+
+def test_same_file_for_another_event_is_recorded(memory_db):
+    record(make_store(memory_db), [[5]])
+    record(make_store(memory_db, event_name='Hackathon'), [[5]])
+
+    assert rollup(memory_db, 'club', 'tech')['responses'] == 2
+
+
+def test_upload_hash_rewinds_the_stream():
+    stream = io.BytesIO(b'feedback\ngood\n')
+    assert upload_hash(stream) == upload_hash(io.BytesIO(b'feedback\ngood\n'))
+    assert stream.read() == b'feedback\ngood\n'
+
+
+def test_unnamed_reupload_is_a_duplicate(memory_db):
+    record(make_store(memory_db, event_name=None), [[5]])
+    again = make_store(memory_db, event_name=None)
+    record(again, [[5]])
+
+    assert again.duplicate_of is not None
+    assert rollup(memory_db, 'club', 'tech')['responses'] == 1
+
+
+class SummaryLLM:
+    def analyze_feedback(self, text, context=None):
+        return {'summary': 'Good', 'key_themes': [], 'praises': [], 'issues': [], 'recommendations': []}
+
+
+def test_analysis_and_rollups_use_the_same_scale(memory_db):
+    store = make_store(memory_db)
+    store.check_duplicate()
+    pipeline = FeedbackPipeline(SummaryLLM(), local_scoring=True)
+    chunks = [(['great session'] * 2, {'Rating (1-10)': ['4', '5']})]
+
+    analysis = pipeline.analyze_stream(chunks, on_chunk=store.record_chunk)
+    store.record_upload('feedback.csv', analysis, 2)
+
+    # Nobody rated above 5, but the header says 1-10
+    assert analysis['local_scoring']['rating_columns']['Rating (1-10)']['scale'] == 10
+    event = rollup(memory_db, 'event', 'ai-workshop')
+    assert analysis['satisfaction_score'] == round(event['rating_sum'] / event['rating_count'], 1) == 2.2
+
+
+def test_reupload_in_a_later_week_is_a_duplicate(memory_db):
+    # No event date: the week comes from the upload time
+    first = FeedbackStore(memory_db, event_name='AI Workshop', club_id='tech', content_hash='abc')
+    upload_id = record(first, [[5, 4]])
+    later = FeedbackStore(memory_db, event_name='AI Workshop', club_id='tech', content_hash='abc',
+                          event_date=datetime(2030, 1, 7))
+    assert later.week != first.week
+
+    assert record(later, [[5, 4]]) == upload_id
+    assert later.duplicate_of == upload_id
+    assert len(memory_db.get_collection(ROWS_COLLECTION).find()) == 2
@@ -0,0 +1,99 @@
+"""
+ImageCache: exact and near-duplicate lookups
+"""
+import io
+
+from PIL import Image, ImageDraw
+
+from services.image_cache import ImageCache, ImageFingerprint, hamming_distance
+
+
+def text_page(lines, size=(800, 1000)):
+    """JPEG of black text lines on a white page"""
+    img = Image.new('RGB', size, 'white')
+    draw = ImageDraw.Draw(img)
+    for index, line in enumerate(lines):
+        draw.text((40, 40 + index * 18), line, fill='black')
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def photo(size=(640, 480), quality=90):
+    """JPEG with a gradient, so its dHash has structure"""
+    img = Image.new('RGB', size)
+    img.putdata([(x * 255 // size[0], y * 255 // size[1], 128) for y in range(size[1]) for x in range(size[0])])
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+INVOICE = text_page(['INVOICE #1042', 'Sound system rental   Rs. 12,000', 'Total due: Rs. 14,160'])
+RECEIPT = text_page(['RECEIPT', 'Tea and snacks   Rs. 850', 'Paid in cash'])
+
+
+def result(text):
+    return {'success': True, 'text': text}
+
+
+def test_different_text_documents_share_a_dhash():
+    # The premise of the exact-match rule below
+    invoice = ImageFingerprint.from_source(INVOICE)
+    receipt = ImageFingerprint.from_source(RECEIPT)
+    assert invoice.sha256 != receipt.sha256
+    assert hamming_distance(invoice.phash, receipt.phash) <= 3
+
+
+def test_ocr_and_analysis_need_an_exact_match():
+    cache = ImageCache(capacity=16)
+    invoice = ImageFingerprint.from_source(INVOICE)
+    receipt = ImageFingerprint.from_source(RECEIPT)
+    for operation in ('ocr', 'analyze'):
+        cache.put(invoice, operation, 'model', result('INVOICE #1042'))
+
+        assert cache.get(receipt, operation, 'model') is None
+        assert cache.get(invoice, operation, 'model')['text'] == 'INVOICE #1042'
+
+
+def test_caption_reused_for_a_re_encoded_copy():
+    cache = ImageCache(capacity=16)
+    original = ImageFingerprint.from_source(photo(quality=90))
+    copy = ImageFingerprint.from_source(photo(quality=60))
+    assert original.sha256 != copy.sha256
+
+    cache.put(original, 'caption', 'model', result('a gradient'))
+    assert cache.get(copy, 'caption', 'model')['text'] == 'a gradient'
+    assert cache.get(copy, 'ocr', 'model') is None
+
+
+def test_resized_copy_hits_for_caption_and_tags_only():
+    cache = ImageCache(capacity=16)
+    original = ImageFingerprint.from_source(photo((640, 480)))
+    resized = ImageFingerprint.from_source(photo((320, 240)))
+    assert original.sha256 != resized.sha256
+    assert hamming_distance(original.phash, resized.phash) <= 3
+
+    for operation in ('caption', 'tags', 'ocr', 'analyze'):
+        cache.put(original, operation, 'model', result(operation))
+    assert cache.get(resized, 'caption', 'model')['text'] == 'caption'
+    assert cache.get(resized, 'tags', 'model')['text'] == 'tags'
+    assert cache.get(resized, 'ocr', 'model') is None
+    assert cache.get(resized, 'analyze', 'model') is None
+
+
+def test_near_match_requires_the_same_aspect_ratio():
+    cache = ImageCache(capacity=16)
+    original = ImageFingerprint.from_source(photo((640, 480)))
+    stretched = ImageFingerprint.from_source(photo((640, 360)))
+    assert hamming_distance(original.phash, stretched.phash) <= 3
+
+    cache.put(original, 'tags', 'model', result('gradient'))
+    assert cache.get(stretched, 'tags', 'model') is None
+
+
+def test_variant_is_part_of_the_key():
+    cache = ImageCache(capacity=16)
+    invoice = ImageFingerprint.from_source(INVOICE)
+    cache.put(invoice, 'caption', 'model|context a', result('first'))
+
+    assert cache.get(invoice, 'caption', 'model|context b') is None
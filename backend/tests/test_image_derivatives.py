@@ -0,0 +1,50 @@
+"""
+DerivativeStore: downscaled copies and the keep-the-original marker
+"""
+import os
+
+from PIL import Image
+
+from services import image_derivatives
+from services.image_derivatives import DerivativeStore
+
+
+def save_image(path, size, quality=95):
+    img = Image.new('RGB', size)
+    img.putdata([(x * 255 // size[0], y * 255 // size[1], (x * y) % 256) for y in range(size[1]) for x in range(size[0])])
+    img.save(path, 'JPEG', quality=quality)
+    return str(path)
+
+
+def test_large_photo_gets_a_derivative(tmp_path, monkeypatch):
+    monkeypatch.setenv('IMAGE_PROCESS_POOL', 'false')
+    store = DerivativeStore(root=str(tmp_path / 'derivatives'), max_side=200, quality=70)
+    original = save_image(tmp_path / 'large.jpg', (1200, 900))
+
+    derivative = store.get(original)
+    assert derivative != original
+    assert os.path.getsize(derivative) < os.path.getsize(original)
+    assert store.get(original) == derivative
+
+
+def test_small_original_is_remembered(tmp_path, monkeypatch):
+    monkeypatch.setenv('IMAGE_PROCESS_POOL', 'false')
+    store = DerivativeStore(root=str(tmp_path / 'derivatives'), max_side=1200, quality=95)
+    original = save_image(tmp_path / 'small.jpg', (120, 90), quality=40)
+    assert store.get(original) == original
+
+    def fail(*args, **kwargs):
+        raise AssertionError('original was processed again')
+
+    monkeypatch.setattr(image_derivatives, 'preprocess_in_pool', fail)
+    assert store.get(original) == original
+
+
+def test_cleanup_removes_unused_files(tmp_path, monkeypatch):
+    monkeypatch.setenv('IMAGE_PROCESS_POOL', 'false')
+    store = DerivativeStore(root=str(tmp_path / 'derivatives'), max_side=200, quality=70)
+    derivative = store.get(save_image(tmp_path / 'large.jpg', (1200, 900)))
+    os.utime(derivative, (0, 0))
+
+    store.cleanup(days=30)
+    assert not os.path.exists(derivative)
@@ -0,0 +1,98 @@
+"""
+Batch report jobs: per-job files, ZIP packaging and expiry
+"""
+import io
+import json
+import os
+import time
+import zipfile
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from services.job_queue import BatchJob, JobQueue
+
+
+def upload(filename, data):
+    return FileStorage(stream=io.BytesIO(data), filename=filename)
+
+
+def test_images_are_copied_into_the_job_directory():
+    job = BatchJob(
+        [{'event_description': 'Workshop'}],
+        'report',
+        images=[upload('stage.jpg', b'first'), upload('stage.jpg', b'second'), upload('', b'')]
+    )
+    try:
+        assert [os.path.basename(path) for path in job.image_paths] == ['stage.jpg', 'stage_2.jpg']
+        for path, data in zip(job.image_paths, (b'first', b'second')):
+            assert os.path.dirname(path).startswith(job.directory)
+            with open(path, 'rb') as f:
+                assert f.read() == data
+    finally:
+        job.remove_files()
+    assert not os.path.exists(job.directory)
+
+
+def wait(job, seconds=30):
+    deadline = time.time() + seconds
+    while not job.finished:
+        assert time.time() < deadline, 'batch did not finish'
+        time.sleep(0.05)
+
+
+def test_zip_contains_finished_documents_and_manifest(memory_db, fake_llm):
+    queue = JobQueue(workers=2)
+    job = queue.submit(
+        fake_llm,
+        memory_db,
+        [{'event_description': 'AI workshop'}, {'event_description': 'fail please'}, {'event_description': 'Hackathon'}]
+    )
+    wait(job)
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(job.iter_zip(chunk_size=1024))))
+        names = archive.namelist()
+        assert names[-1] == 'manifest.json'
+        documents = sorted(names[:-1])
+        assert [name[:4] for name in documents] == ['001_', '003_']
+        for name in documents:
+            assert name.endswith('.docx')
+            assert archive.read(name)[:2] == b'PK'
+
+        manifest = json.loads(archive.read('manifest.json'))
+        assert manifest['counts'] == {'queued': 0, 'running': 0, 'done': 2, 'failed': 1}
+        assert manifest['items'][1]['error'] == 'LLM unavailable'
+        assert len(memory_db.get_collection('events').find({'batch_id': job.id})) == 2
+    finally:
+        queue.shutdown()
+
+
+def test_status_lookup_expires_old_jobs(memory_db, fake_llm):
+    queue = JobQueue(workers=1, ttl=60)
+    job = queue.submit(fake_llm, memory_db, [{'event_description': 'Workshop'}])
+    wait(job)
+    assert queue.get(job.id) is job
+
+    job.created_at -= 120
+    assert queue.get(job.id) is None
+    assert not os.path.exists(job.directory)
+
+
+def test_expiry_during_a_download_does_not_cut_it_short(memory_db, fake_llm):
+    queue = JobQueue(workers=2, ttl=60)
+    job = queue.submit(fake_llm, memory_db, [{'event_description': 'Workshop'}, {'event_description': 'Hackathon'}])
+    wait(job)
+
+    chunks = job.iter_zip(chunk_size=256)
+    first = next(chunks)
+    # A status poll from another client expires the job mid-stream
+    job.created_at -= 120
+    assert queue.get(job.id) is None
+    assert not os.path.exists(job.directory)
+
+    archive = zipfile.ZipFile(io.BytesIO(first + b''.join(chunks)))
+    assert len(archive.namelist()) == 3
+    assert archive.testzip() is None
+
+    with pytest.raises(FileNotFoundError):
+        job.iter_zip()
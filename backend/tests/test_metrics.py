@@ -0,0 +1,37 @@
+"""
+MetricsRegistry: per-thread shards
+"""
+import threading
+
+from services.metrics import MetricsRegistry
+
+
+def test_dead_thread_shards_are_folded_in_without_a_scrape():
+    registry = MetricsRegistry()
+    for _ in range(500):
+        thread = threading.Thread(target=registry.inc, args=('requests', (('endpoint', 'analyze'),)))
+        thread.start()
+        thread.join()
+
+    assert len(registry._shards) <= 2 * MetricsRegistry.PRUNE_THRESHOLD
+    counters, _ = registry.snapshot()
+    assert counters[('requests', (('endpoint', 'analyze'),))] == 500
+
+
+def test_live_shards_are_kept():
+    registry = MetricsRegistry()
+    release = threading.Event()
+
+    def record_and_wait():
+        registry.observe('latency', (), 0.2)
+        release.wait()
+
+    threads = [threading.Thread(target=record_and_wait) for _ in range(MetricsRegistry.PRUNE_THRESHOLD + 10)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    _, histograms = registry.snapshot()
+    assert histograms[('latency', ())][-1] == len(threads)
@@ -0,0 +1,65 @@
+"""
+MOU downloads: rendered once per content version, persisted on request
+"""
+import os
+
+import pytest
+from bson import ObjectId
+from flask import Flask
+
+from routes import mou_routes
+from services.document_cache import DocumentCache
+
+
+@pytest.fixture
+def client(memory_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(mou_routes, '_document_cache', DocumentCache('mou', root=str(tmp_path / 'cache')))
+    monkeypatch.setattr(mou_routes, 'persisted_path', lambda filename: str(tmp_path / 'mou' / filename))
+    os.makedirs(tmp_path / 'mou')
+
+    app = Flask(__name__)
+    app.db = memory_db
+    app.register_blueprint(mou_routes.bp)
+    return app.test_client()
+
+
+def add_mou(db):
+    mou_id = ObjectId()
+    db.mou_documents.insert_one({
+        '_id': mou_id,
+        'party1_name': 'Tech Club',
+        'party2_name': 'Acme Labs',
+        'content': '1. PURPOSE\nJoint workshops.\n\n2. TERM\nOne year.'
+    })
+    return str(mou_id)
+
+
+def test_cache_hit_is_persisted(client, memory_db, tmp_path):
+    mou_id = add_mou(memory_db)
+    first = client.get(f'/api/mou/download/{mou_id}')
+    assert first.status_code == 200
+    assert not os.listdir(tmp_path / 'mou')
+
+    second = client.get(f'/api/mou/download/{mou_id}?persist=true')
+    assert second.status_code == 200
+    saved = os.listdir(tmp_path / 'mou')
+    assert len(saved) == 1
+    with open(tmp_path / 'mou' / saved[0], 'rb') as f:
+        assert f.read() == first.data
+
+
+def test_unchanged_mou_is_not_modified(client, memory_db):
+    mou_id = add_mou(memory_db)
+    etag = client.get(f'/api/mou/download/{mou_id}').headers['ETag']
+
+    assert client.get(f'/api/mou/download/{mou_id}', headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_cleanup_removes_unused_files(tmp_path):
+    cache = DocumentCache('mou', root=str(tmp_path))
+    key = cache.key('1', 'content', '1')
+    path = cache.get_or_render(key, lambda: b'docx')
+    os.utime(path, (0, 0))
+
+    cache.cleanup(days=30)
+    assert not os.path.exists(path)
@@ -0,0 +1,32 @@
+"""
+Rating columns: scales stated in headers
+"""
+import pytest
+
+from services.sentiment_scorer import header_scale
+
+
+@pytest.mark.parametrize('header, scale', [
+    ('Rating (1-10)', 10),
+    ('Rating (1 – 5)', 5),
+    ('Score 0 to 100', 100),
+    ('Rating 1 to 10', 10),
+    ('Score out of 5', 5),
+    ('Stars /5', 5),
+    ('Rating (x/10)', 10),
+])
+def test_stated_scale(header, scale):
+    assert header_scale(header) == scale
+
+
+@pytest.mark.parametrize('header', [
+    'Satisfaction 2024-25',
+    'Satisfaction 2024/25',
+    'Rating (Q3-2025)',
+    'Rating 5-10',
+    'Score out of 1000',
+    'Rating',
+    None,
+])
+def test_no_stated_scale(header):
+    assert header_scale(header) is None
@@ -0,0 +1,124 @@
+"""
+TemplateAnalyzer._extract_structure: the single-pass scan matches the
+original per-pattern implementation
+"""
+import glob
+import os
+import random
+import re
+
+import pytest
+
+from services.template_analyzer import TemplateAnalyzer
+
+
+def reference_extract_structure(text):
+    """The original _extract_structure (one regex pass per feature), kept as the oracle"""
+    lines = text.split('\n')
+
+    sections = []
+    section_patterns = [
+        r'^#{1,6}\s+(.+)$',
+        r'^[A-Z\s]{3,}:?$',
+        r'^\d+\.\s+[A-Z]',
+        r'^[IVX]+\.\s+[A-Z]',
+        r'^[A-Z][a-z]+\s*:$',
+    ]
+    for i, line in enumerate(lines):
+        line = line.strip()
+        if not line:
+            continue
+        for pattern in section_patterns:
+            if re.match(pattern, line):
+                sections.append({'line_number': i, 'text': line, 'pattern': pattern})
+                break
+
+    numbering_style = 'none'
+    if any(re.match(r'^\d+\.', line.strip()) for line in lines):
+        numbering_style = 'numeric'
+    elif any(re.match(r'^[a-z]\)', line.strip()) for line in lines):
+        numbering_style = 'alphabetic'
+    elif any(re.match(r'^[IVX]+\.', line.strip()) for line in lines):
+        numbering_style = 'roman'
+    elif any(re.match(r'^\*\s+', line.strip()) or re.match(r'^-\s+', line.strip()) for line in lines):
+        numbering_style = 'bullets'
+
+    common_sections = []
+    section_keywords = [
+        'abstract', 'introduction', 'background', 'objective', 'objectives',
+        'methodology', 'method', 'approach', 'timeline', 'schedule',
+        'budget', 'cost', 'resources', 'team', 'participants',
+        'results', 'outcome', 'outcomes', 'conclusion', 'summary',
+        'recommendations', 'next steps', 'follow-up', 'references'
+    ]
+    for line in lines:
+        line_lower = line.strip().lower()
+        for keyword in section_keywords:
+            if keyword in line_lower and len(line.strip()) < 50:
+                common_sections.append(line.strip())
+                break
+
+    return {
+        'sections': sections,
+        'common_sections': common_sections,
+        'numbering_style': numbering_style,
+        'formatting_features': {
+            'has_dates': bool(re.search(r'\d{1,2}[-/]\d{1,2}[-/]\d{2,4}', text)),
+            'has_bullets': bool(re.search(r'[•\-\*]\s+\w+', text)),
+            'has_numbered_lists': bool(re.search(r'\d+\.\s+\w+', text))
+        },
+        'total_sections': len(sections)
+    }
+
+
+CASES = [
+    '',
+    '\n\n',
+    '1.\nIntroduction',
+    '1. \nIntroduction',
+    'Item 3.\n   details follow',
+    '-\nnext line',
+    '•\n\tBudget',
+    '* \n  x',
+    '# Title\n## Budget\nSome text',
+    'EVENT REPORT\nOVERVIEW:\n  a) first\n  b) second',
+    'II. Background\nIV.\nXI. Results',
+    'Summary:\nTimeline :\nDate: 12/03/2026 and 1-2-26',
+    'Cost breakdown of the next steps for the follow-up team and all participants',
+    'Ｉntroduction ✓\n Budget \n\tRÉSUMÉ:',
+    '12.5 million\n3.Introduction\n4.  Approach',
+    'a)\nb) Methodology\n- bullet\n* star',
+    'line ending in 7.\n\n\nWord',
+    'OBJECTIVES\r\nTEAM:\r\n1. Plan\r\n',
+]
+
+
+@pytest.mark.parametrize('text', CASES)
+def test_matches_reference_on_edge_cases(text):
+    assert TemplateAnalyzer()._extract_structure(text) == reference_extract_structure(text)
+
+
+def test_matches_reference_on_generated_documents():
+    fragments = [
+        '', ' ', '\t', '1.', '12. ', 'IV.', 'V. ', 'a)', '-', '- ', '*', '* ', '•', '• ', '#', '## ',
+        'Introduction', 'BUDGET', 'Summary:', 'next steps', 'team', 'Overview', 'x', '42', '3/4/2026',
+        '10-11-25', 'é', 'Ünïcode', ':', 'Title Case', 'ALL CAPS', '   ', 'word.', '\r',
+        '\x0b', '\x0c', '\u00a0', '\u2003', '\u2028', '_'
+    ]
+    rng = random.Random(1234)
+    analyzer = TemplateAnalyzer()
+    for _ in range(2000):
+        lines = [''.join(rng.choice(fragments) for _ in range(rng.randint(0, 4))) for _ in range(rng.randint(1, 8))]
+        text = '\n'.join(lines)
+        assert analyzer._extract_structure(text) == reference_extract_structure(text), repr(text)
+
+
+def test_matches_reference_on_standard_templates():
+    folder = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'rag', 'source_docs')
+    paths = glob.glob(os.path.join(folder, '*.txt'))
+    assert paths
+    analyzer = TemplateAnalyzer()
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        assert analyzer._extract_structure(text) == reference_extract_structure(text), path